@@ -0,0 +1,114 @@
+import argparse
+import csv
+import sys
+from itertools import islice
+from time import perf_counter
+
+import numpy
+
+import config
+from data_importer import (
+    DATE_AND_TIME_HEADER,
+    ODOMETER_KM_HEADER,
+    TRIP_DISTANCE_KM_HEADER,
+    TRIP_ENGINE_RUNNING_TIME_M_HEADER,
+    VEHICLE_TEMPERATURE_CELSIUS_HEADER,
+    parse_date_and_time_column,
+    parse_float_column
+)
+from exported_model import load_compiled_solution
+from solver_solution import CompiledSolverSolution
+from trip_table import trip_log_features
+
+# columns of the input CSV that the predictions depend on, in the order of the arguments of trip_log_features
+INPUT_HEADERS: tuple[str, ...] = (
+    DATE_AND_TIME_HEADER,
+    ODOMETER_KM_HEADER,
+    TRIP_DISTANCE_KM_HEADER,
+    VEHICLE_TEMPERATURE_CELSIUS_HEADER,
+    TRIP_ENGINE_RUNNING_TIME_M_HEADER
+)
+PREDICTED_FUEL_EFFICIENCY_M_PER_L_HEADER: str = "Predicted Fuel Efficiency (m/L)"
+PREDICTED_FUEL_EFFICIENCY_L_PER_HUNDRED_KM_HEADER: str = "Predicted Fuel Efficiency (L/100Km)"
+
+def predict_rows(compiled_solution: CompiledSolverSolution, input_indices: tuple[int, ...], rows: list[list[str]]) -> numpy.ndarray:
+    """
+    predicted fuel efficiency (m/L) of the trip of each row of a trip log,
+    nan for rows with missing or invalid inputs, or negative inputs, which the solution is not defined for (see positive_inputs)
+
+    args:
+        input_indices: tuple[int, ...] - column of each of INPUT_HEADERS in the rows
+    """
+    date_and_time, valid = parse_date_and_time_column([row[input_indices[0]] if input_indices[0] < len(row) else "" for row in rows])
+    float_columns: list[numpy.ndarray] = list()
+    for index in input_indices[1:]:
+        floats, valid_floats = parse_float_column([row[index] if index < len(row) else "" for row in rows])
+        float_columns.append(floats)
+        valid &= valid_floats
+    features: numpy.ndarray = trip_log_features(date_and_time, *float_columns)
+    with numpy.errstate(invalid="ignore"):
+        valid &= numpy.all(numpy.isfinite(features) & (features >= 0), axis=1)
+    predictions_m_per_l: numpy.ndarray = numpy.full(len(rows), numpy.nan)
+    if numpy.any(valid):
+        with numpy.errstate(all="ignore"):
+            predictions_m_per_l[valid] = compiled_solution.f(features[valid])
+    return predictions_m_per_l
+
+def format_predictions(values: numpy.ndarray) -> list[str]:
+    """
+    values with two decimals, "" where there is no prediction
+    """
+    return ["{:.2f}".format(value) if numpy.isfinite(value) else "" for value in values.tolist()]
+
+def predict_trip_log(input_file_path: str, output_file_path: str, compiled_solution: CompiledSolverSolution, chunk_size: int) -> tuple[int, int]:
+    """
+    writes every row of a trip log CSV with the predicted fuel efficiency of its trip appended, in m/L and L/100Km,
+    reading, predicting and writing chunk_size rows at a time, so any size of trip log fits in memory
+
+    the input only needs the columns of INPUT_HEADERS, rows without a prediction get empty predicted columns
+
+    returns:
+        the number of rows, and of rows with a prediction
+    """
+    assert chunk_size > 0
+    number_of_rows: int = 0
+    number_of_predictions: int = 0
+    with open(input_file_path, "r", newline="") as input_file, open(output_file_path, "w", newline="") as output_file:
+        reader = csv.reader(input_file)
+        writer = csv.writer(output_file)
+        headers: list[str] = next(reader)
+        input_indices: tuple[int, ...] = tuple(headers.index(header) for header in INPUT_HEADERS)
+        writer.writerow(headers + [PREDICTED_FUEL_EFFICIENCY_M_PER_L_HEADER, PREDICTED_FUEL_EFFICIENCY_L_PER_HUNDRED_KM_HEADER])
+        padding: list[str] = [""] * len(headers)
+        while True:
+            rows: list[list[str]] = list(islice(reader, chunk_size))
+            if len(rows) == 0:
+                break
+            predictions_m_per_l: numpy.ndarray = predict_rows(compiled_solution, input_indices, rows)
+            with numpy.errstate(divide="ignore"):
+                predictions_l_per_hundred_km: numpy.ndarray = 100000 / predictions_m_per_l
+            writer.writerows([
+                (row + padding[len(row):]) + [m_per_l, l_per_hundred_km]
+                for row, m_per_l, l_per_hundred_km in zip(rows, format_predictions(predictions_m_per_l), format_predictions(predictions_l_per_hundred_km))
+            ])
+            number_of_rows += len(rows)
+            number_of_predictions += int(numpy.count_nonzero(numpy.isfinite(predictions_m_per_l)))
+    return number_of_rows, number_of_predictions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predicts the fuel efficiency of every trip of a trip log CSV with a trained solution")
+    parser.add_argument("input", help="trip log CSV, only the date and time, odometer, distance, temperature and engine running time columns are needed")
+    parser.add_argument("output", help="CSV to write, the input with the predicted fuel efficiency columns appended")
+    parser.add_argument("--model", default=config.GA_EXPORT_FILE, help="exported model of the training run, see exported_model")
+    parser.add_argument("--checkpoint", default=config.GA_CHECKPOINT_FILE, help="checkpoint of the training run, used without an exported model, falls back to the pygad pickle of config.GA_MODEL_FILE")
+    parser.add_argument("--chunk-size", type=int, default=config.PREDICTION_CHUNK_SIZE_ROWS, help="rows read, predicted and written at a time")
+    arguments = parser.parse_args()
+
+    compiled_solution: CompiledSolverSolution | None = load_compiled_solution(arguments.model, arguments.checkpoint)
+    if compiled_solution is None:
+        print("No trained solution found in {}, {} or {}.pkl".format(arguments.model, arguments.checkpoint, config.GA_MODEL_FILE), file=sys.stderr)
+        exit(1)
+    start: float = perf_counter()
+    number_of_rows, number_of_predictions = predict_trip_log(arguments.input, arguments.output, compiled_solution, arguments.chunk_size)
+    seconds: float = perf_counter() - start
+    print("Predicted {:d} of {:d} trips in {:.1f}s ({:.0f} rows / minute)".format(number_of_predictions, number_of_rows, seconds, number_of_rows / seconds * 60 if seconds > 0 else 0), file=sys.stderr)
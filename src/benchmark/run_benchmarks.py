@@ -0,0 +1,290 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from statistics import median
+from time import perf_counter
+from typing import Any, Callable
+
+import numpy
+import pygad
+
+import config
+import genetic_learner
+from benchmark.synthetic_trips import write_synthetic_trip_log
+from data_importer import DataImporter
+from solver_input_solution import SolverInputSolution, bounded_to_gauss
+from solver_solution import SolverSolution, solver_solution_from_chromosome
+from worker_pool import FitnessWorkerPool
+
+BENCHMARK_FORMAT_VERSION: int = 1 # increase when the meaning of a result changes, results of different versions are not comparable
+BENCHMARKS: tuple[str, ...] = ("startup", "bounded_to_gauss", "solver_input_solution_f", "solver_solution_f", "fitness", "fitness_batch", "import", "import_cached", "generation")
+STARTUP_MODULES: tuple[str, ...] = ("genetic_learner", "worker_pool", "batch_predictor", "exported_model") # entry points of the scripts and of the worker processes
+DEFAULT_TRIP_COUNTS: tuple[int, ...] = (100, 1000, 10000)
+SCALAR_CALLS_PER_OPERATION: int = 1000
+SEED: int = 0
+
+class BenchmarkResult:
+    def __init__(self, name: str, number_of_trips: int, unit: str, operations: int, seconds: float):
+        self.name: str = name
+        self.number_of_trips: int = number_of_trips
+        self.unit: str = unit # what an operation is, e.g. "chromosomes"
+        self.operations: int = operations
+        self.seconds: float = seconds
+
+    @property
+    def operations_per_second(self) -> float:
+        return self.operations / self.seconds
+
+    def to_dict(self) -> dict[str, Any]:
+        result: dict[str, Any] = {
+            "name": self.name,
+            "trips": self.number_of_trips,
+            "unit": self.unit,
+            "operations": self.operations,
+            "seconds": self.seconds,
+            "operations_per_second": self.operations_per_second
+        }
+        if self.unit == "generations":
+            result["generations_per_hour"] = self.operations_per_second * 3600
+        return result
+
+    def __str__(self) -> str:
+        return "{:<24s} {:>8d} trips {:>14.2f} {}/s".format(self.name, self.number_of_trips, self.operations_per_second, self.unit)
+
+def measure(name: str, number_of_trips: int, unit: str, operation: Callable[[], int], minimum_seconds: float) -> BenchmarkResult:
+    """
+    calls operation, which returns how many units it processed, until at least minimum_seconds have passed
+    """
+    operation() # warm up caches and lazy initialization
+    operations: int = 0
+    start: float = perf_counter()
+    seconds: float = 0.0
+    while seconds < minimum_seconds or operations == 0:
+        operations += operation()
+        seconds = perf_counter() - start
+    return BenchmarkResult(name, number_of_trips, unit, operations, seconds)
+
+def random_population(generator: numpy.random.Generator, number_of_chromosomes: int) -> numpy.ndarray:
+    return generator.random((number_of_chromosomes, config.GA_CHROMOSOME_LENGTH))
+
+def use_trip_log(file_path: str):
+    """
+    points genetic_learner at another trip log, dropping the dataset and caches of the previous one
+    """
+    config.DATA_FILE_PATH = file_path
+    genetic_learner.data_importer = None
+    genetic_learner.fitness_evaluator = None
+
+def benchmark_startup(module_name: str, minimum_seconds: float) -> BenchmarkResult:
+    """
+    starts a new interpreter that only imports the module, as running one of the scripts or spawning a worker process does
+    """
+    source_directory: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def operation() -> int:
+        subprocess.run([sys.executable, "-c", "import " + module_name], cwd=source_directory, check=True)
+        return 1
+    return measure("startup_" + module_name, 0, "starts", operation, minimum_seconds)
+
+def benchmark_bounded_to_gauss(minimum_seconds: float) -> BenchmarkResult:
+    x: list[float] = numpy.random.default_rng(SEED).uniform(0, 1, SCALAR_CALLS_PER_OPERATION).tolist() # type: ignore
+
+    def operation() -> int:
+        for value in x:
+            bounded_to_gauss(value, 1.0, 0.5)
+        return len(x)
+    return measure("bounded_to_gauss", 0, "calls", operation, minimum_seconds)
+
+def benchmark_solver_input_solution_f(minimum_seconds: float) -> BenchmarkResult:
+    generator: numpy.random.Generator = numpy.random.default_rng(SEED)
+    solver_input_solution: SolverInputSolution = SolverInputSolution(tuple(generator.random(config.GENES_PER_VARIABLE))) # type: ignore
+    x: list[float] = generator.uniform(0.01, 2, SCALAR_CALLS_PER_OPERATION).tolist() # type: ignore
+
+    def operation() -> int:
+        for value in x:
+            solver_input_solution.f(value)
+        return len(x)
+    return measure("solver_input_solution_f", 0, "calls", operation, minimum_seconds)
+
+def benchmark_solver_solution_f(data_importer: DataImporter, minimum_seconds: float) -> BenchmarkResult:
+    solver_solution: SolverSolution = solver_solution_from_chromosome(random_population(numpy.random.default_rng(SEED), 1)[0])
+    vehicle_trips = data_importer.vehicle_trips[:SCALAR_CALLS_PER_OPERATION]
+
+    def operation() -> int:
+        with numpy.errstate(all="ignore"):
+            for vehicle_trip in vehicle_trips:
+                solver_solution.f(vehicle_trip)
+        return len(vehicle_trips)
+    return measure("solver_solution_f", len(data_importer.vehicle_trips), "calls", operation, minimum_seconds)
+
+def benchmark_fitness(ga_instance: pygad.GA, number_of_trips: int, batch_size: int, minimum_seconds: float) -> BenchmarkResult:
+    """
+    scores new random chromosomes, so that no fitness cache hits are measured
+    """
+    generator: numpy.random.Generator = numpy.random.default_rng(SEED)
+
+    def operation() -> int:
+        chromosomes: numpy.ndarray = random_population(generator, batch_size)
+        if batch_size == 1:
+            genetic_learner.fitness(ga_instance, chromosomes[0], 0)
+        else:
+            genetic_learner.fitness_batch(ga_instance, chromosomes, list(range(batch_size)))
+        return batch_size
+    return measure("fitness" if batch_size == 1 else "fitness_batch", number_of_trips, "chromosomes", operation, minimum_seconds)
+
+def benchmark_import(file_path: str, number_of_trips: int, minimum_seconds: float) -> BenchmarkResult:
+    """
+    parses the whole trip log on every call, never reading or writing its binary cache
+    """
+    def operation() -> int:
+        return len(DataImporter(file_path, use_cache=False, incremental=False).trip_table)
+    return measure("import", number_of_trips, "trips", operation, minimum_seconds)
+
+def benchmark_import_cached(file_path: str, number_of_trips: int, minimum_seconds: float) -> BenchmarkResult:
+    """
+    loads the trips from the binary cache next to the trip log, which the warm up call writes
+    """
+    def operation() -> int:
+        return len(DataImporter(file_path, use_cache=True).trip_table)
+    return measure("import_cached", number_of_trips, "trips", operation, minimum_seconds)
+
+def benchmark_generation(number_of_trips: int, number_of_generations: int, number_of_workers: int) -> BenchmarkResult:
+    """
+    runs number_of_generations generations of the configured GA, the first one is left out when there are more,
+    as it also scores the whole initial population
+    """
+    fitness_evaluator = genetic_learner.load_dataset()
+    if number_of_workers > 1:
+        genetic_learner.fitness_worker_pool = FitnessWorkerPool(fitness_evaluator, number_of_workers, config.GA_FITNESS_BATCH_SIZE)
+    generation_goal: int = config.GA_GENERATION_GOAL
+    config.GA_GENERATION_GOAL = number_of_generations
+    try:
+        ga_instance: pygad.GA = genetic_learner.create_ga_instance()
+        generation_end_times: list[float] = list()
+
+        def on_generation(ga_instance: pygad.GA):
+            genetic_learner.report_generation(ga_instance)
+            generation_end_times.append(perf_counter())
+        ga_instance.on_generation = on_generation
+        start: float = perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ga_instance.run()
+    finally:
+        config.GA_GENERATION_GOAL = generation_goal
+        genetic_learner.stop_helper_processes()
+    generation_seconds: list[float] = numpy.diff([start] + generation_end_times).tolist() # type: ignore
+    if len(generation_seconds) > 1:
+        generation_seconds = generation_seconds[1:]
+    return BenchmarkResult("generation", number_of_trips, "generations", 1, median(generation_seconds))
+
+def environment() -> dict[str, Any]:
+    try:
+        commit: str | None = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "benchmark_format_version": BENCHMARK_FORMAT_VERSION,
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pygad": pygad.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "population_size": config.GA_POPULATION_SIZE,
+        "fitness_batch_size": config.GA_FITNESS_BATCH_SIZE,
+        "incremental_evaluation": config.GA_INCREMENTAL_EVALUATION,
+        "trip_chunk_size": config.GA_TRIP_CHUNK_SIZE
+    }
+
+def run_benchmarks(trip_counts: list[int], benchmarks: list[str], minimum_seconds: float, number_of_generations: int, number_of_workers: int, work_directory: str) -> list[BenchmarkResult]:
+    results: list[BenchmarkResult] = list()
+
+    def record(result: BenchmarkResult):
+        print(result, file=sys.stderr)
+        results.append(result)
+
+    if "startup" in benchmarks:
+        for module_name in STARTUP_MODULES:
+            record(benchmark_startup(module_name, minimum_seconds))
+    if "bounded_to_gauss" in benchmarks:
+        record(benchmark_bounded_to_gauss(minimum_seconds))
+    if "solver_input_solution_f" in benchmarks:
+        record(benchmark_solver_input_solution_f(minimum_seconds))
+    for number_of_trips in trip_counts:
+        file_path: str = os.path.join(work_directory, "synthetic_trips_{:d}.csv".format(number_of_trips))
+        if not os.path.isfile(file_path):
+            write_synthetic_trip_log(file_path, number_of_trips, SEED)
+        use_trip_log(file_path)
+        if "import" in benchmarks:
+            record(benchmark_import(file_path, number_of_trips, minimum_seconds))
+        if "import_cached" in benchmarks:
+            record(benchmark_import_cached(file_path, number_of_trips, minimum_seconds))
+        if "solver_solution_f" in benchmarks:
+            record(benchmark_solver_solution_f(DataImporter(file_path), minimum_seconds))
+        if "fitness" in benchmarks or "fitness_batch" in benchmarks:
+            genetic_learner.load_dataset()
+            ga_instance: pygad.GA = genetic_learner.create_ga_instance()
+            if "fitness" in benchmarks:
+                record(benchmark_fitness(ga_instance, number_of_trips, 1, minimum_seconds))
+            if "fitness_batch" in benchmarks:
+                record(benchmark_fitness(ga_instance, number_of_trips, config.GA_FITNESS_BATCH_SIZE, minimum_seconds))
+        if "generation" in benchmarks:
+            use_trip_log(file_path) # start without the cache entries of the fitness benchmarks
+            record(benchmark_generation(number_of_trips, number_of_generations, number_of_workers))
+    return results
+
+def compare_results(baseline: dict[str, Any], results: list[BenchmarkResult]):
+    """
+    prints how many times faster each result is than the same benchmark in a previous report
+    """
+    if baseline["environment"]["benchmark_format_version"] != BENCHMARK_FORMAT_VERSION:
+        print("Baseline has benchmark format version {}, not {:d}, not comparing".format(baseline["environment"]["benchmark_format_version"], BENCHMARK_FORMAT_VERSION), file=sys.stderr)
+        return
+    baseline_results: dict[tuple[str, int], dict[str, Any]] = {(result["name"], result["trips"]): result for result in baseline["results"]}
+    print("Compared to {}:".format(baseline["environment"]["commit"]), file=sys.stderr)
+    for result in results:
+        baseline_result: dict[str, Any] | None = baseline_results.get((result.name, result.number_of_trips))
+        if baseline_result is not None:
+            print("{:<24s} {:>8d} trips {:>8.2f}x".format(result.name, result.number_of_trips, result.operations_per_second / baseline_result["operations_per_second"]), file=sys.stderr)
+
+if __name__ == "__main__":
+    # from src: python -m benchmark.run_benchmarks --trips 100 1000 10000 100000 1000000 --output results.json
+    parser = argparse.ArgumentParser(description="Times the solver on synthetic trip logs and reports the results as JSON")
+    parser.add_argument("--trips", type=int, nargs="+", default=list(DEFAULT_TRIP_COUNTS), help="numbers of trips of the synthetic trip logs")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--minimum-seconds", type=float, default=1.0, help="minimum time spent repeating each benchmark")
+    parser.add_argument("--generations", type=int, default=3, help="number of generations run by the generation benchmark")
+    parser.add_argument("--population", type=int, default=config.GA_POPULATION_SIZE, help="population size of the generation benchmark")
+    parser.add_argument("--workers", type=int, default=1, help="number of fitness worker processes of the generation benchmark")
+    parser.add_argument("--directory", default=None, help="where to keep the synthetic trip logs, a temporary directory by default")
+    parser.add_argument("--output", default=None, help="JSON file to write, standard output by default")
+    parser.add_argument("--compare", default=None, help="JSON file of a previous run to compare with")
+    arguments = parser.parse_args()
+    config.GA_POPULATION_SIZE = arguments.population
+    config.GA_NUMBER_OF_PARENTS = min(config.GA_NUMBER_OF_PARENTS, arguments.population)
+    config.GA_FITNESS_BATCH_SIZE = min(config.GA_FITNESS_BATCH_SIZE, arguments.population)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        work_directory: str = arguments.directory if arguments.directory is not None else temporary_directory
+        os.makedirs(work_directory, exist_ok=True)
+        results: list[BenchmarkResult] = run_benchmarks(arguments.trips, arguments.benchmarks, arguments.minimum_seconds, arguments.generations, arguments.workers, work_directory)
+
+    report: dict[str, Any] = {"environment": environment(), "results": [result.to_dict() for result in results]}
+    if arguments.output is None:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+    else:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=4)
+    if arguments.compare is not None:
+        with open(arguments.compare, "r") as file:
+            compare_results(json.load(file), results)
@@ -0,0 +1,85 @@
+import csv
+import sys
+from datetime import datetime, timedelta
+
+import numpy
+
+from data_importer import (
+    DATE_AND_TIME_FORMAT,
+    DATE_AND_TIME_HEADER,
+    FUEL_EFFICIENCY_L_PER_HUNDRED_KM_HEADER,
+    ODOMETER_KM_HEADER,
+    TRIP_DISTANCE_KM_HEADER,
+    TRIP_ENGINE_RUNNING_TIME_M_HEADER,
+    VEHICLE_TEMPERATURE_CELSIUS_HEADER
+)
+
+TRIP_LOG_HEADERS: tuple[str, ...] = (
+    DATE_AND_TIME_HEADER,
+    ODOMETER_KM_HEADER,
+    TRIP_DISTANCE_KM_HEADER,
+    VEHICLE_TEMPERATURE_CELSIUS_HEADER,
+    TRIP_ENGINE_RUNNING_TIME_M_HEADER,
+    FUEL_EFFICIENCY_L_PER_HUNDRED_KM_HEADER,
+    "Notes" # real logs have columns that DataImporter ignores
+)
+FIRST_TRIP_DATE_AND_TIME: datetime = datetime(2024, 7, 26, 7, 30)
+FIRST_TRIP_ODOMETER_KM: float = 150000.0
+ROWS_PER_WRITE: int = 10000
+
+def write_synthetic_trip_log(file_path: str, number_of_trips: int, seed: int = 0, incomplete_trip_fraction: float = 0.001):
+    """
+    writes a trip log CSV with the headers that DataImporter expects,
+    with trips of plausible distance, speed, temperature and fuel efficiency, which depends on the other columns plus noise
+
+    args:
+        file_path: str - CSV file to write, overwritten if it exists
+        number_of_trips: int - number of complete trips, which DataImporter imports
+        seed: int - the same seed writes the same trips
+        incomplete_trip_fraction: float - additional rows with missing values per complete trip, which DataImporter skips
+    """
+    assert number_of_trips >= 0
+    assert 0 <= incomplete_trip_fraction < 1
+    generator: numpy.random.Generator = numpy.random.default_rng(seed)
+    hours_since_previous_trip: numpy.ndarray = generator.uniform(2, 30, number_of_trips)
+    trip_distance_km: numpy.ndarray = numpy.round(generator.lognormal(2.3, 0.9, number_of_trips).clip(0.5, 600), 1)
+    trip_average_speed_km_per_h: numpy.ndarray = generator.uniform(15, 110, number_of_trips)
+    vehicle_temperature_celsius: numpy.ndarray = numpy.round(generator.normal(12, 11, number_of_trips).clip(-35, 45), 1)
+    trip_engine_running_time_m: numpy.ndarray = numpy.round(60 * trip_distance_km / trip_average_speed_km_per_h + generator.uniform(0, 5, number_of_trips), 1)
+    fuel_efficiency_l_per_hundred_km: numpy.ndarray = numpy.round((
+        5.2
+        + 4.0 * numpy.exp(-trip_distance_km / 8) # cold engine on short trips
+        + 0.04 * numpy.maximum(0, 15 - vehicle_temperature_celsius)
+        + 0.0006 * (trip_average_speed_km_per_h - 70) ** 2
+        + generator.normal(0, 0.4, number_of_trips)
+    ).clip(2.5, 25), 1)
+    odometer_km: numpy.ndarray = FIRST_TRIP_ODOMETER_KM + numpy.cumsum(trip_distance_km)
+    seconds_since_first_trip: numpy.ndarray = numpy.cumsum(numpy.round(hours_since_previous_trip * 3600))
+    incomplete_trip_indices: set[int] = set(int(index) for index in generator.choice(number_of_trips, int(number_of_trips * incomplete_trip_fraction), replace=False)) if number_of_trips > 0 else set()
+
+    with open(file_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(TRIP_LOG_HEADERS)
+        rows: list[list[str]] = list()
+        for index in range(number_of_trips):
+            date_and_time: str = (FIRST_TRIP_DATE_AND_TIME + timedelta(seconds=float(seconds_since_first_trip[index]))).strftime(DATE_AND_TIME_FORMAT)
+            rows.append([
+                date_and_time,
+                "{:.1f}".format(odometer_km[index]),
+                "{:.1f}".format(trip_distance_km[index]),
+                "{:.1f}".format(vehicle_temperature_celsius[index]),
+                "{:.1f}".format(trip_engine_running_time_m[index]),
+                "{:.1f}".format(fuel_efficiency_l_per_hundred_km[index]),
+                ""
+            ])
+            if index in incomplete_trip_indices:
+                # e.g. the fuel efficiency was not noted down
+                rows.append([date_and_time, "{:.1f}".format(odometer_km[index]), "", "", "", "", "not reported"])
+            if len(rows) >= ROWS_PER_WRITE:
+                writer.writerows(rows)
+                rows.clear()
+        writer.writerows(rows)
+
+if __name__ == "__main__":
+    # python -m benchmark.synthetic_trips <file path> <number of trips>
+    write_synthetic_trip_log(sys.argv[1], int(sys.argv[2]))
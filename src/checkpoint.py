@@ -0,0 +1,247 @@
+import os
+import random
+import threading
+from time import monotonic
+
+import numpy
+import pygad
+
+from chromosome import Chromosome, Population
+
+class Checkpoint:
+    """
+    Compact state of a genetic algorithm run, enough to continue it without the pygad pickle:
+    the population with its fitness, the elites, the generation counter and the state of the random number generators,
+    along with the trips the population was scored on, to continue on a dataset that has new trips since
+
+    With racing evaluation, the fitness of chromosomes below fitness_cutoff may only be a bound (see FitnessEvaluator.score),
+    exact_fitness tells which scores are exact.
+    """
+    def __init__(self,
+                 population: Population,
+                 fitness: numpy.ndarray,
+                 fitness_cutoff: float,
+                 elitism: Population,
+                 generations_completed: int,
+                 dataset_version: float,
+                 trip_chunk_index: int,
+                 number_of_trips: int,
+                 trips_checksum: bytes,
+                 numpy_random_state: tuple,
+                 python_random_state: tuple):
+        self.population: Population = population
+        self.fitness: numpy.ndarray = fitness
+        self.fitness_cutoff: float = fitness_cutoff # racing cutoff the fitness was scored with, -inf if none
+        self.elitism: Population = elitism
+        self.generations_completed: int = generations_completed
+        self.dataset_version: float = dataset_version
+        self.trip_chunk_index: int = trip_chunk_index
+        self.number_of_trips: int = number_of_trips # trips in the dataset, 0 if unknown
+        self.trips_checksum: bytes = trips_checksum # see TripTable.checksum
+        self.numpy_random_state: tuple = numpy_random_state
+        self.python_random_state: tuple = python_random_state
+
+    @classmethod
+    def from_ga_instance(cls, ga_instance: pygad.GA, fitness_cutoff: float, dataset_version: float, trip_chunk_index: int, number_of_trips: int, trips_checksum: bytes) -> "Checkpoint":
+        """
+        copies the current state of the run, so that pygad can keep modifying its arrays while the checkpoint is written
+
+        args:
+            fitness_cutoff: float - racing cutoff the current generation was scored with, -inf if it was scored without racing
+        """
+        elitism: Population | None = ga_instance.last_generation_elitism # type: ignore
+        return cls(
+            population=numpy.array(ga_instance.population, dtype=numpy.float64),
+            fitness=numpy.array(ga_instance.last_generation_fitness, dtype=numpy.float64),
+            fitness_cutoff=fitness_cutoff,
+            elitism=numpy.array(elitism if elitism is not None else ga_instance.population[:0], dtype=numpy.float64), # type: ignore
+            generations_completed=int(ga_instance.generations_completed),
+            dataset_version=dataset_version,
+            trip_chunk_index=trip_chunk_index,
+            number_of_trips=number_of_trips,
+            trips_checksum=trips_checksum,
+            numpy_random_state=numpy.random.get_state(), # type: ignore
+            python_random_state=random.getstate()
+        )
+
+    @property
+    def exact_fitness(self) -> numpy.ndarray:
+        """
+        which scores of fitness are exact, the others may be the bounds of a racing evaluation
+        """
+        with numpy.errstate(invalid="ignore"):
+            return self.fitness >= self.fitness_cutoff
+
+    @property
+    def best_chromosome(self) -> Chromosome:
+        if len(self.elitism) > 0:
+            return self.elitism[0]
+        return self.population[int(numpy.argmax(self.fitness))]
+
+    def restore_random_state(self):
+        numpy.random.set_state(self.numpy_random_state)
+        random.setstate(self.python_random_state)
+
+    def save(self, file_path: str):
+        """
+        writes the checkpoint next to file_path, then renames it over file_path,
+        so a crash while writing never leaves a partial checkpoint behind
+        """
+        numpy_generator, numpy_keys, numpy_position, numpy_has_gauss, numpy_cached_gaussian = self.numpy_random_state
+        python_version, python_internal_state, python_gauss_next = self.python_random_state
+        temporary_file_path: str = file_path + ".tmp"
+        with open(temporary_file_path, "wb") as file:
+            numpy.savez(
+                file,
+                population=self.population,
+                fitness=self.fitness,
+                fitness_cutoff=numpy.float64(self.fitness_cutoff),
+                elitism=self.elitism,
+                generations_completed=numpy.int64(self.generations_completed),
+                dataset_version=numpy.float64(self.dataset_version),
+                trip_chunk_index=numpy.int64(self.trip_chunk_index),
+                number_of_trips=numpy.int64(self.number_of_trips),
+                trips_checksum=numpy.frombuffer(self.trips_checksum, dtype=numpy.uint8),
+                numpy_random_generator=numpy.str_(numpy_generator),
+                numpy_random_keys=numpy_keys,
+                numpy_random_position=numpy.int64(numpy_position),
+                numpy_random_has_gauss=numpy.int64(numpy_has_gauss),
+                numpy_random_cached_gaussian=numpy.float64(numpy_cached_gaussian),
+                python_random_version=numpy.int64(python_version),
+                python_random_internal_state=numpy.array(python_internal_state, dtype=numpy.int64),
+                python_random_gauss_next=numpy.float64(numpy.nan if python_gauss_next is None else python_gauss_next)
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_file_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "Checkpoint":
+        with numpy.load(file_path, allow_pickle=False) as data:
+            python_gauss_next: float = float(data["python_random_gauss_next"])
+            return cls(
+                population=data["population"],
+                fitness=data["fitness"],
+                # checkpoints of older versions do not know which of their scores are racing bounds, so none are trusted
+                fitness_cutoff=float(data["fitness_cutoff"]) if "fitness_cutoff" in data.files else numpy.inf,
+                elitism=data["elitism"],
+                generations_completed=int(data["generations_completed"]),
+                dataset_version=float(data["dataset_version"]),
+                trip_chunk_index=int(data["trip_chunk_index"]),
+                # checkpoints of older versions do not know their trips
+                number_of_trips=int(data["number_of_trips"]) if "number_of_trips" in data.files else 0,
+                trips_checksum=data["trips_checksum"].tobytes() if "trips_checksum" in data.files else bytes(),
+                numpy_random_state=(
+                    str(data["numpy_random_generator"]),
+                    data["numpy_random_keys"],
+                    int(data["numpy_random_position"]),
+                    int(data["numpy_random_has_gauss"]),
+                    float(data["numpy_random_cached_gaussian"])
+                ),
+                python_random_state=(
+                    int(data["python_random_version"]),
+                    tuple(data["python_random_internal_state"].tolist()),
+                    None if numpy.isnan(python_gauss_next) else python_gauss_next
+                )
+            )
+
+def load_best_chromosome(checkpoint_file_path: str, model_file_path: str) -> Chromosome | None:
+    """
+    best chromosome of a training run, from its checkpoint, or from the pygad pickle of older runs (model_file_path without ".pkl"),
+    None if there is neither
+    """
+    if os.path.isfile(checkpoint_file_path):
+        return Checkpoint.load(checkpoint_file_path).best_chromosome
+    if os.path.isfile(model_file_path + ".pkl"):
+        ga_instance: pygad.GA = pygad.load(model_file_path)
+        assert ga_instance.last_generation_elitism is not None
+        return ga_instance.last_generation_elitism[0] # type: ignore
+    return None
+
+class CheckpointWriter:
+    """
+    Writes checkpoints in a background thread, at most every interval_generations generations or interval_seconds seconds,
+    whichever comes first. If a checkpoint is still being written when the next one is due,
+    only the newest pending checkpoint is kept.
+
+    A checkpoint that cannot be written to disk (OSError) is reported and skipped, any other error
+    is kept and raised by the next flush, while the thread goes on writing the checkpoints queued after it.
+    """
+    def __init__(self, file_path: str, interval_generations: int, interval_seconds: float):
+        assert interval_generations > 0
+        assert interval_seconds > 0
+        self.__file_path: str = file_path
+        self.__interval_generations: int = interval_generations
+        self.__interval_seconds: float = interval_seconds
+        self.__last_generation: int | None = None
+        self.__last_time: float = monotonic()
+        self.__pending: Checkpoint | None = None
+        self.__writing: bool = False
+        self.__error: Exception | None = None # first unexpected error of the thread since the last flush
+        self.__condition: threading.Condition = threading.Condition()
+        self.__thread: threading.Thread = threading.Thread(target=self.__write_loop, name="checkpoint writer", daemon=True)
+        self.__thread.start()
+
+    def is_due(self, generations_completed: int) -> bool:
+        if self.__last_generation is None:
+            self.__last_generation = generations_completed
+        return (
+            generations_completed - self.__last_generation >= self.__interval_generations
+            or monotonic() - self.__last_time >= self.__interval_seconds
+        )
+
+    def save(self, checkpoint: Checkpoint):
+        """
+        queues the checkpoint to be written, replacing any checkpoint that has not started being written yet
+        """
+        self.__last_generation = checkpoint.generations_completed
+        self.__last_time = monotonic()
+        with self.__condition:
+            self.__pending = checkpoint
+            self.__condition.notify_all()
+
+    def save_if_due(self, ga_instance: pygad.GA, fitness_cutoff: float, dataset_version: float, trip_chunk_index: int, number_of_trips: int, trips_checksum: bytes) -> bool:
+        if not self.is_due(ga_instance.generations_completed):
+            return False
+        self.save(Checkpoint.from_ga_instance(ga_instance, fitness_cutoff, dataset_version, trip_chunk_index, number_of_trips, trips_checksum))
+        return True
+
+    def flush(self):
+        """
+        blocks until every queued checkpoint has been written
+
+        raises:
+            Exception - the first error other than an OSError that writing a checkpoint raised since the last flush
+            RuntimeError - if the thread stopped with checkpoints left to write
+        """
+        with self.__condition:
+            # with a timeout, as a thread that stopped would never notify
+            while not self.__condition.wait_for(lambda: self.__pending is None and not self.__writing, timeout=1.0):
+                if not self.__thread.is_alive():
+                    raise RuntimeError("The checkpoint writer stopped before writing every checkpoint to {}".format(self.__file_path))
+            error: Exception | None = self.__error
+            self.__error = None
+        if error is not None:
+            raise error
+
+    def __write_loop(self):
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__pending is not None)
+                checkpoint: Checkpoint | None = self.__pending
+                self.__pending = None
+                self.__writing = True
+            try:
+                assert checkpoint is not None
+                checkpoint.save(self.__file_path)
+            except OSError as error:
+                print("Could not write checkpoint to {}: {}".format(self.__file_path, error))
+            except Exception as error:
+                # e.g. a population that numpy cannot store, raised by flush instead of stopping the thread
+                with self.__condition:
+                    if self.__error is None:
+                        self.__error = error
+            finally:
+                with self.__condition:
+                    self.__writing = False
+                    self.__condition.notify_all()
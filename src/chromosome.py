@@ -1,3 +1,21 @@
 import numpy
+import numpy.typing
 
-Chromosome = numpy.ndarray[(..., 1), numpy.dtype('float64')] # due to implementation of pygad
+import config
+
+Chromosome = numpy.typing.NDArray[numpy.float64] # shape (GA_CHROMOSOME_LENGTH,), due to implementation of pygad
+Population = numpy.typing.NDArray[numpy.float64] # shape (population size, GA_CHROMOSOME_LENGTH), one chromosome per row
+
+def population_genes(population: Population) -> numpy.ndarray:
+    """
+    splits each chromosome of the population into the genes of its SolverInputSolutions,
+    in the same order as genetic_learner.fitness has always assigned them:
+    genes are popped from the end of the chromosome, so the first variable gets the last genes, reversed
+
+    returns:
+        numpy.ndarray - shape (population size, NUMBER_OF_VARIABLES, GENES_PER_VARIABLE)
+    """
+    population = numpy.asarray(population, dtype=numpy.float64)
+    assert population.ndim == 2
+    assert population.shape[1] == config.GA_CHROMOSOME_LENGTH
+    return population[:, ::-1].reshape(population.shape[0], config.NUMBER_OF_VARIABLES, config.GENES_PER_VARIABLE)
@@ -1,4 +1,13 @@
-GA_MODEL_FILE: str = "vehicular_fuel_efficiency_equation"
+GA_MODEL_FILE: str = "vehicular_fuel_efficiency_equation" # pygad pickle of older runs, only read to continue them
+GA_CHECKPOINT_FILE: str = "vehicular_fuel_efficiency_checkpoint.npz"
+GA_EXPORT_FILE: str = "vehicular_fuel_efficiency_model.npz" # best solution as an ExportedModel, written when training ends, "" to not write it
+GA_CHECKPOINT_INTERVAL_GENERATIONS: int = 10 # write a checkpoint at least every this many generations
+GA_CHECKPOINT_INTERVAL_SECONDS: float = 600 # write a checkpoint at least every this many seconds
+GA_RETRAINING_GENERATIONS: int = 0 # when continuing from a checkpoint of an older version of the data file, evolve this many more generations, 0 for GA_GENERATION_GOAL
+
+GA_METRICS_FILE: str = "vehicular_fuel_efficiency_metrics.jsonl" # phase timings of every generation are appended to this file, "" to not write them
+GA_PROFILE_GENERATIONS: tuple[int, ...] = tuple() # generations to capture with cProfile, e.g. (1, 100, 1000)
+GA_PROFILE_DIRECTORY: str = "profiles/" # where profiles of GA_PROFILE_GENERATIONS are written
 
 GA_STOP_FLAG_FILE: str = "to_safely_stop_genetic_learner.deleteme"
 
@@ -7,14 +16,43 @@ GA_GENERATION_GOAL: int = 1000000
 GA_FITNESS_GOAL: float = 3
 GA_NUMBER_OF_PARENTS: int = 64
 GA_NUMBER_OF_GENES_TO_MUTATE: int = 1
-GA_NUMBER_OF_THREADS: int = 5 # number of threads/processes to use for GA
+GA_NUMBER_OF_THREADS: int = 5 # number of fitness worker processes, 1 to score in the training process
+GA_FITNESS_BATCH_SIZE: int = 64 # maximum number of chromosomes evaluated together by the vectorized fitness function (per worker task)
+GA_FITNESS_CACHE_SIZE: int = 65536 # maximum number of chromosome fitness scores remembered between generations
+GA_INCREMENTAL_EVALUATION: bool = True # re-use the per-variable contributions of known gene blocks instead of evaluating every variable of every chromosome
+GA_CONTRIBUTION_CACHE_SIZE_BYTES: int = 1 << 30 # memory the remembered variable gene blocks of a training run take at most, split evenly between its GA_NUMBER_OF_THREADS processes, each block takes 8 bytes per trip (4 with GA_FLOAT32_EVALUATION) in one process
+GA_BASIS_EXPANSION: bool = True # precompute the powers and logarithms of every trip input, so the polynomial and logarithm terms of a population are a matrix product, takes 504 bytes per trip in every process (252 with GA_FLOAT32_EVALUATION)
+GA_FLOAT32_EVALUATION: bool = False # score chromosomes with the trips and decoded genes in float32, which halves the memory they take and move
+GA_FLOAT32_CHECK_INTERVAL_GENERATIONS: int = 10 # with GA_FLOAT32_EVALUATION, re-score the parents of every this many generations in float64 and report the drift
+GA_FLOAT32_MAXIMUM_RANK_DISAGREEMENT: float = 0.05 # fall back to float64 for the rest of the run when more than this fraction of pairs of re-scored parents are ranked differently
+GA_RACING_EVALUATION: bool = False # stop scoring a chromosome once the trips scored so far show it is not as fit as the parents of the last generation, instead of using the contribution cache
+GA_RACING_BLOCK_SIZE: int = 1024 # number of trips scored at a time by racing evaluation, between checks of the chromosomes against the cutoff
+GA_RACING_CONFIDENCE_Z: float = 3.0 # standard errors of the mean difference a chromosome has to be worse than the cutoff by to be stopped, higher stops fewer chromosomes by mistake
+GA_TRIP_CHUNK_SIZE: int = 0 # number of trips each generation is scored on, 0 to score every generation on every trip
+GA_TRIP_CHUNK_STRATEGY: str = "stratified" # how trips are split into chunks, "rotating" or "stratified" (see TripChunker)
+GA_FULL_EVALUATION_INTERVAL: int = 10 # when scoring on trip chunks, re-score the elites on every trip every this many generations
+GA_NUMBER_OF_ISLANDS: int = 1 # number of populations evolved side by side in separate processes, 1 to evolve a single population
+GA_MIGRATION_INTERVAL_GENERATIONS: int = 10 # every this many generations, each island sends its best solutions to the next island
+GA_NUMBER_OF_MIGRANTS: int = 4 # number of best solutions sent, replacing the worst solutions of the receiving island
+GA_ISLAND_CONFIG: list[dict[str, object]] = [] # settings of each island that differ from this file, e.g. [{"GA_NUMBER_OF_GENES_TO_MUTATE": 1}, {"GA_NUMBER_OF_GENES_TO_MUTATE": 8}]
+FLEET_DIRECTORY: str = "fleet/" # fleet_scheduler keeps the checkpoint, metrics, figures and stop flag file of each vehicle in <directory>/<vehicle name>/
+FLEET_NUMBER_OF_WORKERS: int = 8 # processes shared by the vehicles trained at the same time, each one takes GA_NUMBER_OF_THREADS of them
+FLEET_SLICE_GENERATIONS: int = 100 # generations a vehicle is trained before the scheduler picks the next vehicle to train
+FLEET_RENDER_FIGURES: bool = False # render solution figures of every vehicle, which takes one more process per vehicle trained
 GENES_PER_VARIABLE: int = 39 * 2
 NUMBER_OF_VARIABLES: int = 9
 GA_CHROMOSOME_LENGTH: int = GENES_PER_VARIABLE * NUMBER_OF_VARIABLES
 
 DATA_FILE_PATH: str = "K:/Downloads/Toyota Corolla Automatic 2009.csv"
+DATA_FILE_CACHE: bool = True # keep the parsed trips next to the data file, in <data file>.cache.npz, to skip parsing it again
+DATA_FILE_INCREMENTAL_IMPORT: bool = True # when the data file changed, only parse the rows appended to it, unless the rows imported before changed too
+PREDICTION_CHUNK_SIZE_ROWS: int = 65536 # rows of the input CSV that batch_predictor reads, predicts and writes at a time
+
+HEADLESS: bool = False # never draw figures, so that matplotlib is not even imported, e.g. on servers without a display
 
 SOLUTION_FIGURE_SAVE_DIRECTORY: str = "solution_figure/"
 SOLUTION_FIGURE_SAVE_NAME_PREFIX: str = "solution_"
 SOLUTION_FIGURE_SIZE_INCHES: tuple[float, float] = (18.0, 18.0)
 SOLUTION_FIGURE_RESOLUTION_DPI: float = 200
+SOLUTION_FIGURE_INTERVAL_GENERATIONS: int = 1 # render the best solution at most every this many generations
+SOLUTION_FIGURE_ONLY_ON_IMPROVEMENT: bool = False # only render the best solution when the best fitness improved
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+import numpy
+
+import config
+from chromosome import Population, population_genes
+from population_evaluator import TripBasis
+from solver_input_solution import decode_solution_parameters
+
+class ContributionCache:
+    """
+    Bounded cache of what a single SolverInputSolution contributes to the estimate of every trip,
+    keyed by the input variable and the raw bytes of that variable's genes, with least recently used eviction.
+
+    Offspring share most of their variable gene blocks with their parents (crossover splits at most one block
+    and mutation changes GA_NUMBER_OF_GENES_TO_MUTATE genes), so a chromosome is estimated by summing the
+    cached contributions of its known blocks and only evaluating the blocks that changed.
+
+    Each entry holds one float per trip, in the precision of the TripBasis. The entries and the hit / miss counters
+    are local to each process (every fitness worker has its own cache) and guarded by a lock.
+    """
+    def __init__(self, trip_basis: TripBasis, maximum_size: int):
+        """
+        args:
+            trip_basis: TripBasis - the trips that the contributions are evaluated on
+            maximum_size: int - maximum number of variable gene blocks to remember, see FitnessEvaluator.contribution_cache_size
+        """
+        assert maximum_size > 0
+        self.__trip_basis: TripBasis = trip_basis
+        self.__maximum_size: int = maximum_size
+        self.__entries: OrderedDict[bytes, numpy.ndarray] = OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+        self.__hits: int = 0
+        self.__misses: int = 0
+
+    @staticmethod
+    def key(variable_index: int, variable_genes: numpy.ndarray) -> bytes:
+        return variable_index.to_bytes(1, "little") + numpy.ascontiguousarray(variable_genes, dtype=numpy.float64).tobytes()
+
+    def predict_population(self, population: Population) -> numpy.ndarray:
+        """
+        same as population_evaluator.predict_population on the decoded population,
+        but only evaluates the variable gene blocks that are not cached
+
+        returns:
+            numpy.ndarray - shape (population size, number of trips)
+        """
+        genes: numpy.ndarray = population_genes(population)
+        predictions: numpy.ndarray = numpy.zeros((genes.shape[0], len(self.__trip_basis)), dtype=self.__trip_basis.dtype)
+        for variable_index in range(config.NUMBER_OF_VARIABLES):
+            keys: list[bytes] = [self.key(variable_index, variable_genes) for variable_genes in genes[:, variable_index, :]]
+            contributions: dict[bytes, numpy.ndarray] = dict()
+            uncached_indices: list[int] = list()
+            with self.__lock:
+                for index, key in enumerate(keys):
+                    if key in contributions:
+                        continue
+                    contribution: numpy.ndarray | None = self.__entries.get(key)
+                    if contribution is None:
+                        uncached_indices.append(index)
+                        contributions[key] = numpy.empty(0) # placeholder, so duplicates in the population are only evaluated once
+                    else:
+                        self.__entries.move_to_end(key)
+                        contributions[key] = contribution
+                self.__hits += len(contributions) - len(uncached_indices)
+                self.__misses += len(uncached_indices)
+            if len(uncached_indices) > 0:
+                coefficients: numpy.ndarray = decode_solution_parameters(genes[uncached_indices, variable_index, :])
+                uncached_contributions: numpy.ndarray = self.__trip_basis.variable_contributions(coefficients, variable_index)
+                for index, uncached_contribution in zip(uncached_indices, uncached_contributions):
+                    # a copy, as a view of a row would keep the whole batch in memory after the other rows are evicted
+                    uncached_contribution = uncached_contribution.copy()
+                    uncached_contribution.flags.writeable = False
+                    contributions[keys[index]] = uncached_contribution
+                    self.__put(keys[index], uncached_contribution)
+            for index, key in enumerate(keys):
+                predictions[index] += contributions[key]
+        return predictions
+
+    def __put(self, key: bytes, contribution: numpy.ndarray):
+        with self.__lock:
+            self.__entries[key] = contribution
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__maximum_size:
+                self.__entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    def __str__(self) -> str:
+        lookups: int = self.hits + self.misses
+        hit_rate: float = self.hits / lookups if lookups > 0 else 0.0
+        return "{:d} variable blocks reused, {:d} evaluated ({:.1%} reused), {:d} / {:d} entries".format(self.hits, self.misses, hit_rate, len(self), self.__maximum_size)
@@ -1,8 +1,27 @@
 import os
-from typing import Self
+import re
+from typing import BinaryIO, Self
 import csv
+import hashlib
+import io
+import locale
 from vehicle_trip import VehicleTrip
+from trip_table import TripTable, trip_log_features
 from datetime import datetime
+import numpy
+import config
+
+DATE_AND_TIME_HEADER: str = "Date and Time (YYYY/MM/DD HH:MM:SS)"
+DATE_AND_TIME_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+DATE_AND_TIME_PATTERN: re.Pattern = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}") # DATE_AND_TIME_FORMAT with every field zero padded
+ODOMETER_KM_HEADER: str = "Odometer (Km)"
+TRIP_DISTANCE_KM_HEADER: str = "Trip Distance (Km)"
+VEHICLE_TEMPERATURE_CELSIUS_HEADER: str = "Reported Vehicle Temperature At Departure (C)"
+TRIP_ENGINE_RUNNING_TIME_M_HEADER: str = "Reported Engine Running Time (Minutes)"
+FUEL_EFFICIENCY_L_PER_HUNDRED_KM_HEADER: str = "Reported Fuel Efficiency of Trip (L/100Km)"
+CACHE_FILE_SUFFIX: str = ".cache.npz"
+CACHE_FORMAT_VERSION: int = 3 # increase when the cached columns change, so that older cache files are ignored
+CHECKSUM_READ_SIZE_BYTES: int = 1 << 20
 
 class HeaderMap:
     def __init__(self,
@@ -19,74 +38,398 @@ class HeaderMap:
         self.trip_engine_running_time_m_index: int = trip_engine_running_time_m_index
         self.fuel_efficiency_l_per_hundred_km_index: int = fuel_efficiency_l_per_hundred_km_index
 
+class TripLogPosition:
+    """
+    How far a trip log has been imported.
+
+    Rows before byte_offset end with a line break, so they are complete and only change if the trip log is rewritten,
+    which checksum detects. The last row after byte_offset may still be being written, its trips are imported again with the rows appended after it.
+    """
+    def __init__(self, byte_offset: int, row_count: int, checksum: bytes, trailing_trip_count: int):
+        """
+        args:
+            byte_offset: int - end of the last row that ends with a line break
+            row_count: int - number of rows before byte_offset, without the headers, including rows with incomplete trips
+            checksum: bytes - see trip_log_checksum
+            trailing_trip_count: int - trips imported from after byte_offset, 0 or 1
+        """
+        self.byte_offset: int = byte_offset
+        self.row_count: int = row_count
+        self.checksum: bytes = checksum
+        self.trailing_trip_count: int = trailing_trip_count
+
+class TripLogColumns:
+    """
+    The complete trips of a trip log, one array per column, in the units of the trip log.
+    """
+    def __init__(self,
+                 date_and_time: numpy.ndarray,
+                 odometer_km: numpy.ndarray,
+                 trip_distance_km: numpy.ndarray,
+                 vehicle_temperature_celsius: numpy.ndarray,
+                 trip_engine_running_time_m: numpy.ndarray,
+                 fuel_efficiency_l_per_hundred_km: numpy.ndarray):
+        self.date_and_time: numpy.ndarray = date_and_time.astype("datetime64[s]")
+        self.odometer_km: numpy.ndarray = odometer_km.astype(numpy.float64)
+        self.trip_distance_km: numpy.ndarray = trip_distance_km.astype(numpy.float64)
+        self.vehicle_temperature_celsius: numpy.ndarray = vehicle_temperature_celsius.astype(numpy.float64)
+        self.trip_engine_running_time_m: numpy.ndarray = trip_engine_running_time_m.astype(numpy.float64)
+        self.fuel_efficiency_l_per_hundred_km: numpy.ndarray = fuel_efficiency_l_per_hundred_km.astype(numpy.float64)
+
+    def __len__(self) -> int:
+        return len(self.date_and_time)
+
+    def __getitem__(self, trips: slice) -> "TripLogColumns":
+        return TripLogColumns(
+            self.date_and_time[trips],
+            self.odometer_km[trips],
+            self.trip_distance_km[trips],
+            self.vehicle_temperature_celsius[trips],
+            self.trip_engine_running_time_m[trips],
+            self.fuel_efficiency_l_per_hundred_km[trips]
+        )
+
+    def concatenate(self, other: "TripLogColumns") -> "TripLogColumns":
+        """
+        the trips of self followed by the trips of other
+        """
+        return TripLogColumns(
+            numpy.concatenate((self.date_and_time, other.date_and_time)),
+            numpy.concatenate((self.odometer_km, other.odometer_km)),
+            numpy.concatenate((self.trip_distance_km, other.trip_distance_km)),
+            numpy.concatenate((self.vehicle_temperature_celsius, other.vehicle_temperature_celsius)),
+            numpy.concatenate((self.trip_engine_running_time_m, other.trip_engine_running_time_m)),
+            numpy.concatenate((self.fuel_efficiency_l_per_hundred_km, other.fuel_efficiency_l_per_hundred_km))
+        )
+
+    def trip_table(self) -> TripTable:
+        return TripTable.from_trip_log(
+            self.date_and_time,
+            self.odometer_km,
+            self.trip_distance_km,
+            self.vehicle_temperature_celsius,
+            self.trip_engine_running_time_m,
+            self.fuel_efficiency_l_per_hundred_km
+        )
+
+    def vehicle_trips(self) -> list[VehicleTrip]:
+        vehicle_trips: list[VehicleTrip] = list()
+        for date_and_time, odometer_km, trip_distance_km, vehicle_temperature_celsius, trip_engine_running_time_m, fuel_efficiency_l_per_hundred_km in zip(
+            self.date_and_time.tolist(),
+            self.odometer_km.tolist(),
+            self.trip_distance_km.tolist(),
+            self.vehicle_temperature_celsius.tolist(),
+            self.trip_engine_running_time_m.tolist(),
+            self.fuel_efficiency_l_per_hundred_km.tolist()
+        ):
+            vehicle_trip: VehicleTrip = VehicleTrip.from_trip_log(
+                date_and_time,
+                odometer_km,
+                trip_distance_km,
+                vehicle_temperature_celsius,
+                trip_engine_running_time_m,
+                fuel_efficiency_l_per_hundred_km
+            )
+            vehicle_trips.append(vehicle_trip)
+        return vehicle_trips
+
+    def save(self, file_path: str, source_file_path: str, source_size: int, source_modified_ns: int, position: TripLogPosition):
+        """
+        writes the columns, along with the file they were read from, its size and modification time and how far it was read, see load
+        """
+        temporary_file_path: str = file_path + ".tmp"
+        with open(temporary_file_path, "wb") as file:
+            numpy.savez(
+                file,
+                format_version=numpy.int64(CACHE_FORMAT_VERSION),
+                source_file_path=numpy.str_(source_file_path),
+                source_size=numpy.int64(source_size),
+                source_modified_ns=numpy.int64(source_modified_ns),
+                byte_offset=numpy.int64(position.byte_offset),
+                row_count=numpy.int64(position.row_count),
+                checksum=numpy.frombuffer(position.checksum, dtype=numpy.uint8),
+                trailing_trip_count=numpy.int64(position.trailing_trip_count),
+                date_and_time=self.date_and_time,
+                odometer_km=self.odometer_km,
+                trip_distance_km=self.trip_distance_km,
+                vehicle_temperature_celsius=self.vehicle_temperature_celsius,
+                trip_engine_running_time_m=self.trip_engine_running_time_m,
+                fuel_efficiency_l_per_hundred_km=self.fuel_efficiency_l_per_hundred_km
+            )
+        os.replace(temporary_file_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str, source_file_path: str) -> "tuple[TripLogColumns, tuple[int, int], TripLogPosition] | None":
+        """
+        reads columns written by save, or returns None if they were read from another file
+
+        returns:
+            the columns, the size and modification time of the file they were read from and how far it was read
+        """
+        with numpy.load(file_path, allow_pickle=False) as cache:
+            if int(cache["format_version"]) != CACHE_FORMAT_VERSION or str(cache["source_file_path"]) != source_file_path:
+                return None
+            return cls(
+                cache["date_and_time"],
+                cache["odometer_km"],
+                cache["trip_distance_km"],
+                cache["vehicle_temperature_celsius"],
+                cache["trip_engine_running_time_m"],
+                cache["fuel_efficiency_l_per_hundred_km"]
+            ), (int(cache["source_size"]), int(cache["source_modified_ns"])), TripLogPosition(
+                int(cache["byte_offset"]),
+                int(cache["row_count"]),
+                cache["checksum"].tobytes(),
+                int(cache["trailing_trip_count"])
+            )
+
+def parse_float_column(values: list[str]) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    returns the values as floats, and which of them are valid numbers
+    """
+    strings: numpy.ndarray = numpy.asarray(values, dtype=numpy.str_)
+    floats: numpy.ndarray = numpy.full(len(values), numpy.nan)
+    valid: numpy.ndarray = numpy.char.str_len(numpy.char.strip(strings)) > 0 if len(values) > 0 else numpy.zeros(0, dtype=bool)
+    try:
+        floats[valid] = strings[valid].astype(numpy.float64)
+    except ValueError:
+        # some values are not numbers, find them one by one
+        for index in numpy.flatnonzero(valid):
+            try:
+                floats[index] = float(values[index])
+            except ValueError:
+                valid[index] = False
+    # values that VehicleTrip cannot convert to whole meters or seconds
+    valid &= numpy.isfinite(floats)
+    return floats, valid
+
+def parse_date_and_time_column(values: list[str]) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    returns the values as datetime64[s], and which of them are valid dates and times in DATE_AND_TIME_FORMAT
+    """
+    dates_and_times: numpy.ndarray = numpy.full(len(values), numpy.datetime64("NaT"), dtype="datetime64[s]")
+    valid: numpy.ndarray = numpy.zeros(len(values), dtype=bool)
+    padded_indices: list[int] = [index for index, value in enumerate(values) if DATE_AND_TIME_PATTERN.fullmatch(value)]
+    try:
+        dates_and_times[padded_indices] = numpy.asarray([values[index] for index in padded_indices], dtype=numpy.str_).astype("datetime64[s]")
+        valid[padded_indices] = True
+    except ValueError:
+        # some are out of range (e.g. month 13), let strptime decide on each of them
+        pass
+    for index in numpy.flatnonzero(~valid):
+        try:
+            dates_and_times[index] = numpy.datetime64(datetime.strptime(values[index], DATE_AND_TIME_FORMAT), "s")
+            valid[index] = True
+        except ValueError:
+            pass
+    return dates_and_times, valid
+
+def parse_trip_log(file_path: str) -> TripLogColumns:
+    """
+    reads every complete trip of a trip log CSV, skipping rows with missing or invalid values
+    """
+    return read_trip_log(file_path)[0]
+
+def trip_log_checksum(file: BinaryIO, byte_offset: int) -> hashlib.blake2b:
+    """
+    checksum of the first byte_offset bytes of a trip log, which changes when rows that were already imported are rewritten,
+    leaves the file at byte_offset
+    """
+    checksum: hashlib.blake2b = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    remaining_bytes: int = byte_offset
+    while remaining_bytes > 0:
+        data: bytes = file.read(min(remaining_bytes, CHECKSUM_READ_SIZE_BYTES))
+        if len(data) == 0:
+            break
+        checksum.update(data)
+        remaining_bytes -= len(data)
+    return checksum
+
+def read_trip_log(file_path: str, position: TripLogPosition | None = None) -> tuple[TripLogColumns, TripLogPosition]:
+    """
+    reads the complete trips of a trip log CSV, or only those of the rows appended since it was read up to position,
+    which assumes that line breaks only occur between rows, never inside quoted values
+
+    returns:
+        the trips read, which replace the trailing trips of the previous read, and the position to continue reading from
+
+    raises:
+        ValueError - if the rows read up to position have changed since, e.g. the file was rewritten or shrank
+    """
+    with open(file_path, "rb") as file:
+        headers: bytes = file.readline()
+        assert len(headers) > 0
+        byte_offset: int = len(headers) if position is None else position.byte_offset
+        checksum: hashlib.blake2b = trip_log_checksum(file, byte_offset)
+        if position is not None and checksum.digest() != position.checksum:
+            raise ValueError("{} was rewritten since it was read".format(file_path))
+        data: bytes = file.read()
+    encoding: str = locale.getpreferredencoding(False) # the encoding open() reads text with
+    header_map: HeaderMap = verify_headers(tuple(next(csv.reader(io.StringIO(headers.decode(encoding), newline="")))))
+    complete_size: int = data.rfind(b"\n") + 1
+    complete_rows: list[list[str]] = list(csv.reader(io.StringIO(data[:complete_size].decode(encoding), newline="")))
+    trailing_columns: TripLogColumns = parse_trip_log_rows(header_map, list(csv.reader(io.StringIO(data[complete_size:].decode(encoding), newline=""))))
+    checksum.update(data[:complete_size])
+    return parse_trip_log_rows(header_map, complete_rows).concatenate(trailing_columns), TripLogPosition(
+        byte_offset + complete_size,
+        (0 if position is None else position.row_count) + len(complete_rows),
+        checksum.digest(),
+        len(trailing_columns)
+    )
+
+def parse_trip_log_rows(header_map: HeaderMap, rows: list[list[str]]) -> TripLogColumns:
+    """
+    the complete trips of rows of a trip log, skipping rows with missing or invalid values,
+    and rows whose inputs or fuel efficiency would not be finite
+    """
+    def column(index: int) -> list[str]:
+        return [row[index] if index < len(row) else "" for row in rows]
+
+    date_and_time, valid = parse_date_and_time_column(column(header_map.date_and_time_index))
+    float_columns: list[numpy.ndarray] = list()
+    for index in (
+        header_map.odometer_km_index,
+        header_map.trip_distance_km_index,
+        header_map.vehicle_temperature_celsius_index,
+        header_map.trip_engine_running_time_m_index,
+        header_map.fuel_efficiency_l_per_hundred_km_index
+    ):
+        floats, valid_floats = parse_float_column(column(index))
+        float_columns.append(floats)
+        valid &= valid_floats
+    # VehicleTrip converts the fuel efficiency to m/L, and divides the trip distance by the engine running time,
+    # so a zero in either would make the trip's inputs or fuel efficiency infinite, and every fitness score nan
+    features: numpy.ndarray = trip_log_features(date_and_time, *float_columns[:4])
+    valid &= numpy.all(numpy.isfinite(features), axis=1) & numpy.isfinite(float_columns[4]) & (float_columns[4] != 0)
+    return TripLogColumns(date_and_time[valid], *[floats[valid] for floats in float_columns])
+
+def verify_headers(headers: tuple[str, ...]) -> HeaderMap:
+    header_map: HeaderMap = HeaderMap(
+        date_and_time_index = headers.index(DATE_AND_TIME_HEADER),
+        odometer_km_index = headers.index(ODOMETER_KM_HEADER),
+        trip_distance_km_index = headers.index(TRIP_DISTANCE_KM_HEADER),
+        vehicle_temperature_celsius_index = headers.index(VEHICLE_TEMPERATURE_CELSIUS_HEADER),
+        trip_engine_running_time_m_index = headers.index(TRIP_ENGINE_RUNNING_TIME_M_HEADER),
+        fuel_efficiency_l_per_hundred_km_index = headers.index(FUEL_EFFICIENCY_L_PER_HUNDRED_KM_HEADER)
+    )
+    return header_map
+
 class DataImporter:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, use_cache: bool | None = None, incremental: bool | None = None):
+        """
+        args:
+            file_path: str - trip log CSV
+            use_cache: bool | None - keep the parsed trips in a binary file next to the CSV (see CACHE_FILE_SUFFIX),
+                so that the next import of the same CSV does not parse it again, config.DATA_FILE_CACHE if None
+            incremental: bool | None - when the CSV changed, only parse the rows appended to it since the last import
+                (or since the cache was written), config.DATA_FILE_INCREMENTAL_IMPORT if None
+        """
         self.__file_path: str = str(file_path)
         assert os.path.exists(self.__file_path)
         assert os.path.isfile(self.__file_path)
+        self.__use_cache: bool = config.DATA_FILE_CACHE if use_cache is None else use_cache
+        self.__incremental: bool = config.DATA_FILE_INCREMENTAL_IMPORT if incremental is None else incremental
         self.__file_date_modified: None | float = None
+        self.__file_version: None | tuple[int, int] = None
+        self.__position: None | TripLogPosition = None
+        self.__columns: None | TripLogColumns = None
         self.__data: None | list[VehicleTrip] = None
+        self.__trip_table: None | TripTable = None
 
     def __import_data(self) -> Self:
         assert os.path.exists(self.__file_path)
         assert os.path.isfile(self.__file_path)
-        file_date_modified: float = os.stat(self.__file_path).st_mtime
-        if self.__file_date_modified == file_date_modified:
+        file_status: os.stat_result = os.stat(self.__file_path)
+        file_version: tuple[int, int] = (file_status.st_size, file_status.st_mtime_ns)
+        if self.__file_version == file_version:
             # no need to re-import data, as it has not changed
             return self
-        self.__file_date_modified = file_date_modified
-        headers: tuple[str, ...] | None = None
-        header_map: None | HeaderMap = None
-        data: None | list[VehicleTrip] = None
-        with open(self.__file_path, "r") as file:
-            reader = csv.reader(file)
-            first_row: bool = True
-            for row in reader:
-                if first_row:
-                    headers = tuple(row)
-                    header_map = self.__verify_headers(headers)
-                    data = list()
-                    first_row = False
-                else:
-                    assert header_map is not None
-                    assert data is not None # data should be a list, whether empty or not
-                    try:
-                        row_vehicle_trip: VehicleTrip = VehicleTrip()
-                        row_vehicle_trip.date_and_time = datetime.strptime(row[header_map.date_and_time_index], "%Y-%m-%d %H:%M:%S")
-                        row_vehicle_trip.odometer_km = float(row[header_map.odometer_km_index])
-                        row_vehicle_trip.trip_distance_km = float(row[header_map.trip_distance_km_index])
-                        row_vehicle_trip.vehicle_temperature_celsius = float(row[header_map.vehicle_temperature_celsius_index])
-                        row_vehicle_trip.trip_engine_running_time_m = float(row[header_map.trip_engine_running_time_m_index])
-                        row_vehicle_trip.fuel_efficiency_l_per_hundred_km = float(row[header_map.fuel_efficiency_l_per_hundred_km_index])
-                        data.append(row_vehicle_trip)
-                    except ValueError:
-                        # skip rows that have missing information
-                        pass
-
-        assert headers is not None
-        assert data is not None
-
-        self.__data = data
+        source_file_path: str = os.path.abspath(self.__file_path)
+        if self.__columns is None and self.__use_cache and os.path.isfile(self.cache_file_path):
+            try:
+                cache: tuple[TripLogColumns, tuple[int, int], TripLogPosition] | None = TripLogColumns.load(self.cache_file_path, source_file_path)
+            except (OSError, ValueError, KeyError):
+                # unreadable cache, parse the trip log again
+                cache = None
+            if cache is not None and (cache[1] == file_version or self.__incremental):
+                self.__columns, self.__file_version, self.__position = cache
+        if self.__file_version == file_version:
+            # the cache is up to date
+            self.__file_date_modified = file_status.st_mtime
+            return self
+
+        number_of_kept_trips: int = 0
+        columns: TripLogColumns | None = None
+        position: TripLogPosition | None = None
+        if self.__incremental and self.__columns is not None and self.__position is not None:
+            try:
+                appended_columns, position = read_trip_log(self.__file_path, self.__position)
+                number_of_kept_trips = len(self.__columns) - self.__position.trailing_trip_count
+                columns = self.__columns[:number_of_kept_trips].concatenate(appended_columns)
+            except ValueError:
+                # the trips imported before have changed, import every trip again
+                columns = None
+        if columns is None or position is None:
+            number_of_kept_trips = 0
+            columns, position = read_trip_log(self.__file_path)
+        if self.__use_cache:
+            try:
+                columns.save(self.cache_file_path, source_file_path, *file_version, position)
+            except OSError:
+                # e.g. read-only directory, the cache only saves time
+                pass
+
+        # extend the trips that were already built with the appended ones, instead of building every trip again
+        if self.__data is not None and number_of_kept_trips > 0:
+            self.__data = self.__data[:number_of_kept_trips] + columns[number_of_kept_trips:].vehicle_trips()
+        else:
+            self.__data = None
+        if self.__trip_table is not None and number_of_kept_trips > 0:
+            self.__trip_table = self.__trip_table.take(numpy.arange(number_of_kept_trips)).concatenate(columns[number_of_kept_trips:].trip_table())
+        else:
+            self.__trip_table = None
+        self.__file_version = file_version
+        self.__file_date_modified = file_status.st_mtime
+        self.__position = position
+        self.__columns = columns
 
         return self
 
-    @staticmethod
-    def __verify_headers(headers: tuple[str, ...]) -> HeaderMap:
-        header_map: HeaderMap = HeaderMap(
-            date_and_time_index = headers.index("Date and Time (YYYY/MM/DD HH:MM:SS)"),
-            odometer_km_index = headers.index("Odometer (Km)"),
-            trip_distance_km_index = headers.index("Trip Distance (Km)"),
-            vehicle_temperature_celsius_index = headers.index("Reported Vehicle Temperature At Departure (C)"),
-            trip_engine_running_time_m_index = headers.index("Reported Engine Running Time (Minutes)"),
-            fuel_efficiency_l_per_hundred_km_index = headers.index("Reported Fuel Efficiency of Trip (L/100Km)")
-        )
-        return header_map
+    @property
+    def cache_file_path(self) -> str:
+        return self.__file_path + CACHE_FILE_SUFFIX
+
+    @property
+    def file_date_modified(self) -> float:
+        """
+        modification time of the file when the current data was imported, usable as a version stamp of the data
+        """
+        file_date_modified = self.__import_data().__file_date_modified
+        assert file_date_modified is not None
+        return file_date_modified
 
     @property
     def vehicle_trips(self) -> list[VehicleTrip]:
-        data = self.__import_data().__data
-        assert data is not None
-        return data
+        """
+        the complete trips of the file, only built when first used, as trip_table is enough for training
+        """
+        self.__import_data()
+        if self.__data is None:
+            assert self.__columns is not None
+            self.__data = self.__columns.vehicle_trips()
+        return self.__data
+
+    @property
+    def trip_table(self) -> TripTable:
+        """
+        columnar view of vehicle_trips, built once per import
+        """
+        self.__import_data()
+        if self.__trip_table is None:
+            assert self.__columns is not None
+            self.__trip_table = self.__columns.trip_table()
+        return self.__trip_table
 
 if __name__ == "__main__":
     vehicle_trips: list[VehicleTrip] = DataImporter("K:/Downloads/Toyota Corolla Automatic 2009.csv").vehicle_trips
@@ -1,214 +1,194 @@
 import config as config
 
-import pygad
-import os
-
-from solver_solution import SolverSolution
+from solver_solution import CompiledSolverSolution, solver_solution_from_chromosome
+from solver_input_solution import evaluate_solution_parameters
 
 from chromosome import Chromosome
-from vehicle_trip import VehicleTrip
+from trip_table import TripTable
 
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 import numpy
-from collections.abc import Callable
-
-def plot_solution(ga_instance: pygad.GA):
-    best_chromosome: Chromosome = ga_instance.last_generation_elitism # type: ignore
-    assert best_chromosome is not None
-
-    best_chromosome_list: list[float] = best_chromosome.tolist()[0]
-    solver_solution = SolverSolution((
-        tuple(best_chromosome_list[0:config.GENES_PER_VARIABLE]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE:config.GENES_PER_VARIABLE*2]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*2:config.GENES_PER_VARIABLE*3]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*3:config.GENES_PER_VARIABLE*4]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*4:config.GENES_PER_VARIABLE*5]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*5:config.GENES_PER_VARIABLE*6]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*6:config.GENES_PER_VARIABLE*7]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*7:config.GENES_PER_VARIABLE*8]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*8:config.GENES_PER_VARIABLE*9])
-    )) # type: ignore
-
-    plt.figure(figsize=config.SOLUTION_FIGURE_SIZE_INCHES)
-    x = numpy.arange(0, 1, 1/1000)
-    y = [solver_solution.solver_input_solutions[0].f(float(xi))/1000 for xi in x]
-    plt.plot(x, y)
-    x = numpy.arange(0, 1, 1/1000)
-    y = [solver_solution.solver_input_solutions[1].f(float(xi))/1000 for xi in x]
-    plt.plot(x, y)
-    x = numpy.arange(0, 1, 1/1000)
-    y = [solver_solution.solver_input_solutions[2].f(float(xi*10))/1000 for xi in x]
-    plt.plot(x, y)
-    x = numpy.arange(0.5, 1.5, 1/1000)
-    y = [solver_solution.solver_input_solutions[3].f(float(xi))/1000 for xi in x]
-    plt.plot(x, y)
-    x = numpy.arange(0, 1, 1/1000)
-    y = [solver_solution.solver_input_solutions[4].f(float(xi))/1000 for xi in x]
-    plt.plot(x, y)
-    x = numpy.arange(0, 1, 1/1000)
-    y = [solver_solution.solver_input_solutions[5].f(float(xi))/1000 for xi in x]
-    plt.plot(x, y)
-    x = numpy.arange(0, 1, 1/1000)
-    y = [solver_solution.solver_input_solutions[6].f(float(xi))/1000 for xi in x]
-    plt.plot(x, y)
-    x = numpy.arange(0, 1, 1/1000)
-    y = [solver_solution.solver_input_solutions[7].f(float(xi))/1000 for xi in x]
-    plt.plot(x, y)
-    x = numpy.arange(0, 1, 1/1000)
-    y = [solver_solution.solver_input_solutions[7].f(float(xi))/1000 for xi in x]
-    plt.plot(x, y)
-    plt.title("Contribution to Fuel Efficiency from Each Independent Variable")
-    plt.legend((
-        "Date and Time (years)",
-        "Odometer (Gm)",
-        "Trip Distance (100Km)",
-        "Vehicle Temperature (K/273)",
-        "Trip Engine Running Time (10Ks [2.78 hours])",
-        "Temperature Difference Between Vehicle and Engine Operating (140K)",
-        "Average Speed (40m/s)",
-        "Time of Day (days)",
-        "Time of Year (years)"
-    ))
-    plt.ylabel("Contribution to Fuel Efficiency (Km/L)")
-    plt.ylim((-50, 50))
-    plt.xticks(numpy.arange(0, 1.5, 0.2), minor = False)
-    plt.xticks(numpy.arange(0, 1.5, 0.1), minor = True)
-    plt.yticks(numpy.arange(-50, 51, 10), minor = False)
-    plt.yticks(numpy.arange(-50, 51, 5), minor = True)
-    plt.grid(True, "major", "y", linewidth = 2, alpha = 0.5)
-    plt.grid(True, "minor", "y", linewidth = 2, alpha = 0.1)
-    plt.grid(True, "major", "x", linewidth = 2, alpha = 0.5)
-    plt.grid(True, "minor", "x", linewidth = 2, alpha = 0.1)
-
-def plot_histogram(ga_instance: pygad.GA, vehicle_trips: list[VehicleTrip], number_of_bins: int, calculation: Callable[[SolverSolution, VehicleTrip], float]):
-    best_chromosome: Chromosome = ga_instance.last_generation_elitism # type: ignore
-    assert best_chromosome is not None
-
-    best_chromosome_list: list[float] = best_chromosome.tolist()[0]
-    solver_solution = SolverSolution((
-        tuple(best_chromosome_list[0:config.GENES_PER_VARIABLE]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE:config.GENES_PER_VARIABLE*2]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*2:config.GENES_PER_VARIABLE*3]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*3:config.GENES_PER_VARIABLE*4]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*4:config.GENES_PER_VARIABLE*5]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*5:config.GENES_PER_VARIABLE*6]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*6:config.GENES_PER_VARIABLE*7]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*7:config.GENES_PER_VARIABLE*8]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*8:config.GENES_PER_VARIABLE*9])
-    )) # type: ignore
-
-    deviations_from_calculation: list[float] = list()
-    for vehicle_trip in vehicle_trips:
-        deviations_from_calculation.append(calculation(solver_solution, vehicle_trip))
 
+# first x value of each curve of plot_solution, in the order of SOLUTION_CURVE_LABELS, and the factor x is multiplied by before evaluating it
+SOLUTION_CURVE_STARTS: tuple[float, ...] = (0, 0, 0, 0.5, 0, 0, 0, 0, 0)
+SOLUTION_CURVE_INPUT_SCALES: tuple[float, ...] = (1, 1, 10, 1, 1, 1, 1, 1, 1)
+SOLUTION_CURVE_POINTS: int = 1000 # every 1/1000
+SOLUTION_CURVE_LABELS: tuple[str, ...] = (
+    "Date and Time (years)",
+    "Odometer (Gm)",
+    "Trip Distance (100Km)",
+    "Vehicle Temperature (K/273)",
+    "Trip Engine Running Time (10Ks [2.78 hours])",
+    "Temperature Difference Between Vehicle and Engine Operating (140K)",
+    "Average Speed (40m/s)",
+    "Time of Day (days)",
+    "Time of Year (years)"
+)
+
+def solution_curves(compiled_solution: CompiledSolverSolution) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    evaluates the contribution of every input variable over its range of plot_solution at once
+
+    returns:
+        the x values and the contributions to fuel efficiency (Km/L), both of shape (NUMBER_OF_VARIABLES, SOLUTION_CURVE_POINTS)
+    """
+    x: numpy.ndarray = numpy.array(SOLUTION_CURVE_STARTS)[:, numpy.newaxis] + numpy.arange(SOLUTION_CURVE_POINTS) / SOLUTION_CURVE_POINTS
+    inputs: numpy.ndarray = x * numpy.array(SOLUTION_CURVE_INPUT_SCALES)[:, numpy.newaxis]
+    y: numpy.ndarray = evaluate_solution_parameters(compiled_solution.coefficients[:, numpy.newaxis, :], inputs) / 1000
+    return x, y
+
+class SolutionFigure:
+    """
+    The figure of plot_solution, which can be kept open to draw one solution after the other:
+    the axes are only laid out once, each solution only replaces the data of the curves.
+    """
+    def __init__(self):
+        self.__figure: Figure = plt.figure(figsize=config.SOLUTION_FIGURE_SIZE_INCHES)
+        axes = self.__figure.gca()
+        x, y = solution_curves(CompiledSolverSolution(numpy.zeros((config.NUMBER_OF_VARIABLES, config.GENES_PER_VARIABLE // 2))))
+        self.__lines: list[Line2D] = [axes.plot(x_values, y_values)[0] for x_values, y_values in zip(x, y)]
+        axes.set_title("Contribution to Fuel Efficiency from Each Independent Variable")
+        axes.legend(SOLUTION_CURVE_LABELS)
+        axes.set_ylabel("Contribution to Fuel Efficiency (Km/L)")
+        axes.set_ylim((-50, 50))
+        axes.set_xticks(numpy.arange(0, 1.5, 0.2), minor = False)
+        axes.set_xticks(numpy.arange(0, 1.5, 0.1), minor = True)
+        axes.set_yticks(numpy.arange(-50, 51, 10), minor = False)
+        axes.set_yticks(numpy.arange(-50, 51, 5), minor = True)
+        axes.grid(True, "major", "y", linewidth = 2, alpha = 0.5)
+        axes.grid(True, "minor", "y", linewidth = 2, alpha = 0.1)
+        axes.grid(True, "major", "x", linewidth = 2, alpha = 0.5)
+        axes.grid(True, "minor", "x", linewidth = 2, alpha = 0.1)
+
+    @property
+    def figure(self) -> Figure:
+        return self.__figure
+
+    def update(self, compiled_solution: CompiledSolverSolution):
+        _, y = solution_curves(compiled_solution)
+        for line, y_values in zip(self.__lines, y):
+            line.set_ydata(y_values)
+
+def plot_solution(best_chromosome: Chromosome) -> SolutionFigure:
+    solution_figure: SolutionFigure = SolutionFigure()
+    solution_figure.update(solver_solution_from_chromosome(best_chromosome).compiled)
+    return solution_figure
+
+class SolutionResiduals:
+    """
+    The fuel efficiency a solution predicts for every trip, computed once,
+    and every view of its deviation from the real fuel efficiency that the histograms show.
+    """
+    def __init__(self, compiled_solution: CompiledSolverSolution, trip_table: TripTable):
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            self.__estimated_fuel_efficiency_m_per_l: numpy.ndarray = compiled_solution.f(trip_table.features)
+            self.__estimated_fuel_efficiency_l_per_hundred_km: numpy.ndarray = 100000/self.__estimated_fuel_efficiency_m_per_l
+        self.__trip_table: TripTable = trip_table
+
+    @property
+    def estimated_fuel_efficiency_m_per_l(self) -> numpy.ndarray:
+        return self.__estimated_fuel_efficiency_m_per_l
+
+    @property
+    def estimated_fuel_efficiency_l_per_hundred_km(self) -> numpy.ndarray:
+        return self.__estimated_fuel_efficiency_l_per_hundred_km
+
+    @property
+    def deviation_m_per_l(self) -> numpy.ndarray:
+        return self.__estimated_fuel_efficiency_m_per_l - self.__trip_table.fuel_efficiency_m_per_l
+
+    @property
+    def absolute_deviation_m_per_l(self) -> numpy.ndarray:
+        return numpy.abs(self.deviation_m_per_l)
+
+    @property
+    def percent_m_per_l(self) -> numpy.ndarray:
+        """
+        estimation as a percentage of the real fuel efficiency
+        """
+        return numpy.abs(self.__estimated_fuel_efficiency_m_per_l / self.__trip_table.fuel_efficiency_m_per_l) * 100
+
+    @property
+    def deviation_l_per_hundred_km(self) -> numpy.ndarray:
+        return self.__estimated_fuel_efficiency_l_per_hundred_km - self.__trip_table.fuel_efficiency_l_per_hundred_km
+
+    @property
+    def absolute_deviation_l_per_hundred_km(self) -> numpy.ndarray:
+        return numpy.abs(self.deviation_l_per_hundred_km)
+
+    @property
+    def percent_l_per_hundred_km(self) -> numpy.ndarray:
+        """
+        estimation as a percentage of the real fuel efficiency
+        """
+        with numpy.errstate(invalid="ignore"):
+            return numpy.abs(self.__estimated_fuel_efficiency_l_per_hundred_km / self.__trip_table.fuel_efficiency_l_per_hundred_km) * 100
+
+def plot_histogram(deviations: numpy.ndarray, number_of_bins: int):
     plt.figure(figsize=config.SOLUTION_FIGURE_SIZE_INCHES)
-    plt.hist(deviations_from_calculation, bins=number_of_bins, edgecolor="black")
+    plt.hist(deviations, bins=number_of_bins, edgecolor="black")
     plt.ylabel("Frequency")
     plt.grid(True)
 
-def plot_histogram_m_per_l(ga_instance: pygad.GA, vehicle_trips: list[VehicleTrip], number_of_bins: int):
-
-    def calculation(solver_solution: SolverSolution, vehicle_trip: VehicleTrip) -> float:
-        estimated_fuel_efficiency_m_per_l: float = solver_solution.f(vehicle_trip)
-        deviation_from_calculation: float = estimated_fuel_efficiency_m_per_l - vehicle_trip.fuel_efficiency_m_per_l
-        return deviation_from_calculation
-
-    plot_histogram(ga_instance, vehicle_trips, number_of_bins, calculation)
+def plot_histogram_m_per_l(solution_residuals: SolutionResiduals, number_of_bins: int):
+    plot_histogram(solution_residuals.deviation_m_per_l, number_of_bins)
 
     plt.title("Histogram of Deviations of GA Solution Estimation From Real Trip Fuel Efficiency")
     plt.xlabel("Deviation (m/L)")
 
-def plot_histogram_error_m_per_l(ga_instance: pygad.GA, vehicle_trips: list[VehicleTrip], number_of_bins: int):
-
-    def calculation(solver_solution: SolverSolution, vehicle_trip: VehicleTrip) -> float:
-        estimated_fuel_efficiency_m_per_l: float = solver_solution.f(vehicle_trip)
-        deviation_from_calculation: float = abs(estimated_fuel_efficiency_m_per_l - vehicle_trip.fuel_efficiency_m_per_l)
-        return deviation_from_calculation
-
-    plot_histogram(ga_instance, vehicle_trips, number_of_bins, calculation)
+def plot_histogram_error_m_per_l(solution_residuals: SolutionResiduals, number_of_bins: int):
+    plot_histogram(solution_residuals.absolute_deviation_m_per_l, number_of_bins)
 
     plt.title("Histogram of Absolute Deviations of GA Solution Estimation From Real Trip Fuel Efficiency")
     plt.xlabel("Absolute Deviation (m/L)")
 
-def plot_histogram_percent_error_m_per_l(ga_instance: pygad.GA, vehicle_trips: list[VehicleTrip], number_of_bins: int):
-
-    def calculation(solver_solution: SolverSolution, vehicle_trip: VehicleTrip) -> float:
-        estimated_fuel_efficiency_m_per_l: float = solver_solution.f(vehicle_trip)
-        deviation_from_calculation: float = abs(estimated_fuel_efficiency_m_per_l / vehicle_trip.fuel_efficiency_m_per_l) * 100
-        return deviation_from_calculation
-
-    plot_histogram(ga_instance, vehicle_trips, number_of_bins, calculation)
+def plot_histogram_percent_error_m_per_l(solution_residuals: SolutionResiduals, number_of_bins: int):
+    plot_histogram(solution_residuals.percent_m_per_l, number_of_bins)
 
     plt.title("Histogram of Absolute Deviations of GA Solution Estimation From Real Trip Fuel Efficiency")
     plt.xlabel("Absolute Deviation (% m/L)")
 
-def plot_histogram_l_per_hundred_km(ga_instance: pygad.GA, vehicle_trips: list[VehicleTrip], number_of_bins: int):
-
-    def calculation(solver_solution: SolverSolution, vehicle_trip: VehicleTrip) -> float:
-        estimated_fuel_efficiency_m_per_l: float = solver_solution.f(vehicle_trip)
-        estimated_fuel_efficiency_l_per_hundred_km: float = 100000/estimated_fuel_efficiency_m_per_l
-        deviation_from_calculation: float = estimated_fuel_efficiency_l_per_hundred_km - vehicle_trip.fuel_efficiency_l_per_hundred_km
-        return deviation_from_calculation
-
-    plot_histogram(ga_instance, vehicle_trips, number_of_bins, calculation)
+def plot_histogram_l_per_hundred_km(solution_residuals: SolutionResiduals, number_of_bins: int):
+    plot_histogram(solution_residuals.deviation_l_per_hundred_km, number_of_bins)
 
     plt.title("Histogram of Deviations of GA Solution Estimation From Real Trip Fuel Efficiency")
     plt.xlabel("Deviation (L/100Km)")
 
-def plot_histogram_error_l_per_hundred_km(ga_instance: pygad.GA, vehicle_trips: list[VehicleTrip], number_of_bins: int):
-
-    def calculation(solver_solution: SolverSolution, vehicle_trip: VehicleTrip) -> float:
-        estimated_fuel_efficiency_m_per_l: float = solver_solution.f(vehicle_trip)
-        estimated_fuel_efficiency_l_per_hundred_km: float = 100000/estimated_fuel_efficiency_m_per_l
-        deviation_from_calculation: float = abs(estimated_fuel_efficiency_l_per_hundred_km - vehicle_trip.fuel_efficiency_l_per_hundred_km)
-        return deviation_from_calculation
-
-    plot_histogram(ga_instance, vehicle_trips, number_of_bins, calculation)
+def plot_histogram_error_l_per_hundred_km(solution_residuals: SolutionResiduals, number_of_bins: int):
+    plot_histogram(solution_residuals.absolute_deviation_l_per_hundred_km, number_of_bins)
 
     plt.title("Histogram of Absolute Deviations of GA Solution Estimation From Real Trip Fuel Efficiency")
     plt.xlabel("Absolute Deviation (L/100Km)")
 
-def plot_histogram_percent_error_l_per_hundred_km(ga_instance: pygad.GA, vehicle_trips: list[VehicleTrip], number_of_bins: int):
-
-    def calculation(solver_solution: SolverSolution, vehicle_trip: VehicleTrip) -> float:
-        estimated_fuel_efficiency_m_per_l: float = solver_solution.f(vehicle_trip)
-        estimated_fuel_efficiency_l_per_hundred_km: float = 100000/estimated_fuel_efficiency_m_per_l
-        deviation_from_calculation: float = abs(estimated_fuel_efficiency_l_per_hundred_km / vehicle_trip.fuel_efficiency_l_per_hundred_km) * 100
-        return deviation_from_calculation
-
-    plot_histogram(ga_instance, vehicle_trips, number_of_bins, calculation)
+def plot_histogram_percent_error_l_per_hundred_km(solution_residuals: SolutionResiduals, number_of_bins: int):
+    plot_histogram(solution_residuals.percent_l_per_hundred_km, number_of_bins)
 
     plt.title("Histogram of Absolute Deviations of GA Solution Estimation From Real Trip Fuel Efficiency")
     plt.xlabel("Absolute Deviation (% L/100Km)")
 
+def plot_report(compiled_solution: CompiledSolverSolution, trip_table: TripTable, number_of_bins: int):
+    """
+    plots the solution and every histogram of its deviations, predicting the trips only once
+    """
+    SolutionFigure().update(compiled_solution)
+    solution_residuals: SolutionResiduals = SolutionResiduals(compiled_solution, trip_table)
+    plot_histogram_m_per_l(solution_residuals, number_of_bins)
+    plot_histogram_error_m_per_l(solution_residuals, number_of_bins)
+    plot_histogram_percent_error_m_per_l(solution_residuals, number_of_bins)
+    plot_histogram_l_per_hundred_km(solution_residuals, number_of_bins)
+    plot_histogram_error_l_per_hundred_km(solution_residuals, number_of_bins)
+    plot_histogram_percent_error_l_per_hundred_km(solution_residuals, number_of_bins)
+
 
 if __name__ == "__main__":
-    if (os.path.exists(config.GA_MODEL_FILE+".pkl") and os.path.isfile(config.GA_MODEL_FILE+".pkl")):
+    from exported_model import load_compiled_solution
+
+    compiled_solution: CompiledSolverSolution | None = load_compiled_solution(config.GA_EXPORT_FILE, config.GA_CHECKPOINT_FILE)
+    if compiled_solution is not None:
         from data_importer import DataImporter
 
-        ga_instance: pygad.GA = pygad.load(config.GA_MODEL_FILE)
-        best_chromosome: Chromosome = ga_instance.last_generation_elitism # type: ignore
-        assert best_chromosome is not None
-
-        best_chromosome_list: list[float] = best_chromosome.tolist()[0]
-        solver_solution = SolverSolution((
-            tuple(best_chromosome_list[0:config.GENES_PER_VARIABLE]),
-            tuple(best_chromosome_list[config.GENES_PER_VARIABLE:config.GENES_PER_VARIABLE*2]),
-            tuple(best_chromosome_list[config.GENES_PER_VARIABLE*2:config.GENES_PER_VARIABLE*3]),
-            tuple(best_chromosome_list[config.GENES_PER_VARIABLE*3:config.GENES_PER_VARIABLE*4]),
-            tuple(best_chromosome_list[config.GENES_PER_VARIABLE*4:config.GENES_PER_VARIABLE*5]),
-            tuple(best_chromosome_list[config.GENES_PER_VARIABLE*5:config.GENES_PER_VARIABLE*6]),
-            tuple(best_chromosome_list[config.GENES_PER_VARIABLE*6:config.GENES_PER_VARIABLE*7]),
-            tuple(best_chromosome_list[config.GENES_PER_VARIABLE*7:config.GENES_PER_VARIABLE*8]),
-            tuple(best_chromosome_list[config.GENES_PER_VARIABLE*8:config.GENES_PER_VARIABLE*9])
-        )) # type: ignore
-        print(solver_solution)
-        plot_solution(ga_instance)
-        vehicle_trips: list[VehicleTrip] = DataImporter(config.DATA_FILE_PATH).vehicle_trips
-        plot_histogram_m_per_l(ga_instance, vehicle_trips, 40)
-        plot_histogram_error_m_per_l(ga_instance, vehicle_trips, 40)
-        plot_histogram_percent_error_m_per_l(ga_instance, vehicle_trips, 40)
-        plot_histogram_l_per_hundred_km(ga_instance, vehicle_trips, 40)
-        plot_histogram_error_l_per_hundred_km(ga_instance, vehicle_trips, 40)
-        plot_histogram_percent_error_l_per_hundred_km(ga_instance, vehicle_trips, 40)
+        print(compiled_solution)
+        plot_report(compiled_solution, DataImporter(config.DATA_FILE_PATH).trip_table, 40)
         plt.show()
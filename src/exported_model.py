@@ -0,0 +1,185 @@
+import argparse
+import os
+from datetime import datetime
+from time import time
+
+import numpy
+
+import config
+import vehicle_trip
+from chromosome import Chromosome, population_genes
+from solver_input_solution import decode_solution_parameters
+from solver_solution import CompiledSolverSolution, solver_solution_from_chromosome
+from trip_table import TRIP_TABLE_FEATURES
+
+MODEL_FORMAT_VERSION: int = 1 # increase when the meaning of a stored array changes
+# constants of vehicle_trip that the inputs of the solution are normalized with, in TRIP_TABLE_FEATURES order
+NORMALIZATION_CONSTANTS: tuple[str, ...] = (
+    "DATE_AND_TIME_S_NORMALIZATION_FACTOR",
+    "ODOMETER_M_NORMALIZATION_FACTOR",
+    "TRIP_DISTANCE_M_NORMALIZATION_FACTOR",
+    "VEHICLE_TEMPERATURE_KELVIN_NORMALIZATION_FACTOR",
+    "TRIP_ENGINE_RUNNING_TIME_S_NORMALIZATION_FACTOR",
+    "ENGINE_OPERATING_TEMPERATURE_KELVIN",
+    "TEMPERATURE_DIFFERENCE_BETWEEN_VEHICLE_AND_ENGINE_OPERATING_NORMALIZATION_FACTOR",
+    "TRIP_AVERAGE_SPEED_M_PER_S_NORMALIZATION_FACTOR",
+    "TIME_OF_DAY_S_SINCE_MIDNIGHT_NORMALIZATION_FACTOR",
+    "TIME_OF_YEAR_S_SINCE_NEW_YEAR_NORMALIZATION_FACTOR",
+    "FUEL_EFFICIENCY_M_PEL_L_NORMALIZATION_FACTOR"
+)
+
+def current_normalization() -> dict[str, float]:
+    return {name: float(getattr(vehicle_trip, name)) for name in NORMALIZATION_CONSTANTS}
+
+class ExportedModel:
+    """
+    A trained solution in its smallest usable form: the decoded coefficients of every SolverInputSolution,
+    with the normalization of the inputs it was trained with and how well it fit the trips at export.
+
+    Loading it only needs numpy and the modules that evaluate the solution, not pygad or matplotlib,
+    unlike the pygad pickle and the checkpoint, which hold the whole population as genes.
+    """
+    def __init__(self,
+                 coefficients: numpy.ndarray,
+                 fitness: float,
+                 number_of_trips: int,
+                 generations_completed: int,
+                 exported_at: float,
+                 normalization: dict[str, float],
+                 time_origin: datetime):
+        """
+        args:
+            coefficients: numpy.ndarray - shape (NUMBER_OF_VARIABLES, GENES_PER_VARIABLE / 2), see decode_solution_parameters
+            fitness: float - fitness over every trip of the dataset at export
+            number_of_trips: int - number of trips of the dataset at export
+            generations_completed: int - generations the solution was trained for
+            exported_at: float - seconds since the epoch
+            normalization: dict[str, float] - the NORMALIZATION_CONSTANTS of vehicle_trip when the solution was trained
+            time_origin: datetime - vehicle_trip.t0 when the solution was trained
+        """
+        assert coefficients.shape == (config.NUMBER_OF_VARIABLES, config.GENES_PER_VARIABLE // 2)
+        self.coefficients: numpy.ndarray = coefficients
+        self.fitness: float = fitness
+        self.number_of_trips: int = number_of_trips
+        self.generations_completed: int = generations_completed
+        self.exported_at: float = exported_at
+        self.normalization: dict[str, float] = normalization
+        self.time_origin: datetime = time_origin
+
+    @classmethod
+    def from_chromosome(cls, chromosome: Chromosome, fitness: float, number_of_trips: int, generations_completed: int) -> "ExportedModel":
+        """
+        exports a chromosome trained with the current normalization of vehicle_trip
+        """
+        genes: numpy.ndarray = population_genes(numpy.asarray(chromosome)[numpy.newaxis, :])[0]
+        return cls(
+            coefficients=decode_solution_parameters(genes),
+            fitness=fitness,
+            number_of_trips=number_of_trips,
+            generations_completed=generations_completed,
+            exported_at=time(),
+            normalization=current_normalization(),
+            time_origin=vehicle_trip.t0
+        )
+
+    @property
+    def compiled(self) -> CompiledSolverSolution:
+        return CompiledSolverSolution(self.coefficients)
+
+    def check_normalization(self):
+        """
+        raises:
+            ValueError - if vehicle_trip normalizes the inputs differently than when the solution was trained,
+            so that its predictions would be meaningless
+        """
+        if self.normalization != current_normalization() or self.time_origin != vehicle_trip.t0:
+            raise ValueError("The model was trained with inputs normalized differently than vehicle_trip does now")
+
+    def save(self, file_path: str):
+        temporary_file_path: str = file_path + ".tmp"
+        with open(temporary_file_path, "wb") as file:
+            numpy.savez(
+                file,
+                format_version=numpy.int64(MODEL_FORMAT_VERSION),
+                features=numpy.array(TRIP_TABLE_FEATURES),
+                coefficients=self.coefficients,
+                fitness=numpy.float64(self.fitness),
+                number_of_trips=numpy.int64(self.number_of_trips),
+                generations_completed=numpy.int64(self.generations_completed),
+                exported_at=numpy.float64(self.exported_at),
+                normalization_names=numpy.array(list(self.normalization.keys())),
+                normalization_values=numpy.array(list(self.normalization.values()), dtype=numpy.float64),
+                time_origin=numpy.str_(self.time_origin.isoformat())
+            )
+        os.replace(temporary_file_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "ExportedModel":
+        """
+        raises:
+            ValueError - if the file is of another format version, or its inputs are not those of TRIP_TABLE_FEATURES
+        """
+        with numpy.load(file_path, allow_pickle=False) as data:
+            if int(data["format_version"]) != MODEL_FORMAT_VERSION:
+                raise ValueError("{} has model format version {:d}, not {:d}".format(file_path, int(data["format_version"]), MODEL_FORMAT_VERSION))
+            if tuple(data["features"].tolist()) != TRIP_TABLE_FEATURES:
+                raise ValueError("{} was trained on other inputs: {}".format(file_path, data["features"].tolist()))
+            return cls(
+                coefficients=data["coefficients"],
+                fitness=float(data["fitness"]),
+                number_of_trips=int(data["number_of_trips"]),
+                generations_completed=int(data["generations_completed"]),
+                exported_at=float(data["exported_at"]),
+                normalization={str(name): float(value) for name, value in zip(data["normalization_names"], data["normalization_values"])},
+                time_origin=datetime.fromisoformat(str(data["time_origin"]))
+            )
+
+    def __str__(self) -> str:
+        return "Fitness {:.2f} over {:d} trips after {:d} generations, exported {}".format(
+            self.fitness, self.number_of_trips, self.generations_completed, datetime.fromtimestamp(self.exported_at).isoformat(" ", "seconds")
+        )
+
+def load_compiled_solution(model_file_path: str, checkpoint_file_path: str) -> CompiledSolverSolution | None:
+    """
+    the solution of the exported model when it is at least as recent as the checkpoint, otherwise the best solution of the checkpoint
+    or of the pygad pickle of config.GA_MODEL_FILE, None if there is none of them
+
+    the model is only exported when training ends, while checkpoints are written throughout it,
+    so after training was interrupted (e.g. it crashed or was killed) the checkpoint holds a newer solution than the exported model
+
+    raises:
+        ValueError - if the exported model cannot be used with the current normalization of the inputs
+    """
+    if os.path.isfile(model_file_path) and (
+        not os.path.isfile(checkpoint_file_path)
+        or os.path.getmtime(model_file_path) >= os.path.getmtime(checkpoint_file_path)
+    ):
+        exported_model: ExportedModel = ExportedModel.load(model_file_path)
+        exported_model.check_normalization()
+        return exported_model.compiled
+    # imports pygad, which the exported model does not need
+    from checkpoint import load_best_chromosome
+
+    best_chromosome: Chromosome | None = load_best_chromosome(checkpoint_file_path, config.GA_MODEL_FILE)
+    if best_chromosome is None:
+        return None
+    return solver_solution_from_chromosome(best_chromosome).compiled
+
+if __name__ == "__main__":
+    from checkpoint import Checkpoint
+    from data_importer import DataImporter
+    from population_evaluator import population_fitness
+    from trip_table import TripTable
+
+    parser = argparse.ArgumentParser(description="Exports the best solution of a training checkpoint as a standalone model")
+    parser.add_argument("--checkpoint", default=config.GA_CHECKPOINT_FILE)
+    parser.add_argument("--data", default=config.DATA_FILE_PATH, help="trip log CSV that the fitness at export is measured on")
+    parser.add_argument("--output", default=config.GA_EXPORT_FILE)
+    arguments = parser.parse_args()
+
+    checkpoint: Checkpoint = Checkpoint.load(arguments.checkpoint)
+    trip_table: TripTable = DataImporter(arguments.data).trip_table
+    fitness: float = float(population_fitness(checkpoint.best_chromosome[numpy.newaxis, :], trip_table.features, trip_table.fuel_efficiency_m_per_l)[0])
+    exported_model: ExportedModel = ExportedModel.from_chromosome(checkpoint.best_chromosome, fitness, len(trip_table), checkpoint.generations_completed)
+    exported_model.save(arguments.output)
+    print(exported_model)
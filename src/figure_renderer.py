@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import queue
+from typing import TYPE_CHECKING
+
+import numpy
+
+import config
+from chromosome import Chromosome
+
+if TYPE_CHECKING:
+    # imports matplotlib, only the renderer process does so
+    from display_solution import SolutionFigure
+
+def check_figure_directory(figure_save_directory: str):
+    if not os.path.exists(figure_save_directory):
+        os.makedirs(figure_save_directory)
+    assert os.path.exists(figure_save_directory)
+    if not os.path.isdir(figure_save_directory):
+        raise Exception("Could not create the solution figure save directory as a file with the path name exists")
+
+def render_solution_figure(solution_figure: "SolutionFigure", best_chromosome: Chromosome, figure_save_path: str, resolution_dpi: float):
+    from solver_solution import solver_solution_from_chromosome
+
+    solution_figure.update(solver_solution_from_chromosome(best_chromosome).compiled)
+    if os.path.exists(figure_save_path):
+        print("figures existed in solution figure folder, overwriting...")
+        os.remove(figure_save_path)
+    solution_figure.figure.savefig(figure_save_path, dpi=resolution_dpi)
+
+def render_loop(frames: multiprocessing.Queue, figure_save_directory: str, figure_save_name_prefix: str, resolution_dpi: float):
+    """
+    runs in the renderer process, renders frames until it receives None, all of them on the same figure
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from display_solution import SolutionFigure
+
+    solution_figure: SolutionFigure = SolutionFigure()
+    while True:
+        frame: tuple[int, Chromosome] | None = frames.get()
+        if frame is None:
+            return
+        generation, best_chromosome = frame
+        check_figure_directory(figure_save_directory)
+        figure_save_path: str = os.path.join(figure_save_directory, "{}{:08d}.png".format(figure_save_name_prefix, generation))
+        render_solution_figure(solution_figure, best_chromosome, figure_save_path, resolution_dpi)
+
+class FigureRenderer:
+    """
+    Renders the solution figures in a separate process, so that training never waits for matplotlib.
+
+    At most one frame waits to be rendered: when the renderer falls behind, the waiting (stale) frame is replaced by the newest one.
+    Frames are only submitted every interval_generations generations, and if only_on_improvement is set,
+    only when the best fitness improved since the last submitted frame.
+    """
+    def __init__(self, interval_generations: int, only_on_improvement: bool):
+        assert interval_generations > 0
+        self.__interval_generations: int = interval_generations
+        self.__only_on_improvement: bool = only_on_improvement
+        self.__last_generation: int | None = None
+        self.__best_fitness: float = -numpy.inf
+        # spawn, so the renderer does not inherit the training process' memory and threads
+        context = multiprocessing.get_context("spawn")
+        self.__frames: multiprocessing.Queue = context.Queue(maxsize=1)
+        self.__process = context.Process(
+            target=render_loop,
+            args=(self.__frames, config.SOLUTION_FIGURE_SAVE_DIRECTORY, config.SOLUTION_FIGURE_SAVE_NAME_PREFIX, config.SOLUTION_FIGURE_RESOLUTION_DPI),
+            name="figure renderer",
+            daemon=True
+        )
+        self.__process.start()
+
+    def submit(self, generation: int, best_chromosome: Chromosome, best_fitness: float) -> bool:
+        """
+        queues a figure of best_chromosome if one is due, returns whether it was queued
+        """
+        if self.__last_generation is not None and generation - self.__last_generation < self.__interval_generations:
+            return False
+        if self.__only_on_improvement and best_fitness <= self.__best_fitness:
+            return False
+        if not self.__process.is_alive():
+            print("Figure renderer is not running, skipping figure of generation {:d}".format(generation))
+            return False
+        self.__last_generation = generation
+        self.__best_fitness = max(self.__best_fitness, best_fitness)
+        frame: tuple[int, Chromosome] = (generation, numpy.array(best_chromosome, dtype=numpy.float64))
+        try:
+            self.__frames.put_nowait(frame)
+        except queue.Full:
+            try:
+                self.__frames.get_nowait() # drop the stale frame
+            except queue.Empty:
+                pass
+            try:
+                self.__frames.put_nowait(frame)
+            except queue.Full:
+                return False
+        return True
+
+    def close(self):
+        """
+        waits for the frame that is queued to be rendered, then stops the renderer process
+        """
+        if self.__process.is_alive():
+            self.__frames.put(None)
+        self.__process.join()
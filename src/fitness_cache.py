@@ -0,0 +1,74 @@
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy
+
+from chromosome import Chromosome
+
+class FitnessCache:
+    """
+    Bounded cache of fitness scores with least recently used eviction,
+    keyed by the raw float bytes of a chromosome and the version (and chunk) of the dataset it was evaluated against.
+
+    The entries and the hit / miss counters are guarded by a lock, so the cache can be used from threads.
+    Only the training process has a cache: it looks the chromosomes up before sending the others to
+    the fitness workers (see FitnessWorkerPool), and remembers the scores they send back.
+    """
+    def __init__(self, maximum_size: int):
+        assert maximum_size > 0
+        self.__maximum_size: int = maximum_size
+        self.__entries: OrderedDict[bytes, float] = OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+        self.__hits: int = 0
+        self.__misses: int = 0
+
+    @staticmethod
+    def key(chromosome: Chromosome, dataset_version: float, trip_chunk_index: int = -1) -> bytes:
+        """
+        args:
+            chromosome: Chromosome - the chromosome that was evaluated
+            dataset_version: float - version stamp of the dataset, see DataImporter.file_date_modified
+            trip_chunk_index: int - the chunk of the dataset the chromosome was evaluated on, -1 for every trip
+        """
+        chromosome_hash = hashlib.blake2b(numpy.ascontiguousarray(chromosome, dtype=numpy.float64).tobytes(), digest_size=16)
+        chromosome_hash.update(struct.pack("<dq", dataset_version, trip_chunk_index))
+        return chromosome_hash.digest()
+
+    def get(self, key: bytes) -> float | None:
+        with self.__lock:
+            fitness: float | None = self.__entries.get(key)
+            if fitness is None:
+                self.__misses += 1
+            else:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+        return fitness
+
+    def put(self, key: bytes, fitness: float):
+        with self.__lock:
+            self.__entries[key] = fitness
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__maximum_size:
+                self.__entries.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    def __str__(self) -> str:
+        lookups: int = self.hits + self.misses
+        hit_rate: float = self.hits / lookups if lookups > 0 else 0.0
+        return "{:d} hits, {:d} misses ({:.1%} hit rate), {:d} / {:d} entries".format(self.hits, self.misses, hit_rate, len(self), self.__maximum_size)
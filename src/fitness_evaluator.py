@@ -0,0 +1,255 @@
+import numpy
+
+import config
+from chromosome import Population
+from contribution_cache import ContributionCache
+from fitness_cache import FitnessCache
+from population_evaluator import (
+    decode_population,
+    difference_sums,
+    difference_sums_from_fitness,
+    fitness_from_difference_sums,
+    fitness_from_predictions,
+    population_fitness,
+    predict_population,
+    racing_difference_sums,
+    TripBasis
+)
+from trip_chunker import TripChunker
+from trip_table import TripTable
+
+FULL_DATASET: int = -1 # trip chunk index meaning every trip
+RACING_TRIP_ORDER_SEED: int = 0 # every process has to race the chromosomes over the trips in the same order
+
+class FitnessEvaluator:
+    """
+    Scores chromosomes against a TripTable, on every trip or on one chunk of trips (see TripChunker),
+    re-using remembered fitness scores (FitnessCache) and variable contributions (ContributionCache).
+
+    With config.GA_FLOAT32_EVALUATION the chromosomes are scored in float32 (see TripBasis) until use_full_precision.
+    """
+    def __init__(self, trip_table: TripTable, dataset_version: float, fitness_cache: FitnessCache | None):
+        """
+        args:
+            trip_table: TripTable - every trip of the dataset
+            dataset_version: float - version stamp of the dataset, see DataImporter.file_date_modified
+            fitness_cache: FitnessCache | None - where to remember fitness scores, None to not remember them
+        """
+        self.__trip_table: TripTable = trip_table
+        self.__dataset_version: float = dataset_version
+        self.__fitness_cache: FitnessCache | None = fitness_cache
+        self.__trip_chunker: TripChunker | None = TripChunker(trip_table, config.GA_TRIP_CHUNK_SIZE, config.GA_TRIP_CHUNK_STRATEGY) if config.GA_TRIP_CHUNK_SIZE > 0 else None
+        self.__contribution_caches: dict[int, ContributionCache] = dict() # one per trip chunk index, created on first use
+        self.__trip_bases: dict[int, TripBasis] = dict() # one per trip chunk index, created on first use
+        self.__racing_trip_tables: dict[int, TripTable] = dict() # the trips of each trip chunk index in random order, created on first use
+        self.__racing_trip_bases: dict[int, TripBasis] = dict() # the TripBasis of each of racing_trip_tables
+        self.__trips_checksum: bytes | None = None
+        self.__reduced_precision: bool = config.GA_FLOAT32_EVALUATION
+        self.__pruned_chromosomes: int = 0
+        self.__trip_evaluations_saved: int = 0
+
+    @property
+    def trip_table(self) -> TripTable:
+        return self.__trip_table
+
+    @property
+    def dataset_version(self) -> float:
+        return self.__dataset_version
+
+    @property
+    def fitness_cache(self) -> FitnessCache | None:
+        return self.__fitness_cache
+
+    @property
+    def trips_checksum(self) -> bytes:
+        """
+        TripTable.checksum of every trip, computed on first use
+        """
+        if self.__trips_checksum is None:
+            self.__trips_checksum = self.__trip_table.checksum(len(self.__trip_table))
+        return self.__trips_checksum
+
+    @property
+    def reduced_precision(self) -> bool:
+        """
+        whether chromosomes are scored in float32
+        """
+        return self.__reduced_precision
+
+    def use_full_precision(self):
+        """
+        scores chromosomes in float64 from now on, forgetting everything that was evaluated in float32:
+        the trip bases, the variable contributions and the remembered fitness scores
+        """
+        self.__reduced_precision = False
+        self.__trip_bases.clear()
+        self.__racing_trip_bases.clear()
+        self.__contribution_caches.clear()
+        if self.__fitness_cache is not None:
+            self.__fitness_cache.clear()
+
+    @property
+    def pruned_chromosomes(self) -> int:
+        """
+        chromosomes whose racing evaluation was stopped before their last trip, see score
+        """
+        return self.__pruned_chromosomes
+
+    @property
+    def trip_evaluations_saved(self) -> int:
+        """
+        trips that the pruned chromosomes were not evaluated on
+        """
+        return self.__trip_evaluations_saved
+
+    def count_pruned(self, pruned_chromosomes: int, trip_evaluations_saved: int):
+        """
+        adds the racing evaluations of another process, e.g. a fitness worker
+        """
+        self.__pruned_chromosomes += pruned_chromosomes
+        self.__trip_evaluations_saved += trip_evaluations_saved
+
+    def trip_chunk_index(self, generation: int) -> int:
+        """
+        the trip chunk that the given generation is scored on, or FULL_DATASET if the dataset is not split into chunks
+        """
+        if self.__trip_chunker is None:
+            return FULL_DATASET
+        return self.__trip_chunker.chunk_index(generation)
+
+    def evaluation_trip_table(self, trip_chunk_index: int) -> TripTable:
+        if trip_chunk_index == FULL_DATASET:
+            return self.__trip_table
+        assert self.__trip_chunker is not None
+        return self.__trip_chunker.chunk(trip_chunk_index)
+
+    def describe_evaluation(self, trip_chunk_index: int) -> str:
+        if trip_chunk_index == FULL_DATASET:
+            return "full dataset, {:d} trips".format(len(self.__trip_table))
+        assert self.__trip_chunker is not None
+        return "trip chunk {:d}/{:d}, {:d} trips".format(trip_chunk_index + 1, self.__trip_chunker.number_of_chunks, len(self.__trip_chunker.chunk(trip_chunk_index)))
+
+    def trip_basis(self, trip_chunk_index: int) -> TripBasis:
+        """
+        the trips of the given trip chunk, expanded into their basis with config.GA_BASIS_EXPANSION
+        """
+        if trip_chunk_index not in self.__trip_bases:
+            self.__trip_bases[trip_chunk_index] = self.__new_trip_basis(self.evaluation_trip_table(trip_chunk_index))
+        return self.__trip_bases[trip_chunk_index]
+
+    def __new_trip_basis(self, trip_table: TripTable) -> TripBasis:
+        return TripBasis(trip_table.features, config.GA_BASIS_EXPANSION, numpy.float32 if self.__reduced_precision else numpy.float64)
+
+    def contribution_cache(self, trip_chunk_index: int) -> ContributionCache | None:
+        return self.__contribution_caches.get(trip_chunk_index)
+
+    def contribution_cache_size(self) -> int:
+        """
+        maximum number of entries of each ContributionCache, so that the caches of every trip chunk,
+        and of the full dataset that the elites are re-scored on, fit in this process' share of config.GA_CONTRIBUTION_CACHE_SIZE_BYTES
+        (every process that scores chromosomes has its own caches)
+        """
+        number_of_cached_trips: int = len(self.__trip_table) * (1 if self.__trip_chunker is None else 2)
+        entry_size_bytes: int = max(1, number_of_cached_trips * numpy.dtype(numpy.float32 if self.__reduced_precision else numpy.float64).itemsize)
+        process_size_bytes: int = config.GA_CONTRIBUTION_CACHE_SIZE_BYTES // max(1, config.GA_NUMBER_OF_THREADS)
+        return max(1, process_size_bytes // entry_size_bytes)
+
+    def cached_fitness(self, chromosomes: Population, trip_chunk_index: int) -> list[float | None]:
+        """
+        remembered fitness score of each chromosome, None for the chromosomes that have to be scored
+        """
+        if self.__fitness_cache is None:
+            return [None] * len(chromosomes)
+        return [self.__fitness_cache.get(FitnessCache.key(chromosome, self.__dataset_version, trip_chunk_index)) for chromosome in chromosomes]
+
+    def remember(self, chromosomes: Population, fitness_scores: list[float], trip_chunk_index: int, fitness_cutoff: float = -numpy.inf):
+        """
+        scores below fitness_cutoff may be the bounds of a racing evaluation (see score), which are not remembered
+        """
+        if self.__fitness_cache is None:
+            return
+        for chromosome, fitness in zip(chromosomes, fitness_scores):
+            if fitness < fitness_cutoff:
+                continue
+            self.__fitness_cache.put(FitnessCache.key(chromosome, self.__dataset_version, trip_chunk_index), float(fitness))
+
+    def score(self, chromosomes: Population, trip_chunk_index: int, fitness_cutoff: float = -numpy.inf) -> list[float]:
+        """
+        fitness scores of the chromosomes over the trips of the given trip chunk, without looking them up in the fitness cache
+
+        with config.GA_RACING_EVALUATION and a fitness_cutoff, the chromosomes are raced over the trips in random order (see racing_difference_sums),
+        a chromosome that is not expected to reach fitness_cutoff is stopped and scored with the best fitness it is expected to have,
+        which is below fitness_cutoff
+        """
+        if config.GA_RACING_EVALUATION and fitness_cutoff > -numpy.inf:
+            return self.race(chromosomes, trip_chunk_index, fitness_cutoff)
+        evaluation_trips: TripTable = self.evaluation_trip_table(trip_chunk_index)
+        if config.GA_INCREMENTAL_EVALUATION:
+            if trip_chunk_index not in self.__contribution_caches:
+                self.__contribution_caches[trip_chunk_index] = ContributionCache(self.trip_basis(trip_chunk_index), self.contribution_cache_size())
+            predictions: numpy.ndarray = self.__contribution_caches[trip_chunk_index].predict_population(chromosomes)
+        else:
+            predictions = self.trip_basis(trip_chunk_index).predict_population(decode_population(chromosomes))
+        return fitness_from_predictions(predictions, evaluation_trips.fuel_efficiency_m_per_l).tolist() # type: ignore
+
+    def race(self, chromosomes: Population, trip_chunk_index: int, fitness_cutoff: float) -> list[float]:
+        if trip_chunk_index not in self.__racing_trip_tables:
+            trip_table: TripTable = self.evaluation_trip_table(trip_chunk_index)
+            self.__racing_trip_tables[trip_chunk_index] = trip_table.take(numpy.random.default_rng(RACING_TRIP_ORDER_SEED).permutation(len(trip_table)))
+        if trip_chunk_index not in self.__racing_trip_bases:
+            self.__racing_trip_bases[trip_chunk_index] = self.__new_trip_basis(self.__racing_trip_tables[trip_chunk_index])
+        evaluation_trips: TripTable = self.__racing_trip_tables[trip_chunk_index]
+        number_of_trips: int = len(evaluation_trips)
+        maximum_difference_sums_m_per_l: numpy.ndarray = difference_sums_from_fitness(numpy.full(len(chromosomes), fitness_cutoff), number_of_trips)
+        difference_sums_m_per_l, trips_evaluated = racing_difference_sums(
+            decode_population(chromosomes),
+            self.__racing_trip_bases[trip_chunk_index],
+            evaluation_trips.fuel_efficiency_m_per_l,
+            maximum_difference_sums_m_per_l,
+            config.GA_RACING_BLOCK_SIZE,
+            config.GA_RACING_CONFIDENCE_Z
+        )
+        self.count_pruned(int(numpy.count_nonzero(trips_evaluated < number_of_trips)), int((number_of_trips - trips_evaluated).sum()))
+        return fitness_from_difference_sums(difference_sums_m_per_l, number_of_trips).tolist() # type: ignore
+
+    def reference_fitness(self, chromosomes: Population, trip_chunk_index: int) -> numpy.ndarray:
+        """
+        fitness scores of the chromosomes over the trips of the given trip chunk, evaluated in float64 term by term,
+        without any cache, basis or racing, to check the other ways of scoring against
+        """
+        evaluation_trips: TripTable = self.evaluation_trip_table(trip_chunk_index)
+        return population_fitness(chromosomes, evaluation_trips.features, evaluation_trips.fuel_efficiency_m_per_l)
+
+    def evaluate(self, chromosomes: Population, trip_chunk_index: int, fitness_cutoff: float = -numpy.inf) -> list[float]:
+        """
+        fitness scores of the chromosomes over the trips of the given trip chunk (or every trip for FULL_DATASET),
+        see score for fitness_cutoff
+        """
+        fitness_scores: list[float | None] = self.cached_fitness(chromosomes, trip_chunk_index)
+        uncached_indices: list[int] = [index for index, fitness in enumerate(fitness_scores) if fitness is None]
+        if len(uncached_indices) > 0:
+            uncached_fitness_scores: list[float] = self.score(chromosomes[uncached_indices], trip_chunk_index, fitness_cutoff)
+            self.remember(chromosomes[uncached_indices], uncached_fitness_scores, trip_chunk_index, fitness_cutoff)
+            for index, fitness in zip(uncached_indices, uncached_fitness_scores):
+                fitness_scores[index] = fitness
+        return fitness_scores # type: ignore
+
+    def extend_fitness(self, chromosomes: Population, fitness_scores: numpy.ndarray, number_of_scored_trips: int) -> list[float]:
+        """
+        fitness scores over every trip of chromosomes whose fitness_scores over the first number_of_scored_trips trips are known,
+        by adding the differences of the trips after them to the sums of differences behind fitness_scores,
+        instead of evaluating every trip again, so fitness_scores have to be exact, never the bounds of a racing evaluation (see score)
+
+        the scores are remembered for FULL_DATASET
+        """
+        assert len(chromosomes) == len(fitness_scores)
+        assert 0 < number_of_scored_trips <= len(self.__trip_table)
+        new_trips: TripTable = self.__trip_table.take(numpy.arange(number_of_scored_trips, len(self.__trip_table)))
+        difference_sums_m_per_l: numpy.ndarray = difference_sums_from_fitness(fitness_scores, number_of_scored_trips)
+        for start in range(0, len(chromosomes), config.GA_FITNESS_BATCH_SIZE):
+            batch: slice = slice(start, start + config.GA_FITNESS_BATCH_SIZE)
+            predictions: numpy.ndarray = predict_population(decode_population(chromosomes[batch]), new_trips.features)
+            difference_sums_m_per_l[batch] += difference_sums(predictions, new_trips.fuel_efficiency_m_per_l)
+        extended_fitness_scores: list[float] = fitness_from_difference_sums(difference_sums_m_per_l, len(self.__trip_table)).tolist() # type: ignore
+        self.remember(chromosomes, extended_fitness_scores, FULL_DATASET)
+        return extended_fitness_scores
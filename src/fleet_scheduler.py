@@ -0,0 +1,298 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+from multiprocessing.connection import wait
+from multiprocessing.context import SpawnProcess
+from typing import Any
+
+import numpy
+import pygad
+
+import config
+import genetic_learner
+from checkpoint import Checkpoint
+from worker_pool import config_values
+
+# vehicle files, inside the vehicle's directory
+VEHICLE_CHECKPOINT_FILE: str = "checkpoint.npz"
+VEHICLE_MODEL_FILE: str = "model" # pygad pickle of older runs, see config.GA_MODEL_FILE
+VEHICLE_EXPORT_FILE: str = "exported_model.npz"
+VEHICLE_METRICS_FILE: str = "metrics.jsonl"
+VEHICLE_STOP_FLAG_FILE: str = "to_safely_stop_vehicle.deleteme"
+VEHICLE_FIGURE_DIRECTORY: str = "solution_figure/"
+VEHICLE_PROFILE_DIRECTORY: str = "profiles/"
+
+# state of a vehicle training process, set by run_vehicle_slice
+fleet_stop_flag_file: str = ""
+
+class VehicleJob:
+    """
+    Training of one vehicle's trip log, in slices of generations that each run in a separate process
+    and continue from the checkpoint of the previous slice.
+
+    Every vehicle has its own directory with its checkpoint, metrics, solution figures and stop flag file.
+    Writing anything into the stop flag file stops training the vehicle at the end of its current generation.
+    """
+    def __init__(self, name: str, data_file_path: str, fleet_directory: str, overrides: dict[str, Any]):
+        """
+        args:
+            name: str - unique name of the vehicle, used as the name of its directory
+            data_file_path: str - trip log CSV of the vehicle
+            fleet_directory: str - where the vehicle's directory is created
+            overrides: dict[str, Any] - settings of config that differ for this vehicle, e.g. {"GA_POPULATION_SIZE": 256}
+        """
+        self.__name: str = name
+        self.__data_file_path: str = data_file_path
+        self.__directory: str = os.path.join(fleet_directory, name)
+        self.__overrides: dict[str, Any] = overrides
+        self.__generations_completed: int = 0
+        self.__best_fitness: float | None = None
+        self.__dataset_version: float | None = None
+        self.__improvement_per_generation: float | None = None # in the last slice, None until a slice completed
+        self.__last_slice: int = -1 # order of the last slice among every vehicle's slices
+        self.__failed: bool = False
+        self.__process: SpawnProcess | None = None
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    @property
+    def process(self) -> SpawnProcess | None:
+        """
+        the process training the current slice, None when no slice is running
+        """
+        return self.__process
+
+    @property
+    def best_fitness(self) -> float | None:
+        return self.__best_fitness
+
+    @property
+    def generations_completed(self) -> int:
+        return self.__generations_completed
+
+    @property
+    def improvement_per_generation(self) -> float | None:
+        return self.__improvement_per_generation
+
+    def configuration(self) -> dict[str, Any]:
+        """
+        the settings of config, with the overrides and files of this vehicle
+        """
+        configuration: dict[str, Any] = config_values()
+        configuration.update(self.__overrides)
+        configuration["DATA_FILE_PATH"] = self.__data_file_path
+        configuration["GA_CHECKPOINT_FILE"] = os.path.join(self.__directory, VEHICLE_CHECKPOINT_FILE)
+        configuration["GA_MODEL_FILE"] = os.path.join(self.__directory, VEHICLE_MODEL_FILE)
+        configuration["GA_EXPORT_FILE"] = os.path.join(self.__directory, VEHICLE_EXPORT_FILE)
+        configuration["GA_STOP_FLAG_FILE"] = os.path.join(self.__directory, VEHICLE_STOP_FLAG_FILE)
+        if configuration["GA_METRICS_FILE"] != "":
+            configuration["GA_METRICS_FILE"] = os.path.join(self.__directory, VEHICLE_METRICS_FILE)
+        configuration["GA_PROFILE_DIRECTORY"] = os.path.join(self.__directory, VEHICLE_PROFILE_DIRECTORY)
+        configuration["SOLUTION_FIGURE_SAVE_DIRECTORY"] = os.path.join(self.__directory, VEHICLE_FIGURE_DIRECTORY)
+        # each vehicle is evolved as a single population
+        configuration["GA_NUMBER_OF_ISLANDS"] = 1
+        return configuration
+
+    @property
+    def number_of_workers(self) -> int:
+        """
+        processes that scoring this vehicle's chromosomes keeps busy
+        """
+        return max(1, self.configuration()["GA_NUMBER_OF_THREADS"])
+
+    def prepare(self):
+        """
+        creates the vehicle's directory and empty stop flag file, and reads how far it was trained before
+        """
+        os.makedirs(self.__directory, exist_ok=True)
+        with open(self.configuration()["GA_STOP_FLAG_FILE"], "w"):
+            pass
+        self.__read_checkpoint()
+        self.__improvement_per_generation = None
+
+    def is_stale(self) -> bool:
+        """
+        whether the trip log has changed since the vehicle was last trained, or it was never trained
+        """
+        if self.__dataset_version is None:
+            return True
+        return os.stat(self.__data_file_path).st_mtime != self.__dataset_version
+
+    def is_finished(self) -> bool:
+        """
+        whether the vehicle is not trained further: it failed, its stop flag file changed or it reached its generation goal
+        """
+        stop_flag_file: str = self.configuration()["GA_STOP_FLAG_FILE"]
+        return (
+            self.__failed
+            or not os.path.exists(stop_flag_file)
+            or os.stat(stop_flag_file).st_size > 0
+            or self.__generations_completed >= self.configuration()["GA_GENERATION_GOAL"]
+        )
+
+    def priority(self) -> tuple[bool, float, int]:
+        """
+        sort key, lowest first: vehicles with new trips, then vehicles whose fitness improves the most per generation
+        (vehicles that were not trained in this run yet count as improving the most), then the longest waiting vehicles
+        """
+        improvement: float = numpy.inf if self.__improvement_per_generation is None else self.__improvement_per_generation
+        return (not self.is_stale(), -improvement, self.__last_slice)
+
+    def start_slice(self, number_of_generations: int, slice_index: int, fleet_stop_flag_file: str):
+        assert self.__process is None
+        self.__last_slice = slice_index
+        remaining_generations: int = self.configuration()["GA_GENERATION_GOAL"] - self.__generations_completed
+        context = multiprocessing.get_context("spawn")
+        self.__process = context.Process(
+            target=run_vehicle_slice,
+            args=(self.configuration(), min(number_of_generations, remaining_generations), fleet_stop_flag_file),
+            name="vehicle-{}".format(self.__name)
+        )
+        self.__process.start()
+
+    def end_slice(self):
+        """
+        waits for the current slice to end, then updates how far the vehicle is trained and how much its fitness improved
+        """
+        assert self.__process is not None
+        self.__process.join()
+        if self.__process.exitcode != 0:
+            print("Vehicle {}: training failed with exit code {}, not training it further".format(self.__name, self.__process.exitcode))
+            self.__failed = True
+        self.__process = None
+        generations_completed, best_fitness = self.__generations_completed, self.__best_fitness
+        self.__read_checkpoint()
+        if best_fitness is not None and self.__best_fitness is not None and self.__generations_completed > generations_completed:
+            self.__improvement_per_generation = (self.__best_fitness - best_fitness) / (self.__generations_completed - generations_completed)
+        else:
+            self.__improvement_per_generation = None
+
+    def __read_checkpoint(self):
+        checkpoint_file_path: str = self.configuration()["GA_CHECKPOINT_FILE"]
+        if not os.path.isfile(checkpoint_file_path):
+            return
+        checkpoint: Checkpoint = Checkpoint.load(checkpoint_file_path)
+        self.__generations_completed = checkpoint.generations_completed
+        self.__dataset_version = checkpoint.dataset_version
+        # the fitness on the trip chunk of the checkpoint's generation when training on trip chunks
+        finite_fitness: numpy.ndarray = checkpoint.fitness[numpy.isfinite(checkpoint.fitness)]
+        self.__best_fitness = float(finite_fitness.max()) if len(finite_fitness) > 0 else None
+
+    def __str__(self) -> str:
+        return "Vehicle {}: {:d} generations, best fitness {}, improvement per generation {}".format(
+            self.__name,
+            self.__generations_completed,
+            "unknown" if self.__best_fitness is None else "{:.2f}".format(self.__best_fitness),
+            "unknown" if self.__improvement_per_generation is None else "{:.4f}".format(self.__improvement_per_generation)
+        )
+
+def check_fleet_stop_flag() -> bool:
+    return not os.path.exists(fleet_stop_flag_file) or os.stat(fleet_stop_flag_file).st_size > 0
+
+def on_vehicle_generation(ga_instance: pygad.GA) -> str | None:
+    genetic_learner.report_generation(ga_instance)
+    if genetic_learner.check_stop_flag() or check_fleet_stop_flag():
+        print("Detected change in stop flag file, ending")
+        return "stop"
+    return None
+
+def run_vehicle_slice(configuration: dict[str, Any], number_of_generations: int, stop_flag_file: str):
+    """
+    trains one vehicle for number_of_generations generations in this process, continuing from its checkpoint,
+    unless its stop flag file or the fleet's stop flag file changes before
+    """
+    global fleet_stop_flag_file
+    fleet_stop_flag_file = stop_flag_file
+    for name, value in configuration.items():
+        setattr(config, name, value)
+    ga_instance: pygad.GA = genetic_learner.prepare_training(render_figures=config.FLEET_RENDER_FIGURES)
+    ga_instance.num_generations = number_of_generations
+    ga_instance.on_generation = on_vehicle_generation
+    try:
+        ga_instance.run()
+        genetic_learner.save_checkpoint(ga_instance)
+        genetic_learner.export_model(ga_instance)
+    finally:
+        genetic_learner.stop_helper_processes()
+
+def read_vehicle_jobs(trip_logs_path: str, fleet_directory: str) -> list[VehicleJob]:
+    """
+    the vehicles of every CSV file in a directory, named after the files,
+    or of a JSON manifest listing trip logs, either as paths or as objects like
+    {"data_file": "corolla.csv", "name": "corolla", "config": {"GA_POPULATION_SIZE": 256}}, with optional name and config
+
+    relative paths in a manifest are relative to the manifest
+    """
+    vehicle_jobs: list[VehicleJob] = list()
+    if os.path.isdir(trip_logs_path):
+        for data_file_path in sorted(glob.glob(os.path.join(trip_logs_path, "*.csv"))):
+            name: str = os.path.splitext(os.path.basename(data_file_path))[0]
+            vehicle_jobs.append(VehicleJob(name, data_file_path, fleet_directory, dict()))
+    else:
+        with open(trip_logs_path, "r") as file:
+            manifest: list[str | dict[str, Any]] = json.load(file)
+        for entry in manifest:
+            vehicle: dict[str, Any] = {"data_file": entry} if isinstance(entry, str) else entry
+            data_file_path: str = os.path.join(os.path.dirname(trip_logs_path), vehicle["data_file"])
+            name: str = vehicle.get("name", os.path.splitext(os.path.basename(data_file_path))[0])
+            vehicle_jobs.append(VehicleJob(name, data_file_path, fleet_directory, vehicle.get("config", dict())))
+    names: list[str] = [vehicle_job.name for vehicle_job in vehicle_jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Vehicle names in {} are not unique: {}".format(trip_logs_path, names))
+    return vehicle_jobs
+
+def run_fleet(vehicle_jobs: list[VehicleJob], number_of_workers: int, slice_generations: int):
+    """
+    trains every vehicle, slice by slice, running as many slices at the same time as fit in number_of_workers processes,
+    until every vehicle is finished or config.GA_STOP_FLAG_FILE changes
+
+    each free slot goes to the unfinished vehicle with the highest VehicleJob.priority
+    """
+    assert number_of_workers > 0
+    assert slice_generations > 0
+    genetic_learner.create_stop_flag_file()
+    for vehicle_job in vehicle_jobs:
+        vehicle_job.prepare()
+    number_of_slices: int = 0
+    while True:
+        running_jobs: list[VehicleJob] = [vehicle_job for vehicle_job in vehicle_jobs if vehicle_job.process is not None]
+        if not genetic_learner.check_stop_flag():
+            waiting_jobs: list[VehicleJob] = sorted(
+                [vehicle_job for vehicle_job in vehicle_jobs if vehicle_job.process is None and not vehicle_job.is_finished()],
+                key=lambda vehicle_job: vehicle_job.priority()
+            )
+            free_workers: int = number_of_workers - sum(min(vehicle_job.number_of_workers, number_of_workers) for vehicle_job in running_jobs)
+            for vehicle_job in waiting_jobs:
+                # in order of priority, so a vehicle that needs more workers is not passed over by less important ones
+                if min(vehicle_job.number_of_workers, number_of_workers) > free_workers:
+                    break
+                print("{}, training {:d} generations".format(vehicle_job, slice_generations))
+                vehicle_job.start_slice(slice_generations, number_of_slices, config.GA_STOP_FLAG_FILE)
+                number_of_slices += 1
+                free_workers -= min(vehicle_job.number_of_workers, number_of_workers)
+                running_jobs.append(vehicle_job)
+        if len(running_jobs) == 0:
+            break
+        processes: dict[int, VehicleJob] = {vehicle_job.process.sentinel: vehicle_job for vehicle_job in running_jobs if vehicle_job.process is not None}
+        for sentinel in wait(list(processes.keys())):
+            assert isinstance(sentinel, int)
+            processes[sentinel].end_slice()
+    for vehicle_job in vehicle_jobs:
+        print(vehicle_job)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trains one genetic algorithm per vehicle, sharing the processes of this machine between them")
+    parser.add_argument("trip_logs", help="directory of trip log CSVs, one per vehicle, or JSON manifest of trip logs")
+    parser.add_argument("--workers", type=int, default=config.FLEET_NUMBER_OF_WORKERS, help="processes shared by the vehicles trained at the same time")
+    parser.add_argument("--slice-generations", type=int, default=config.FLEET_SLICE_GENERATIONS, help="generations a vehicle is trained before the next vehicle is picked")
+    parser.add_argument("--directory", default=config.FLEET_DIRECTORY, help="where each vehicle's directory is created")
+    arguments = parser.parse_args()
+    run_fleet(read_vehicle_jobs(arguments.trip_logs, arguments.directory), arguments.workers, arguments.slice_generations)
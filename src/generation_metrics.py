@@ -0,0 +1,116 @@
+import cProfile
+import json
+import os
+from contextlib import contextmanager
+from time import perf_counter, time
+from typing import Any, Iterator
+
+PYGAD_PHASE: str = "pygad" # time of a generation not spent in any timed phase, mostly pygad's selection, crossover and mutation
+
+class GenerationMetrics:
+    """
+    Times the phases of each generation and counts the fitness work done in it,
+    then appends one JSON record per generation to a metrics file.
+
+    A generation starts when the previous one ends, so the first record also includes scoring the initial population.
+    Generations can also be captured with cProfile, which only sees this process, not the fitness workers.
+    """
+    def __init__(self, metrics_file_path: str, profile_generations: tuple[int, ...] = tuple(), profile_directory: str = ""):
+        """
+        args:
+            metrics_file_path: str - JSONL file that records are appended to, "" to only keep the last record in memory
+            profile_generations: tuple[int, ...] - generations (as numbered by generations_completed) to profile
+            profile_directory: str - where the profiles are written, as generation_<number>.prof
+        """
+        self.__metrics_file_path: str = metrics_file_path
+        self.__profile_generations: frozenset[int] = frozenset(profile_generations)
+        self.__profile_directory: str = profile_directory
+        self.__profile: cProfile.Profile | None = None
+        self.__generation_start: float = perf_counter()
+        self.__phase_seconds: dict[str, float] = dict()
+        self.__chromosomes_requested: int = 0
+        self.__chromosomes_scored: int = 0
+        self.__trips_evaluated: int = 0
+        self.__trip_evaluations_saved: int = 0
+        self.__last_record: dict[str, Any] | None = None
+
+    @property
+    def last_record(self) -> dict[str, Any] | None:
+        return self.__last_record
+
+    def start_generation(self, generation: int):
+        """
+        starts timing the given generation, and profiling it if it is one of profile_generations
+        """
+        self.__generation_start = perf_counter()
+        self.__phase_seconds = dict()
+        self.__chromosomes_requested = 0
+        self.__chromosomes_scored = 0
+        self.__trips_evaluated = 0
+        self.__trip_evaluations_saved = 0
+        if generation in self.__profile_generations:
+            self.__profile = cProfile.Profile()
+            self.__profile.enable()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        adds the time spent in the with block to the phase with the given name, phases should not be nested
+        """
+        start: float = perf_counter()
+        try:
+            yield
+        finally:
+            self.__phase_seconds[name] = self.__phase_seconds.get(name, 0.0) + perf_counter() - start
+
+    def count_fitness_call(self, chromosomes_requested: int, chromosomes_scored: int, trips_per_chromosome: int, trip_evaluations_saved: int = 0):
+        """
+        args:
+            chromosomes_requested: int - chromosomes whose fitness was asked for
+            chromosomes_scored: int - chromosomes that were not in the fitness cache, so were scored
+            trips_per_chromosome: int - trips each scored chromosome was evaluated on
+            trip_evaluations_saved: int - trips that the scored chromosomes were not evaluated on, as racing evaluation stopped them early
+        """
+        self.__chromosomes_requested += chromosomes_requested
+        self.__chromosomes_scored += chromosomes_scored
+        self.__trips_evaluated += chromosomes_scored * trips_per_chromosome - trip_evaluations_saved
+        self.__trip_evaluations_saved += trip_evaluations_saved
+
+    def end_generation(self, generation: int) -> dict[str, Any]:
+        """
+        records the generation that just completed, writes it to the metrics file and starts timing the next generation
+        """
+        generation_seconds: float = perf_counter() - self.__generation_start
+        if self.__profile is not None:
+            self.__profile.disable()
+            os.makedirs(self.__profile_directory, exist_ok=True)
+            self.__profile.dump_stats(os.path.join(self.__profile_directory, "generation_{:d}.prof".format(generation)))
+            self.__profile = None
+        phase_seconds: dict[str, float] = dict(self.__phase_seconds)
+        phase_seconds[PYGAD_PHASE] = max(0.0, generation_seconds - sum(self.__phase_seconds.values()))
+        record: dict[str, Any] = {
+            "generation": generation,
+            "time": time(),
+            "seconds": generation_seconds,
+            "phase_seconds": phase_seconds,
+            "chromosomes_requested": self.__chromosomes_requested,
+            "chromosomes_scored": self.__chromosomes_scored,
+            "trips_evaluated": self.__trips_evaluated,
+            "trip_evaluations_saved": self.__trip_evaluations_saved
+        }
+        if self.__metrics_file_path != "":
+            with open(self.__metrics_file_path, "a") as file:
+                file.write(json.dumps(record) + "\n")
+        self.__last_record = record
+        self.start_generation(generation + 1)
+        return record
+
+    @staticmethod
+    def describe(record: dict[str, Any]) -> str:
+        phases: str = ", ".join("{} {:.2f}s".format(name, seconds) for name, seconds in sorted(record["phase_seconds"].items(), key=lambda item: -item[1]))
+        description: str = "{:.2f}s ({}), {:d} of {:d} chromosomes scored, {:d} trip evaluations".format(
+            record["seconds"], phases, record["chromosomes_scored"], record["chromosomes_requested"], record["trips_evaluated"]
+        )
+        if record.get("trip_evaluations_saved", 0) > 0:
+            description += " ({:d} saved by racing)".format(record["trip_evaluations_saved"])
+        return description
@@ -1,32 +1,37 @@
+import argparse
 import os
 
 import pygad
 
-from chromosome import Chromosome
+from chromosome import Chromosome, Population
 
 import config
 
 from time import time_ns
 
-from vehicle_trip import VehicleTrip
-from solver_solution import SolverSolution
+from population_evaluator import decode_population, predict_population, rank_disagreement
 from data_importer import DataImporter
-from display_solution import plot_solution
-import matplotlib.pyplot as plt
+from trip_table import TripTable
+from fitness_cache import FitnessCache
+from fitness_evaluator import FULL_DATASET, FitnessEvaluator
+from worker_pool import FitnessWorkerPool
+from checkpoint import Checkpoint, CheckpointWriter
+from exported_model import ExportedModel
+from figure_renderer import FigureRenderer
+from generation_metrics import GenerationMetrics
+import numpy
 
-from math import log2
-
-vehicle_trips: list[VehicleTrip] = DataImporter(config.DATA_FILE_PATH).vehicle_trips
+# only created by load_dataset and run_genetic_algorithm, so that importing this module (as spawned processes do) does not read the dataset
+data_importer: DataImporter | None = None
+fitness_evaluator: FitnessEvaluator | None = None
+fitness_worker_pool: FitnessWorkerPool | None = None # None when scoring in this process
+checkpoint_writer: CheckpointWriter | None = None
+figure_renderer: FigureRenderer | None = None
+generation_fitness_cutoff: float = -numpy.inf # racing cutoff that the fitness of the current generation was scored with
+generation_metrics: GenerationMetrics = GenerationMetrics("") # replaced by prepare_training with one that writes config.GA_METRICS_FILE
 start_time_ns: int = time_ns()
 NANOSECONDS_IN_ONE_HOUR = 3600000000000
 
-def check_figure_directory():
-    if not os.path.exists(config.SOLUTION_FIGURE_SAVE_DIRECTORY):
-        os.makedirs(config.SOLUTION_FIGURE_SAVE_DIRECTORY)
-    assert os.path.exists(config.SOLUTION_FIGURE_SAVE_DIRECTORY)
-    if not os.path.isdir(config.SOLUTION_FIGURE_SAVE_DIRECTORY):
-        raise Exception("Could not create the solution figure save directory as a file with the path name exists")
-
 def fitness(ga_instance: pygad.GA, chromosome: Chromosome, solution_idx: int) -> float:
     """test the given chromosome and return a fitness score to be maximized
 
@@ -38,76 +43,159 @@ def fitness(ga_instance: pygad.GA, chromosome: Chromosome, solution_idx: int) ->
     Returns:
         float: fitness score to be maximized
     """
-    chromosome_list: list[float] = list(chromosome) # type: ignore
-    solution_parameters: list[tuple[float, ...]] = list()
-    for _ in range(config.NUMBER_OF_VARIABLES):
-        solver_input_solution_genes: tuple[float, ...] = tuple([chromosome_list.pop() for _ in range(config.GENES_PER_VARIABLE)])
-        solution_parameters.append(solver_input_solution_genes)
-    assert len(chromosome_list) == 0
-    solver_solution: SolverSolution = SolverSolution(tuple(solution_parameters))
+    return fitness_batch(ga_instance, numpy.asarray(chromosome)[numpy.newaxis, :], [solution_idx])[0]
 
-    fitness_scores: list[float] = list()
-    differences_m_per_l: list[float] = list()
+def fitness_batch(ga_instance: pygad.GA, chromosomes: Population, solution_indices: list[int]) -> list[float]:
+    """test a batch of chromosomes at once and return their fitness scores to be maximized,
+    used by pygad when fitness_batch_size is set
 
-    for vehicle_trip in vehicle_trips:
-        estimated_fuel_efficiency_m_per_l: float = solver_solution.f(vehicle_trip)
-        fitness: float = solver_solution.fitness(vehicle_trip)
-        fitness_scores.append(fitness)
-        difference_m_per_l: float = abs(vehicle_trip.fuel_efficiency_m_per_l - estimated_fuel_efficiency_m_per_l)
-        differences_m_per_l.append(difference_m_per_l)
+    Args:
+        ga_instance (pygad.GA): pygad.GA instance
+        chromosomes (Population): chromosomes to test, one per row
+        solution_indices (list[int]): the solution indices from the ga_instance
 
-    #average_fitness: float = sum(fitness_scores)/len(fitness_scores)
-    average_difference_m_per_l: float = sum(differences_m_per_l)/len(differences_m_per_l)
-    average_fitness: float = log2(1 / average_difference_m_per_l)
+    Returns:
+        list[float]: fitness score of each chromosome, to be maximized
+    """
+    global generation_fitness_cutoff
+    assert len(chromosomes) == len(solution_indices)
+    with generation_metrics.phase("fitness"):
+        trip_chunk_index: int = current_trip_chunk_index(ga_instance)
+        generation_fitness_cutoff = racing_fitness_cutoff(ga_instance, trip_chunk_index)
+        return evaluate_chromosomes(chromosomes, trip_chunk_index, generation_fitness_cutoff)
 
-    fitness_scores.sort()
-    #median_fitness: float = fitness_scores[int(len(fitness_scores)/2)]
-    differences_m_per_l.sort()
-    median_difference_m_per_l: float = differences_m_per_l[int(len(differences_m_per_l)/2)]
-    median_fitness: float = log2(1 / median_difference_m_per_l)
+def current_trip_chunk_index(ga_instance: pygad.GA) -> int:
+    """the trip chunk that the current generation is scored on, or FULL_DATASET if the dataset is not split into chunks
+    """
+    assert fitness_evaluator is not None
+    return fitness_evaluator.trip_chunk_index(ga_instance.generations_completed)
 
-    return average_fitness
+def racing_fitness_cutoff(ga_instance: pygad.GA, trip_chunk_index: int) -> float:
+    """the fitness a chromosome needed to be selected as a parent in the last generation,
+    below which its racing evaluation is stopped (see FitnessEvaluator.score),
+    -inf when not racing or when the last generation was scored on other trips
+    """
+    assert fitness_evaluator is not None
+    last_generation_fitness: numpy.ndarray | None = ga_instance.last_generation_fitness # type: ignore
+    if (
+        not config.GA_RACING_EVALUATION
+        or last_generation_fitness is None
+        or ga_instance.generations_completed == 0
+        or fitness_evaluator.trip_chunk_index(ga_instance.generations_completed - 1) != trip_chunk_index
+    ):
+        return -numpy.inf
+    finite_fitness: numpy.ndarray = last_generation_fitness[numpy.isfinite(last_generation_fitness)]
+    if len(finite_fitness) < ga_instance.num_parents_mating:
+        return -numpy.inf
+    return float(numpy.sort(finite_fitness)[-ga_instance.num_parents_mating])
 
-def on_generation(ga_instance: pygad.GA):
-    ga_instance.save(config.GA_MODEL_FILE)
-    generations_per_hour: float = ga_instance.generations_completed / ((time_ns() - start_time_ns) / NANOSECONDS_IN_ONE_HOUR)
-    print("Generation {:d} completed ({:.2f} generations / hour)".format(ga_instance.generations_completed, generations_per_hour))
-    print("Fitness of best solution: {:.2f}".format(ga_instance.best_solution(ga_instance.last_generation_fitness)[1]))
-
-    best_chromosome: Chromosome = ga_instance.last_generation_elitism # type: ignore
-    assert best_chromosome is not None
-    best_chromosome_list: list[float] = best_chromosome.tolist()[0]
-    solver_solution = SolverSolution((
-        tuple(best_chromosome_list[0:config.GENES_PER_VARIABLE]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE:config.GENES_PER_VARIABLE*2]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*2:config.GENES_PER_VARIABLE*3]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*3:config.GENES_PER_VARIABLE*4]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*4:config.GENES_PER_VARIABLE*5]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*5:config.GENES_PER_VARIABLE*6]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*6:config.GENES_PER_VARIABLE*7]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*7:config.GENES_PER_VARIABLE*8]),
-        tuple(best_chromosome_list[config.GENES_PER_VARIABLE*8:config.GENES_PER_VARIABLE*9])
-    )) # type: ignore
-    fitness_scores: list[float] = list()
-    for vehicle_trip in vehicle_trips:
-        fitness: float = solver_solution.difference_in_l_per_hundred_km(vehicle_trip)
-        fitness_scores.append(fitness)
-    average_fitness: float = sum(fitness_scores)/len(fitness_scores)
-    print("Average difference in L/100Km of best solution {:.2f}".format(average_fitness))
-    plot_solution(ga_instance)
-    check_figure_directory()
-    figure_save_path: str = os.path.join(config.SOLUTION_FIGURE_SAVE_DIRECTORY, "{}{:08d}.png".format(config.SOLUTION_FIGURE_SAVE_NAME_PREFIX, ga_instance.generations_completed-1))
-    if os.path.exists(figure_save_path):
-        print("figures existed in solution figure folder, overwriting...")
-        os.remove(figure_save_path)
-    plt.savefig(figure_save_path, dpi=config.SOLUTION_FIGURE_RESOLUTION_DPI)
-    plt.close("all")
+def evaluate_chromosomes(chromosomes: Population, trip_chunk_index: int, fitness_cutoff: float = -numpy.inf) -> list[float]:
+    """fitness scores of the chromosomes over the trips of the given trip chunk (or every trip for FULL_DATASET),
+    chromosomes that cannot reach fitness_cutoff may only get a bound below it, see FitnessEvaluator.score
+    """
+    assert fitness_evaluator is not None and fitness_evaluator.fitness_cache is not None
+    misses: int = fitness_evaluator.fitness_cache.misses
+    trip_evaluations_saved: int = fitness_evaluator.trip_evaluations_saved
+    if fitness_worker_pool is not None:
+        fitness_scores: list[float] = fitness_worker_pool.evaluate(chromosomes, trip_chunk_index, fitness_cutoff)
+    else:
+        fitness_scores: list[float] = fitness_evaluator.evaluate(chromosomes, trip_chunk_index, fitness_cutoff)
+    generation_metrics.count_fitness_call(
+        len(chromosomes),
+        fitness_evaluator.fitness_cache.misses - misses,
+        len(fitness_evaluator.evaluation_trip_table(trip_chunk_index)),
+        fitness_evaluator.trip_evaluations_saved - trip_evaluations_saved
+    )
+    return fitness_scores
+
+def load_dataset() -> FitnessEvaluator:
+    """imports the trips of config.DATA_FILE_PATH, once, and returns the evaluator that scores chromosomes against them
+    """
+    global data_importer, fitness_evaluator
+    if fitness_evaluator is None:
+        data_importer = DataImporter(config.DATA_FILE_PATH)
+        fitness_evaluator = FitnessEvaluator(data_importer.trip_table, data_importer.file_date_modified, FitnessCache(config.GA_FITNESS_CACHE_SIZE))
+    return fitness_evaluator
 
+def on_generation(ga_instance: pygad.GA):
+    report_generation(ga_instance)
     if check_stop_flag():
         print("Detected change in stop flag file, ending")
-        ga_instance.plot_fitness()
+        save_checkpoint(ga_instance)
+        export_model(ga_instance)
+        stop_helper_processes()
+        plot_fitness(ga_instance)
         exit(1)
 
+def report_generation(ga_instance: pygad.GA):
+    """prints the progress of the generation that just completed, and hands it to the checkpoint writer and the figure renderer
+    """
+    assert fitness_evaluator is not None and fitness_evaluator.fitness_cache is not None
+    trip_table: TripTable = fitness_evaluator.trip_table
+    generations_per_hour: float = ga_instance.generations_completed / ((time_ns() - start_time_ns) / NANOSECONDS_IN_ONE_HOUR)
+    print("Generation {:d} completed ({:.2f} generations / hour)".format(ga_instance.generations_completed, generations_per_hour))
+    trip_chunk_index: int = current_trip_chunk_index(ga_instance)
+    if trip_chunk_index != FULL_DATASET and ga_instance.last_generation_elitism is not None:
+        # pygad carries the elites' fitness over from the previous generation, which was scored on a different trip chunk
+        number_of_elites: int = len(ga_instance.last_generation_elitism)
+        with generation_metrics.phase("elite_rescoring"):
+            ga_instance.last_generation_fitness[:number_of_elites] = evaluate_chromosomes(ga_instance.population[:number_of_elites], trip_chunk_index) # type: ignore
+    if fitness_evaluator.reduced_precision and ga_instance.generations_completed % config.GA_FLOAT32_CHECK_INTERVAL_GENERATIONS == 0:
+        with generation_metrics.phase("precision_check"):
+            check_reduced_precision(ga_instance, trip_chunk_index)
+    best_fitness: float = float(ga_instance.best_solution(ga_instance.last_generation_fitness)[1])
+    print("Fitness of best solution: {:.2f} ({})".format(best_fitness, fitness_evaluator.describe_evaluation(trip_chunk_index)))
+    if trip_chunk_index != FULL_DATASET and ga_instance.generations_completed % config.GA_FULL_EVALUATION_INTERVAL == 0:
+        elitism: Population = ga_instance.last_generation_elitism # type: ignore
+        assert elitism is not None
+        with generation_metrics.phase("full_evaluation"):
+            elitism_full_fitness: list[float] = evaluate_chromosomes(elitism, FULL_DATASET)
+        print("Fitness of best elite solution: {:.2f} ({})".format(max(elitism_full_fitness), fitness_evaluator.describe_evaluation(FULL_DATASET)))
+    print("Fitness cache: {}".format(fitness_evaluator.fitness_cache))
+    if config.GA_RACING_EVALUATION:
+        print("Racing evaluation: {:d} chromosomes pruned, {:d} trip evaluations saved".format(fitness_evaluator.pruned_chromosomes, fitness_evaluator.trip_evaluations_saved))
+    if fitness_evaluator.contribution_cache(trip_chunk_index) is not None:
+        print("Contribution cache ({}): {}".format(fitness_evaluator.describe_evaluation(trip_chunk_index), fitness_evaluator.contribution_cache(trip_chunk_index)))
+    if checkpoint_writer is not None:
+        with generation_metrics.phase("checkpoint"):
+            checkpoint_writer.save_if_due(ga_instance, generation_fitness_cutoff, fitness_evaluator.dataset_version, trip_chunk_index, len(trip_table), fitness_evaluator.trips_checksum)
+
+    elitism: Population = ga_instance.last_generation_elitism # type: ignore
+    assert elitism is not None
+    best_chromosome: Chromosome = elitism[0]
+    with generation_metrics.phase("difference"):
+        estimated_fuel_efficiency_m_per_l: numpy.ndarray = predict_population(decode_population(elitism[0:1]), trip_table.features)[0]
+        with numpy.errstate(divide="ignore"):
+            differences_l_per_hundred_km: numpy.ndarray = numpy.abs(trip_table.fuel_efficiency_l_per_hundred_km - 100000/estimated_fuel_efficiency_m_per_l)
+        average_difference_l_per_hundred_km: float = float(differences_l_per_hundred_km.mean())
+    print("Average difference in L/100Km of best solution {:.2f}".format(average_difference_l_per_hundred_km))
+    if figure_renderer is not None:
+        with generation_metrics.phase("figure"):
+            figure_renderer.submit(ga_instance.generations_completed-1, best_chromosome, best_fitness)
+    print("Generation time: {}".format(GenerationMetrics.describe(generation_metrics.end_generation(ga_instance.generations_completed))))
+
+def check_reduced_precision(ga_instance: pygad.GA, trip_chunk_index: int):
+    """re-scores the best chromosomes of the generation in float64 and prints how far their float32 fitness drifted,
+    when more than config.GA_FLOAT32_MAXIMUM_RANK_DISAGREEMENT of their pairs are ranked differently,
+    the rest of the run is scored in float64, starting with this generation
+    """
+    global generation_fitness_cutoff
+    assert fitness_evaluator is not None
+    population: Population = ga_instance.population # type: ignore
+    population_fitness: numpy.ndarray = numpy.asarray(ga_instance.last_generation_fitness, dtype=numpy.float64)
+    best_indices: numpy.ndarray = numpy.argsort(numpy.nan_to_num(population_fitness, nan=-numpy.inf), kind="stable")[::-1][:ga_instance.num_parents_mating]
+    fitness_scores: numpy.ndarray = population_fitness[best_indices]
+    reference_fitness_scores: numpy.ndarray = fitness_evaluator.reference_fitness(population[best_indices], trip_chunk_index)
+    finite: numpy.ndarray = numpy.isfinite(fitness_scores) & numpy.isfinite(reference_fitness_scores)
+    drift: float = float(numpy.abs(fitness_scores[finite] - reference_fitness_scores[finite]).max()) if numpy.any(finite) else 0.0
+    disagreement: float = rank_disagreement(fitness_scores, reference_fitness_scores)
+    print("Float32 evaluation: fitness of the {:d} best solutions off by at most {:.2g}, {:.1%} of their pairs ranked differently than in float64".format(len(best_indices), drift, disagreement))
+    if disagreement > config.GA_FLOAT32_MAXIMUM_RANK_DISAGREEMENT:
+        print("Float32 evaluation ranks solutions too differently, scoring in float64 from now on")
+        fitness_evaluator.use_full_precision()
+        ga_instance.last_generation_fitness = numpy.array(evaluate_chromosomes(population, trip_chunk_index))
+        generation_fitness_cutoff = -numpy.inf
+
 def create_stop_flag_file():
     """creates the flag file or empties it if it exists
     this file can be used to safely stop the genetic learner once the current generation completes,
@@ -128,44 +216,163 @@ def check_stop_flag() -> bool:
         return True
     return False
 
-def run_genetic_algorithm():
-    create_stop_flag_file()
+def save_checkpoint(ga_instance: pygad.GA):
+    """writes a checkpoint of the current generation and waits until it is on disk
+    """
+    if checkpoint_writer is None or fitness_evaluator is None:
+        return
+    checkpoint_writer.save(Checkpoint.from_ga_instance(
+        ga_instance,
+        generation_fitness_cutoff,
+        fitness_evaluator.dataset_version,
+        current_trip_chunk_index(ga_instance),
+        len(fitness_evaluator.trip_table),
+        fitness_evaluator.trips_checksum
+    ))
+    checkpoint_writer.flush()
+
+def export_model(ga_instance: pygad.GA):
+    """writes the best solution of the current generation to config.GA_EXPORT_FILE, with its fitness over every trip
+    """
+    if config.GA_EXPORT_FILE == "" or fitness_evaluator is None:
+        return
+    best_chromosome: Chromosome = numpy.asarray(ga_instance.best_solution(ga_instance.last_generation_fitness)[0], dtype=numpy.float64)
+    best_fitness: float = evaluate_chromosomes(best_chromosome[numpy.newaxis, :], FULL_DATASET)[0]
+    ExportedModel.from_chromosome(best_chromosome, best_fitness, len(fitness_evaluator.trip_table), ga_instance.generations_completed).save(config.GA_EXPORT_FILE)
+
+def stop_helper_processes():
+    """stops the figure renderer and the fitness workers, once they are done with their current work
+    """
+    global fitness_worker_pool
+    if figure_renderer is not None:
+        figure_renderer.close()
+    if fitness_worker_pool is not None:
+        fitness_worker_pool.close()
+        fitness_worker_pool = None
+
+def plot_fitness(ga_instance: pygad.GA):
+    """shows the best fitness of every generation, unless config.HEADLESS
+    """
+    if not config.HEADLESS:
+        ga_instance.plot_fitness()
+
+def pygad_fitness_batch_size(population_size: int) -> int:
+    """the worker pool splits pygad's batches itself, so it is handed the whole population at once,
+    pygad refuses a batch size over the population size, e.g. for a small island or vehicle population
+    """
+    assert population_size > 0
+    if fitness_worker_pool is not None:
+        return population_size
+    return min(config.GA_FITNESS_BATCH_SIZE, population_size)
+
+def create_ga_instance(initial_population: Population | None = None) -> pygad.GA:
+    return pygad.GA(
+        num_generations=config.GA_GENERATION_GOAL,
+        num_parents_mating=config.GA_NUMBER_OF_PARENTS,
+        fitness_func=fitness_batch,
+        fitness_batch_size=pygad_fitness_batch_size(config.GA_POPULATION_SIZE if initial_population is None else len(initial_population)),
+        initial_population=initial_population,
+        sol_per_pop=config.GA_POPULATION_SIZE,
+        num_genes=config.GA_CHROMOSOME_LENGTH,
+        on_generation=on_generation,
+        mutation_num_genes=config.GA_NUMBER_OF_GENES_TO_MUTATE,
+        gene_type=float,
+        gene_space={"low": 0, "high": 1},
+        parallel_processing=None # scoring is spread over fitness_worker_pool instead, which outlives each generation
+    )
+
+def warm_start(ga_instance: pygad.GA, checkpoint: Checkpoint):
+    """prepares to continue from a checkpoint of an older version of the dataset:
+    if the trips it was scored on are unchanged, only the trips added since are evaluated to re-score the chromosomes of its population
+    whose fitness is exact (not a racing bound),
+    and the run is limited to config.GA_RETRAINING_GENERATIONS more generations
+    """
+    assert fitness_evaluator is not None
+    trip_table: TripTable = fitness_evaluator.trip_table
+    if config.GA_RETRAINING_GENERATIONS > 0:
+        ga_instance.num_generations = config.GA_RETRAINING_GENERATIONS
+    if (
+        checkpoint.trip_chunk_index == FULL_DATASET
+        and 0 < checkpoint.number_of_trips <= len(trip_table)
+        and trip_table.checksum(checkpoint.number_of_trips) == checkpoint.trips_checksum
+    ):
+        print("Dataset has {:d} new trips since checkpoint, re-scoring population on them".format(len(trip_table) - checkpoint.number_of_trips))
+        exact_fitness: numpy.ndarray = checkpoint.exact_fitness
+        fitness_evaluator.extend_fitness(checkpoint.population[exact_fitness], checkpoint.fitness[exact_fitness], checkpoint.number_of_trips)
+    else:
+        # e.g. trips were changed or removed, or the population was scored on a trip chunk, whose trips change with the dataset
+        print("Dataset changed since checkpoint, re-scoring population on every trip")
+
+def prepare_training(render_figures: bool) -> pygad.GA:
+    """loads the dataset, starts the helper processes and returns the GA instance to run,
+    continued from config.GA_CHECKPOINT_FILE (or the pygad pickle of older runs) when there is one
+    """
+    global checkpoint_writer, figure_renderer, fitness_worker_pool, generation_metrics
+    load_dataset()
+    assert fitness_evaluator is not None and fitness_evaluator.fitness_cache is not None
+    if config.GA_NUMBER_OF_THREADS > 1:
+        fitness_worker_pool = FitnessWorkerPool(fitness_evaluator, config.GA_NUMBER_OF_THREADS, config.GA_FITNESS_BATCH_SIZE)
+    checkpoint_writer = CheckpointWriter(config.GA_CHECKPOINT_FILE, config.GA_CHECKPOINT_INTERVAL_GENERATIONS, config.GA_CHECKPOINT_INTERVAL_SECONDS)
+    if render_figures and not config.HEADLESS:
+        figure_renderer = FigureRenderer(config.SOLUTION_FIGURE_INTERVAL_GENERATIONS, config.SOLUTION_FIGURE_ONLY_ON_IMPROVEMENT)
     if (
+        os.path.exists(config.GA_CHECKPOINT_FILE)
+        and os.path.isfile(config.GA_CHECKPOINT_FILE)
+    ):
+        print("Continuing training from checkpoint")
+        checkpoint: Checkpoint = Checkpoint.load(config.GA_CHECKPOINT_FILE)
+        ga_instance: pygad.GA = create_ga_instance(checkpoint.population)
+        ga_instance.generations_completed = checkpoint.generations_completed
+        checkpoint.restore_random_state()
+        if checkpoint.dataset_version == fitness_evaluator.dataset_version:
+            # the first generation would otherwise re-score the whole population, except for the chromosomes whose fitness is a racing bound
+            exact_fitness: numpy.ndarray = checkpoint.exact_fitness
+            fitness_evaluator.remember(checkpoint.population[exact_fitness], checkpoint.fitness[exact_fitness].tolist(), checkpoint.trip_chunk_index) # type: ignore
+        else:
+            warm_start(ga_instance, checkpoint)
+        print("Checkpoint of generation {:d} loaded from file".format(checkpoint.generations_completed))
+    elif (
         os.path.exists(config.GA_MODEL_FILE+".pkl")
         and os.path.isfile(config.GA_MODEL_FILE+".pkl")
     ):
         print("Continuing training from saved state")
         ga_instance: pygad.GA = pygad.load(config.GA_MODEL_FILE)
         # reset functions to prevent pickling error
-        ga_instance.fitness_func = fitness
+        ga_instance.fitness_func = fitness_batch
+        ga_instance.fitness_batch_size = pygad_fitness_batch_size(ga_instance.sol_per_pop)
+        ga_instance.parallel_processing = None
         ga_instance.on_generation = on_generation
         print("Saved state loaded from file")
     else:
         print("Save file not found,\nRestarting training from scratch")
-        ga_instance: pygad.GA = pygad.GA(
-            num_generations=config.GA_GENERATION_GOAL,
-            num_parents_mating=config.GA_NUMBER_OF_PARENTS,
-            fitness_func=fitness,
-            sol_per_pop=config.GA_POPULATION_SIZE,
-            num_genes=config.GA_CHROMOSOME_LENGTH,
-            on_generation=on_generation,
-            mutation_num_genes=config.GA_NUMBER_OF_GENES_TO_MUTATE,
-            gene_type=float,
-            gene_space={"low": 0, "high": 1},
-            parallel_processing=["process", config.GA_NUMBER_OF_THREADS] if config.GA_NUMBER_OF_THREADS > 1 else None
-        )
+        ga_instance: pygad.GA = create_ga_instance()
+    generation_metrics = GenerationMetrics(config.GA_METRICS_FILE, config.GA_PROFILE_GENERATIONS, config.GA_PROFILE_DIRECTORY)
+    generation_metrics.start_generation(ga_instance.generations_completed + 1)
+    return ga_instance
 
+def run_genetic_algorithm():
+    create_stop_flag_file()
+    ga_instance: pygad.GA = prepare_training(render_figures=True)
     ga_instance.run()
 
     solution, solution_fitness, solution_idx = ga_instance.best_solution(ga_instance.last_generation_fitness)
     print(f"Parameters of the best solution : {solution}")
     print(f"Fitness value of the best solution = {solution_fitness}")
     print(f"Index of the best solution : {solution_idx}")
-    ga_instance.save(config.GA_MODEL_FILE)
-    ga_instance.plot_fitness()
+    save_checkpoint(ga_instance)
+    export_model(ga_instance)
+    stop_helper_processes()
+    plot_fitness(ga_instance)
 
 
 if __name__ == "__main__":
-    run_genetic_algorithm()
-
-# TODO: split dataset into chunks, train 
+    parser = argparse.ArgumentParser(description="Trains the fuel efficiency equation on config.DATA_FILE_PATH")
+    parser.add_argument("--headless", action="store_true", help="never draw figures, see config.HEADLESS")
+    arguments = parser.parse_args()
+    if arguments.headless:
+        config.HEADLESS = True
+    if config.GA_NUMBER_OF_ISLANDS > 1:
+        from island_model import run_island_model
+        run_island_model()
+    else:
+        run_genetic_algorithm()
@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+from multiprocessing.context import SpawnProcess
+from multiprocessing.queues import Queue
+from typing import Any
+
+import numpy
+import pygad
+
+import config
+import genetic_learner
+from checkpoint import Checkpoint
+from exported_model import ExportedModel
+from chromosome import Population
+from fitness_evaluator import FULL_DATASET, FitnessEvaluator
+from worker_pool import config_values
+
+MIGRATION_SETTINGS: tuple[str, ...] = ("GA_NUMBER_OF_ISLANDS", "GA_MIGRATION_INTERVAL_GENERATIONS", "GA_NUMBER_OF_MIGRANTS")
+
+# state of an island process, set by run_island
+island_index: int = -1
+island_inbox: Queue | None = None # migrants from the previous island
+island_outbox: Queue | None = None # migrants to the next island
+
+def island_file(file_path: str, index: int) -> str:
+    """
+    file of one island, next to the given file of a single population
+    """
+    root, extension = os.path.splitext(file_path)
+    return "{}.island{:d}{}".format(root, index, extension)
+
+def island_checkpoint_file(index: int) -> str:
+    return island_file(config.GA_CHECKPOINT_FILE, index)
+
+def island_configuration(index: int) -> dict[str, Any]:
+    """
+    the settings of config, with the overrides of config.GA_ISLAND_CONFIG for this island
+    """
+    configuration: dict[str, Any] = config_values()
+    if index < len(config.GA_ISLAND_CONFIG):
+        overrides: dict[str, object] = config.GA_ISLAND_CONFIG[index]
+        assert all(name not in overrides for name in MIGRATION_SETTINGS), "every island has to migrate at the same generations"
+        configuration.update(overrides)
+    configuration["GA_CHECKPOINT_FILE"] = island_checkpoint_file(index)
+    configuration["GA_EXPORT_FILE"] = "" # only the best island is exported, by run_island_model
+    if configuration["GA_METRICS_FILE"] != "":
+        configuration["GA_METRICS_FILE"] = island_file(configuration["GA_METRICS_FILE"], index)
+    configuration["GA_PROFILE_DIRECTORY"] = os.path.join(configuration["GA_PROFILE_DIRECTORY"], "island{:d}".format(index))
+    return configuration
+
+def exchange_migrants(ga_instance: pygad.GA, inbox: Queue, outbox: Queue) -> bool:
+    """
+    sends the best solutions of this island to the next island, and replaces the worst solutions of this island
+    (never its elites) with the best solutions of the previous island
+
+    returns:
+        False if the previous island has stopped
+    """
+    population: Population = ga_instance.population # type: ignore
+    fitness_scores: numpy.ndarray = ga_instance.last_generation_fitness # type: ignore
+    ranking: numpy.ndarray = numpy.argsort(fitness_scores, kind="stable")
+    outbox.put(population[ranking[::-1][:config.GA_NUMBER_OF_MIGRANTS]].copy())
+    migrants: Population | None = inbox.get()
+    if migrants is None:
+        return False
+    replaced_indices: numpy.ndarray = ranking[ranking >= ga_instance.keep_elitism][:len(migrants)]
+    migrants = migrants[:len(replaced_indices)]
+    population[replaced_indices] = migrants
+    fitness_scores[replaced_indices] = genetic_learner.evaluate_chromosomes(migrants, genetic_learner.current_trip_chunk_index(ga_instance))
+    return True
+
+def on_island_generation(ga_instance: pygad.GA) -> str | None:
+    assert island_inbox is not None and island_outbox is not None
+    genetic_learner.report_generation(ga_instance)
+    if ga_instance.generations_completed % config.GA_MIGRATION_INTERVAL_GENERATIONS == 0:
+        if not exchange_migrants(ga_instance, island_inbox, island_outbox):
+            print("Island {:d}: previous island stopped, ending".format(island_index))
+            return "stop"
+        print("Island {:d}: exchanged {:d} migrants".format(island_index, config.GA_NUMBER_OF_MIGRANTS))
+    if genetic_learner.check_stop_flag():
+        print("Island {:d}: detected change in stop flag file, ending".format(island_index))
+        return "stop"
+    return None
+
+def run_island(index: int, inbox: Queue, outbox: Queue, configuration: dict[str, Any]):
+    """
+    evolves one island's population in this process, until it reaches the generation goal,
+    the stop flag file changes or the previous island stops
+    """
+    global island_index, island_inbox, island_outbox
+    island_index, island_inbox, island_outbox = index, inbox, outbox
+    for name, value in configuration.items():
+        setattr(config, name, value)
+    # an island that stops cannot read its inbox any more, do not wait for it to do so when exiting
+    outbox.cancel_join_thread()
+    # a single renderer is enough to follow the progress
+    ga_instance: pygad.GA = genetic_learner.prepare_training(render_figures=index == 0)
+    ga_instance.on_generation = on_island_generation
+    try:
+        ga_instance.run()
+        genetic_learner.save_checkpoint(ga_instance)
+    finally:
+        genetic_learner.stop_helper_processes()
+        # let the next island stop too, instead of waiting for migrants that will never come
+        outbox.put(None)
+
+def run_island_model():
+    """
+    evolves config.GA_NUMBER_OF_ISLANDS populations in separate processes, arranged in a ring along which the best solutions migrate,
+    then keeps the checkpoint of the island whose best solution fits every trip best as config.GA_CHECKPOINT_FILE
+    """
+    assert config.GA_NUMBER_OF_ISLANDS > 1
+    assert 0 < config.GA_NUMBER_OF_MIGRANTS < config.GA_POPULATION_SIZE
+    genetic_learner.create_stop_flag_file()
+    context = multiprocessing.get_context("spawn")
+    inboxes: list[Queue] = [context.Queue() for _ in range(config.GA_NUMBER_OF_ISLANDS)]
+    islands: list[SpawnProcess] = [
+        context.Process(
+            target=run_island,
+            args=(index, inboxes[index], inboxes[(index + 1) % config.GA_NUMBER_OF_ISLANDS], island_configuration(index)),
+            name="island-{:d}".format(index)
+        )
+        for index in range(config.GA_NUMBER_OF_ISLANDS)
+    ]
+    for island in islands:
+        island.start()
+    for island in islands:
+        island.join()
+
+    fitness_evaluator: FitnessEvaluator = genetic_learner.load_dataset()
+    best_checkpoint: Checkpoint | None = None
+    best_fitness: float = -numpy.inf
+    for index in range(config.GA_NUMBER_OF_ISLANDS):
+        if not os.path.isfile(island_checkpoint_file(index)):
+            print("Island {:d} did not write a checkpoint".format(index))
+            continue
+        checkpoint: Checkpoint = Checkpoint.load(island_checkpoint_file(index))
+        fitness: float = fitness_evaluator.evaluate(checkpoint.best_chromosome[numpy.newaxis, :], FULL_DATASET)[0]
+        print("Island {:d}: fitness of best solution {:.2f} after {:d} generations".format(index, fitness, checkpoint.generations_completed))
+        if fitness > best_fitness:
+            best_checkpoint, best_fitness = checkpoint, fitness
+    if best_checkpoint is not None:
+        best_checkpoint.save(config.GA_CHECKPOINT_FILE)
+        if config.GA_EXPORT_FILE != "":
+            ExportedModel.from_chromosome(best_checkpoint.best_chromosome, best_fitness, len(fitness_evaluator.trip_table), best_checkpoint.generations_completed).save(config.GA_EXPORT_FILE)
+        print(f"Fitness value of the best solution = {best_fitness}")
@@ -0,0 +1,219 @@
+import numpy
+
+import config
+from chromosome import Population, population_genes
+from solver_input_solution import (
+    BASIS_SIZE,
+    basis_weights,
+    decode_solution_parameters,
+    evaluate_elementwise_terms,
+    evaluate_solution_parameters,
+    solution_basis
+)
+
+def decode_population(population: Population) -> numpy.ndarray:
+    """
+    decodes the parameters of every SolverInputSolution of every chromosome in the population
+
+    returns:
+        numpy.ndarray - shape (population size, NUMBER_OF_VARIABLES, GENES_PER_VARIABLE / 2)
+    """
+    return decode_solution_parameters(population_genes(population))
+
+def predict_population(coefficients: numpy.ndarray, features: numpy.ndarray) -> numpy.ndarray:
+    """
+    estimates the fuel efficiency (m/L) of every trip for every decoded chromosome,
+    equivalent to calling SolverSolution.f for each pair
+
+    args:
+        coefficients: numpy.ndarray - shape (population size, NUMBER_OF_VARIABLES, GENES_PER_VARIABLE / 2), see decode_population
+        features: numpy.ndarray - shape (number of trips, NUMBER_OF_VARIABLES), normalized inputs in SolverSolution.f order
+
+    returns:
+        numpy.ndarray - shape (population size, number of trips)
+    """
+    assert coefficients.shape[1] == config.NUMBER_OF_VARIABLES
+    assert features.shape[1] == config.NUMBER_OF_VARIABLES
+    predictions: numpy.ndarray = numpy.zeros((coefficients.shape[0], features.shape[0]), dtype=numpy.result_type(coefficients, features))
+    for variable_index in range(config.NUMBER_OF_VARIABLES):
+        predictions += evaluate_solution_parameters(coefficients[:, numpy.newaxis, variable_index, :], features[:, variable_index])
+    return predictions
+
+class TripBasis:
+    """
+    The features of a set of trips, with the terms of SolverInputSolution.f that only depend on them (see solution_basis)
+    computed once, as they do not change between chromosomes or generations.
+
+    The polynomial and logarithm terms of every variable of a whole population are then a single matrix product
+    of their basis_weights and the basis, only the other terms are evaluated for every pair of chromosome and trip.
+    The basis takes NUMBER_OF_VARIABLES * BASIS_SIZE floats per trip, without it (expanded False)
+    every term is evaluated for every pair like predict_population does.
+
+    With dtype float32 the features, the basis and the coefficients they are evaluated with are float32,
+    which halves the memory they take and move, at the cost of about 7 significant digits in every prediction.
+    """
+    def __init__(self, features: numpy.ndarray, expanded: bool = True, dtype: type = numpy.float64):
+        """
+        args:
+            features: numpy.ndarray - shape (number of trips, NUMBER_OF_VARIABLES), see TripTable.features
+            dtype: type - numpy.float64 or numpy.float32, what the trips are evaluated in
+        """
+        assert features.shape[1] == config.NUMBER_OF_VARIABLES
+        assert dtype in (numpy.float64, numpy.float32)
+        self.__features: numpy.ndarray = features.astype(dtype, copy=False)
+        self.__basis: numpy.ndarray | None = None
+        if expanded:
+            # shape (NUMBER_OF_VARIABLES * BASIS_SIZE, number of trips), in the order of basis_weights(coefficients).reshape(population size, -1)
+            self.__basis = numpy.concatenate([solution_basis(self.__features[:, variable_index]) for variable_index in range(config.NUMBER_OF_VARIABLES)])
+
+    @property
+    def features(self) -> numpy.ndarray:
+        return self.__features
+
+    @property
+    def expanded(self) -> bool:
+        return self.__basis is not None
+
+    @property
+    def dtype(self) -> numpy.dtype:
+        return self.__features.dtype
+
+    def __len__(self) -> int:
+        return self.__features.shape[0]
+
+    def predict_population(self, coefficients: numpy.ndarray, trips: slice = slice(None)) -> numpy.ndarray:
+        """
+        same as predict_population over the features of the given trips, up to rounding
+
+        args:
+            coefficients: numpy.ndarray - shape (population size, NUMBER_OF_VARIABLES, GENES_PER_VARIABLE / 2), see decode_population
+
+        returns:
+            numpy.ndarray - shape (population size, number of trips)
+        """
+        assert coefficients.shape[1] == config.NUMBER_OF_VARIABLES
+        coefficients = coefficients.astype(self.__features.dtype, copy=False)
+        if self.__basis is None:
+            return predict_population(coefficients, self.__features[trips])
+        with numpy.errstate(all="ignore"):
+            predictions: numpy.ndarray = basis_weights(coefficients).reshape(coefficients.shape[0], config.NUMBER_OF_VARIABLES * BASIS_SIZE) @ self.__basis[:, trips]
+        for variable_index in range(config.NUMBER_OF_VARIABLES):
+            predictions += evaluate_elementwise_terms(coefficients[:, numpy.newaxis, variable_index, :], self.__features[trips, variable_index])
+        return predictions
+
+    def variable_contributions(self, coefficients: numpy.ndarray, variable_index: int) -> numpy.ndarray:
+        """
+        what the SolverInputSolution of one variable contributes to the estimate of every trip, for every decoded solution
+
+        args:
+            coefficients: numpy.ndarray - shape (number of solutions, GENES_PER_VARIABLE / 2), see decode_solution_parameters
+
+        returns:
+            numpy.ndarray - shape (number of solutions, number of trips)
+        """
+        coefficients = coefficients.astype(self.__features.dtype, copy=False)
+        if self.__basis is None:
+            return evaluate_solution_parameters(coefficients[:, numpy.newaxis, :], self.__features[:, variable_index])
+        with numpy.errstate(all="ignore"):
+            contributions: numpy.ndarray = basis_weights(coefficients) @ self.__basis[variable_index * BASIS_SIZE:(variable_index + 1) * BASIS_SIZE]
+        return contributions + evaluate_elementwise_terms(coefficients[:, numpy.newaxis, :], self.__features[:, variable_index])
+
+def fitness_from_predictions(predictions: numpy.ndarray, fuel_efficiencies_m_per_l: numpy.ndarray) -> numpy.ndarray:
+    """
+    log2(1 / average absolute difference in m/L) of each row of predictions, higher number means better fit
+    """
+    return fitness_from_difference_sums(difference_sums(predictions, fuel_efficiencies_m_per_l), predictions.shape[1])
+
+def difference_sums(predictions: numpy.ndarray, fuel_efficiencies_m_per_l: numpy.ndarray) -> numpy.ndarray:
+    """
+    sum of the absolute differences in m/L of each row of predictions, in float64 whatever the precision of the predictions
+    """
+    with numpy.errstate(all="ignore"):
+        return numpy.abs(fuel_efficiencies_m_per_l.astype(predictions.dtype, copy=False) - predictions).sum(axis=1, dtype=numpy.float64)
+
+def fitness_from_difference_sums(difference_sums_m_per_l: numpy.ndarray, number_of_trips: int) -> numpy.ndarray:
+    with numpy.errstate(all="ignore"):
+        return numpy.log2(1 / (difference_sums_m_per_l / number_of_trips))
+
+def difference_sums_from_fitness(fitness_scores: numpy.ndarray, number_of_trips: int) -> numpy.ndarray:
+    """
+    inverse of fitness_from_difference_sums, up to rounding
+    """
+    with numpy.errstate(all="ignore"):
+        return number_of_trips / numpy.exp2(fitness_scores)
+
+def racing_difference_sums(coefficients: numpy.ndarray, trip_basis: TripBasis, fuel_efficiencies_m_per_l: numpy.ndarray, maximum_difference_sums_m_per_l: numpy.ndarray, block_size: int, confidence_z: float) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    difference_sums of the predictions of every decoded chromosome, evaluated block_size trips at a time,
+    which stops evaluating a chromosome on the remaining trips once a lower bound of its sum is over its maximum
+
+    the lower bound is the larger of the sum over the trips evaluated so far, as the sum can only grow,
+    and the number of trips times the mean absolute difference so far minus confidence_z standard errors,
+    which only holds if the trips are in random order
+
+    args:
+        coefficients: numpy.ndarray - shape (population size, NUMBER_OF_VARIABLES, GENES_PER_VARIABLE / 2), see decode_population
+        maximum_difference_sums_m_per_l: numpy.ndarray - shape (population size,)
+
+    returns:
+        the sums, or their lower bound (above the maximum) for the chromosomes that were stopped,
+        and the number of trips each chromosome was evaluated on
+    """
+    assert block_size > 0
+    assert confidence_z >= 0
+    number_of_trips: int = len(trip_basis)
+    fuel_efficiencies_m_per_l = fuel_efficiencies_m_per_l.astype(trip_basis.dtype, copy=False)
+    sums_m_per_l: numpy.ndarray = numpy.zeros(coefficients.shape[0])
+    squared_sums_m_per_l: numpy.ndarray = numpy.zeros(coefficients.shape[0])
+    lower_bounds_m_per_l: numpy.ndarray = numpy.zeros(coefficients.shape[0])
+    trips_evaluated: numpy.ndarray = numpy.zeros(coefficients.shape[0], dtype=numpy.int64)
+    racing_indices: numpy.ndarray = numpy.arange(coefficients.shape[0])
+    for start in range(0, number_of_trips, block_size):
+        block: slice = slice(start, start + block_size)
+        predictions: numpy.ndarray = trip_basis.predict_population(coefficients[racing_indices], block)
+        trips_evaluated[racing_indices] += predictions.shape[1]
+        with numpy.errstate(all="ignore"):
+            differences_m_per_l: numpy.ndarray = numpy.abs(fuel_efficiencies_m_per_l[block] - predictions)
+            sums_m_per_l[racing_indices] += differences_m_per_l.sum(axis=1, dtype=numpy.float64)
+            squared_sums_m_per_l[racing_indices] += (differences_m_per_l * differences_m_per_l).sum(axis=1, dtype=numpy.float64)
+            if start + block_size < number_of_trips:
+                trips: numpy.ndarray = trips_evaluated[racing_indices]
+                means_m_per_l: numpy.ndarray = sums_m_per_l[racing_indices] / trips
+                variances: numpy.ndarray = numpy.maximum(squared_sums_m_per_l[racing_indices] / trips - means_m_per_l * means_m_per_l, 0.0)
+                # fmax, as the statistical bound is nan for an infinite sum, whose exact bound is already over any maximum
+                lower_bounds_m_per_l[racing_indices] = numpy.fmax(
+                    sums_m_per_l[racing_indices],
+                    number_of_trips * (means_m_per_l - confidence_z * numpy.sqrt(variances / trips))
+                )
+            else:
+                lower_bounds_m_per_l[racing_indices] = sums_m_per_l[racing_indices]
+        # a nan sum stays nan, so it is stopped too
+        racing_indices = racing_indices[lower_bounds_m_per_l[racing_indices] <= maximum_difference_sums_m_per_l[racing_indices]]
+        if len(racing_indices) == 0:
+            break
+    return lower_bounds_m_per_l, trips_evaluated
+
+def rank_disagreement(fitness_scores: numpy.ndarray, reference_fitness_scores: numpy.ndarray) -> float:
+    """
+    fraction of the pairs of chromosomes that fitness_scores order differently than reference_fitness_scores,
+    nan counts as the lowest fitness and ties are ordered by position
+    """
+    assert fitness_scores.shape == reference_fitness_scores.shape and fitness_scores.ndim == 1
+    if len(fitness_scores) < 2:
+        return 0.0
+    ranks: list[numpy.ndarray] = [
+        numpy.argsort(numpy.argsort(numpy.nan_to_num(scores, nan=-numpy.inf), kind="stable"), kind="stable")
+        for scores in (fitness_scores, reference_fitness_scores)
+    ]
+    first, second = numpy.triu_indices(len(fitness_scores), 1)
+    disagreements: numpy.ndarray = (ranks[0][first] < ranks[0][second]) != (ranks[1][first] < ranks[1][second])
+    return float(disagreements.mean())
+
+def population_fitness(population: Population, features: numpy.ndarray, fuel_efficiencies_m_per_l: numpy.ndarray) -> numpy.ndarray:
+    """
+    fitness score of every chromosome in the population over all of the given trips
+
+    returns:
+        numpy.ndarray - shape (population size,)
+    """
+    return fitness_from_predictions(predict_population(decode_population(population), features), fuel_efficiencies_m_per_l)
@@ -1,5 +1,4 @@
-from math import log, sin
-from scipy.stats import norm
+import numpy
 import config
 
 import warnings
@@ -11,6 +10,9 @@ SolverFloats = tuple[float, ...]
 STANDARD_DEVIATION_MULTIPLIER: float = 100.0
 
 def bounded_to_gauss(x: float, mean: float = 0.0, standard_deviation: float = 1.0) -> float:
+    # scipy is only imported once genes are decoded, importing scipy.stats takes longer than the rest of the solver
+    from scipy.stats import norm
+
     # Clamp x into the open interval (0, 1)
     eps = 1e-10
     u = min(max(x, eps), 1 - eps)
@@ -23,6 +25,123 @@ def bounded_to_gauss(x: float, mean: float = 0.0, standard_deviation: float = 1.
     assert isinstance(gaussian, float)
     return gaussian
 
+def bounded_to_gauss_array(x: numpy.ndarray, mean: numpy.ndarray | float = 0.0, standard_deviation: numpy.ndarray | float = 1.0) -> numpy.ndarray:
+    """
+    array version of bounded_to_gauss, converting every value with a single call to the inverse normal
+    (ndtri is what norm.ppf uses internally, without its per-call argument checking overhead)
+    """
+    from scipy.special import ndtri
+
+    eps = 1e-10
+    u = numpy.clip(x, eps, 1 - eps)
+    return ndtri(u) * standard_deviation + mean
+
+def decode_solution_parameters(genes: numpy.ndarray) -> numpy.ndarray:
+    """
+    decodes the genes of any number of SolverInputSolutions at once
+
+    args:
+        genes: numpy.ndarray - shape (..., GENES_PER_VARIABLE), values in the range [0, 1]
+
+    returns:
+        numpy.ndarray - shape (..., GENES_PER_VARIABLE / 2), the parameters p used by SolverInputSolution.f
+    """
+    assert genes.shape[-1] == config.GENES_PER_VARIABLE
+    # same argument order as SolverInputSolution.f, where the scaled standard deviation gene is passed as the mean
+    return bounded_to_gauss_array(genes[..., 0::2], genes[..., 1::2]*STANDARD_DEVIATION_MULTIPLIER)
+
+# x^5, x^4, x^3, x^2, x, log(x) and x*log(x), the terms of SolverInputSolution.f that only depend on x, see solution_basis
+BASIS_SIZE: int = 7
+
+def positive_inputs(x: numpy.ndarray) -> numpy.ndarray:
+    """
+    x with 0 replaced by a tiny positive value, as SolverInputSolution.f is not defined for 0
+
+    raises:
+        Exception - if any value of x is negative
+    """
+    x = numpy.where(x == 0, 0.000000001, x)
+    if numpy.any(x <= 0):
+        raise Exception("Input value x is expected to be a positive and non-zero scalar value, but was negative or 0")
+    return x
+
+def solution_basis(x: numpy.ndarray) -> numpy.ndarray:
+    """
+    the terms of the polynomial and the logarithm of SolverInputSolution.f, which only depend on x,
+    so they can be computed once for inputs that are evaluated with many solutions
+
+    returns:
+        numpy.ndarray - shape (BASIS_SIZE, *x.shape), the polynomial and the logarithm are the sum of these times basis_weights
+    """
+    x = positive_inputs(x)
+    with numpy.errstate(all="ignore"):
+        x_squared: numpy.ndarray = x*x
+        log_x: numpy.ndarray = numpy.log(x)
+        return numpy.stack((x_squared*x_squared*x, x_squared*x_squared, x_squared*x, x_squared, x, log_x, x*log_x))
+
+def basis_weights(p: numpy.ndarray) -> numpy.ndarray:
+    """
+    args:
+        p: numpy.ndarray - shape (..., GENES_PER_VARIABLE / 2), decoded parameters (see decode_solution_parameters)
+
+    returns:
+        numpy.ndarray - shape (..., BASIS_SIZE), what each term of solution_basis is multiplied by
+    """
+    with numpy.errstate(all="ignore"):
+        return numpy.concatenate((
+            p[..., 0:5],
+            numpy.where(p[..., 17:18] != 1, p[..., 16:17]/numpy.log(numpy.abs(p[..., 17:18])), 0.0),
+            numpy.where(p[..., 19:20] != 1, p[..., 18:19]/numpy.log(numpy.abs(p[..., 19:20])), 0.0)
+        ), axis=-1)
+
+def evaluate_elementwise_terms(p: numpy.ndarray, x: numpy.ndarray) -> numpy.ndarray:
+    """
+    the terms of SolverInputSolution.f that are not in solution_basis: the constant, the reciprocal, the rational function,
+    the sines and the exponent, which have to be evaluated for every pair of solution and input
+
+    args:
+        p: numpy.ndarray - shape (..., GENES_PER_VARIABLE / 2), decoded parameters (see decode_solution_parameters)
+        x: numpy.ndarray - input values, must broadcast against p[..., 0]
+
+    returns:
+        numpy.ndarray - y values, with the broadcast shape of p[..., 0] and x
+    """
+    x = positive_inputs(x)
+    p = numpy.moveaxis(p, -1, 0)
+    with numpy.errstate(all="ignore"):
+        reciprocal_denominator = x + p[7]
+        y = p[5] + numpy.where(reciprocal_denominator != 0, p[6]/reciprocal_denominator, 0.0)
+        rational_denominator = ((p[12]*x + p[13])*x + p[14])*x + p[15]
+        rational_numerator = ((p[8]*x + p[9])*x + p[10])*x + p[11]
+        y = y + numpy.where(rational_denominator != 0, rational_numerator/rational_denominator, 0.0)
+        y = y + p[20]*numpy.sin(p[21]*x + p[22]) + p[23]*numpy.sin(p[24]*x + p[25]) + p[26]*numpy.sin(p[27]*x + p[28])
+        y = y + p[29]*numpy.sin(p[30]*x + p[31]) + p[32]*numpy.sin(p[33]*x + p[34])
+        # genes arrive as numpy floats, so a negative base with a non-whole x gives nan rather than a complex number,
+        # and the scalar version skips the whole exponent term on that or on an overflow (both raise a RuntimeWarning)
+        exponent = p[35]*p[36]**x + p[37]*x*p[38]**x
+        y = y + numpy.where(numpy.isfinite(exponent), exponent, 0.0)
+    return y
+
+def evaluate_solution_parameters(p: numpy.ndarray, x: numpy.ndarray) -> numpy.ndarray:
+    """
+    array version of SolverInputSolution.f, operating on decoded parameters
+
+    args:
+        p: numpy.ndarray - shape (..., GENES_PER_VARIABLE / 2), decoded parameters (see decode_solution_parameters)
+        x: numpy.ndarray - input values, must broadcast against p[..., 0]
+
+    returns:
+        numpy.ndarray - y values, with the broadcast shape of p[..., 0] and x
+    """
+    x = positive_inputs(x)
+    q = numpy.moveaxis(p, -1, 0)
+    with numpy.errstate(all="ignore"):
+        y = ((((q[0]*x + q[1])*x + q[2])*x + q[3])*x + q[4])*x
+        log_x = numpy.log(x)
+        y = y + numpy.where(q[17] != 1, q[16]*(log_x/numpy.log(numpy.abs(q[17]))), 0.0)
+        y = y + numpy.where(q[19] != 1, q[18]*x*(log_x/numpy.log(numpy.abs(q[19]))), 0.0)
+    return y + evaluate_elementwise_terms(p, x)
+
 class SolverInputSolution:
     """
     Represents a potential solution that the solver has generated for a single input variable.
@@ -46,47 +165,51 @@ class SolverInputSolution:
         assert isinstance(solution_parameters, tuple)
         assert len(solution_parameters) == config.GENES_PER_VARIABLE
         self.__solution_parameters: SolverFloats = solution_parameters
+        self.__compiled: CompiledSolverInputSolution | None = None
 
     @property
     def solution_parameters(self) -> SolverFloats:
         return self.__solution_parameters
 
-    def f(self, x: float) -> float:
-        if x == 0:
-            x = 0.000000001
-        if x <= 0:
-            raise Exception("Input value x is expected to be a positive and non-zero scalar value, but was negative or 0")
-        raw_solution_parameters: list[float] = [self.__solution_parameters[i] for i in range(0, len(self.__solution_parameters), 2)]
-        standard_deviations: list[float] = [self.__solution_parameters[i+1]*STANDARD_DEVIATION_MULTIPLIER for i in range(0, len(self.__solution_parameters), 2)]
-        solution_parameters: list[tuple[float, float]] = list(zip(raw_solution_parameters, standard_deviations, strict=True))
-        p: SolverFloats = SolverFloats([bounded_to_gauss(v, std) for (v, std) in solution_parameters])
-        y: float = p[0]*x**5 + p[1]*x**4 + p[2]*x**3 +  p[3]*x**2 + p[4]*x + p[5]
-        if (x+p[7]) != 0:
-            y += p[6]/(x+p[7])
-        if (p[12]*x**3 + p[13]*x**2 + p[14]*x + p[15]) != 0:
-            y += (p[8]*x**3 + p[9]*x**2 + p[10]*x + p[11]) / (p[12]*x**3 + p[13]*x**2 + p[14]*x + p[15])
-        if p[17] != 1:
-            y += p[16]*log(x, abs(p[17]))
-        if p[19] != 1:
-            y += p[18]*x*log(x, abs(p[19]))
-        y += p[20]*sin(p[21]*x + p[22]) + p[23]*sin(p[24]*x + p[25]) + p[26]*sin(p[27]*x + p[28])
-        y += p[29]*sin(p[30]*x + p[31]) + p[32]*sin(p[33]*x + p[34])
-        try:
-            y += p[35]*p[36]**x + p[37]*x*p[38]**x
-            y = y.real # y may be complex after this part since p[36] or p[38] may be negative and x may not be a whole number
-        except OverflowError:
-            pass
-        except RuntimeWarning:
-            pass
+    @property
+    def compiled(self) -> "CompiledSolverInputSolution":
+        """
+        decoded form of this solution, the gaussian conversion of the parameters is only done once
+        """
+        if self.__compiled is None:
+            self.__compiled = CompiledSolverInputSolution(decode_solution_parameters(numpy.array(self.__solution_parameters, dtype=numpy.float64)))
+        return self.__compiled
 
+    def f(self, x: float) -> float:
+        y: float = float(self.compiled.f(numpy.float64(x)))
         assert isinstance(y, float)
         return y
 
     def __str__(self) -> str:
-        raw_solution_parameters: list[float] = [self.__solution_parameters[i] for i in range(0, len(self.__solution_parameters), 2)]
-        standard_deviations: list[float] = [self.__solution_parameters[i+1]*STANDARD_DEVIATION_MULTIPLIER for i in range(0, len(self.__solution_parameters), 2)]
-        solution_parameters: list[tuple[float, float]] = list(zip(raw_solution_parameters, standard_deviations, strict=True))
-        p: SolverFloats = SolverFloats([bounded_to_gauss(v, std) for (v, std) in solution_parameters])
+        return str(self.compiled)
+
+class CompiledSolverInputSolution:
+    """
+    A SolverInputSolution with its parameters already converted through the gaussian function,
+    which can be evaluated over an array of x values in a single call.
+    """
+    def __init__(self, coefficients: numpy.ndarray):
+        """
+        args:
+            coefficients: numpy.ndarray - shape (GENES_PER_VARIABLE / 2,), see decode_solution_parameters
+        """
+        assert coefficients.shape == (config.GENES_PER_VARIABLE // 2,)
+        self.__coefficients: numpy.ndarray = coefficients
+
+    @property
+    def coefficients(self) -> numpy.ndarray:
+        return self.__coefficients
+
+    def f(self, x: numpy.ndarray | float) -> numpy.ndarray:
+        return evaluate_solution_parameters(self.__coefficients, numpy.asarray(x))
+
+    def __str__(self) -> str:
+        p: SolverFloats = SolverFloats(float(coefficient) for coefficient in self.__coefficients)
         equation_string: str = str(
             "{p0:.2f}*x^5 + {p1:.2f}*x^4 + {p2:.2f}*x^3 + {p3:.2f}*x^2 + {p4:.2f}*x + {p5:.2f} +\n"
             "{p6:.2f}/(x + {p7:.2f}) +\n"
@@ -140,5 +263,6 @@ class SolverInputSolution:
 
 if __name__ == "__main__":
     from random import random
-    test = SolverInputSolution(tuple(random() for _ in range(39))) # type: ignore
+    test = SolverInputSolution(tuple(random() for _ in range(config.GENES_PER_VARIABLE))) # type: ignore
     print(test.f(1))
+    print(test.compiled.f(numpy.linspace(0.1, 1, 10)))
@@ -1,8 +1,12 @@
-from solver_input_solution import SolverInputSolution, SolverFloats
+from solver_input_solution import CompiledSolverInputSolution, SolverInputSolution, SolverFloats, decode_solution_parameters
+from population_evaluator import predict_population
 from vehicle_trip import VehicleTrip
 from datetime import datetime
 from math import log2
+import numpy
 import config
+from chromosome import Chromosome, population_genes
+from trip_table import TRIP_TABLE_FEATURES
 
 AllSolverFloats = tuple[SolverFloats, ...]
 
@@ -16,6 +20,7 @@ class SolverSolution:
         self.__solver_input_solutions: tuple[SolverInputSolution, ...] = tuple([
             SolverInputSolution(solution_parameters) for solution_parameters in all_solution_parameters
         ])
+        self.__compiled: CompiledSolverSolution | None = None
 
     @property
     def all_solution_parameters(self) -> AllSolverFloats:
@@ -25,22 +30,22 @@ class SolverSolution:
     def solver_input_solutions(self) -> tuple[SolverInputSolution, ...]:
         return self.__solver_input_solutions
 
+    @property
+    def compiled(self) -> "CompiledSolverSolution":
+        """
+        decoded form of this solution, the parameters of all input variables are converted together, once
+        """
+        if self.__compiled is None:
+            self.__compiled = CompiledSolverSolution(decode_solution_parameters(numpy.array(self.all_solution_parameters, dtype=numpy.float64)))
+        return self.__compiled
+
     def f(self, vehicle_trip: VehicleTrip) -> float:
         """
         returns calculated / estimated vehicle trip efficiency
         based on the inputs in the provided vehicle trip and the solver solution parameters
         """
-        y: float = (
-            self.__solver_input_solutions[0].f(vehicle_trip.normalized_time_since_t0) +
-            self.__solver_input_solutions[1].f(vehicle_trip.normalized_odometer) +
-            self.__solver_input_solutions[2].f(vehicle_trip.normalized_trip_distance) +
-            self.__solver_input_solutions[3].f(vehicle_trip.normalized_vehicle_temperature) +
-            self.__solver_input_solutions[4].f(vehicle_trip.normalized_trip_engine_running_time) +
-            self.__solver_input_solutions[5].f(vehicle_trip.normalized_temperature_difference_between_vehicle_and_engine_operating) +
-            self.__solver_input_solutions[6].f(vehicle_trip.normalized_trip_average_speed) +
-            self.__solver_input_solutions[7].f(vehicle_trip.normalized_time_of_day) +
-            self.__solver_input_solutions[8].f(vehicle_trip.normalized_time_of_year)
-        )
+        features: numpy.ndarray = numpy.array([[getattr(vehicle_trip, feature) for feature in TRIP_TABLE_FEATURES]], dtype=numpy.float64)
+        y: float = float(self.compiled.f(features)[0])
 
         assert isinstance(y, float)
         return y
@@ -65,6 +70,40 @@ class SolverSolution:
         return diff
 
     def __str__(self) -> str:
+        return str(self.compiled)
+
+class CompiledSolverSolution:
+    """
+    A SolverSolution with the parameters of every input variable already converted through the gaussian function,
+    which can be evaluated over many trips in a single call.
+    """
+    def __init__(self, coefficients: numpy.ndarray):
+        """
+        args:
+            coefficients: numpy.ndarray - shape (NUMBER_OF_VARIABLES, GENES_PER_VARIABLE / 2), see decode_solution_parameters
+        """
+        assert coefficients.shape == (config.NUMBER_OF_VARIABLES, config.GENES_PER_VARIABLE // 2)
+        self.__coefficients: numpy.ndarray = coefficients
+
+    @property
+    def coefficients(self) -> numpy.ndarray:
+        return self.__coefficients
+
+    @property
+    def solver_input_solutions(self) -> tuple[CompiledSolverInputSolution, ...]:
+        return tuple([CompiledSolverInputSolution(coefficients) for coefficients in self.__coefficients])
+
+    def f(self, features: numpy.ndarray) -> numpy.ndarray:
+        """
+        returns the estimated fuel efficiency (m/L) of every trip
+
+        args:
+            features: numpy.ndarray - shape (number of trips, NUMBER_OF_VARIABLES), see TripTable.features
+        """
+        return predict_population(self.__coefficients[numpy.newaxis], features)[0]
+
+    def __str__(self) -> str:
+        solver_input_solutions: tuple[CompiledSolverInputSolution, ...] = self.solver_input_solutions
         display: str = str(
             "Date and Time:\n"
             "{}\n"
@@ -85,19 +124,27 @@ class SolverSolution:
             "Time of Year:\n"
             "{}"
         ).format(
-            str(self.__solver_input_solutions[0]),
-            str(self.__solver_input_solutions[1]),
-            str(self.__solver_input_solutions[2]),
-            str(self.__solver_input_solutions[3]),
-            str(self.__solver_input_solutions[4]),
-            str(self.__solver_input_solutions[5]),
-            str(self.__solver_input_solutions[6]),
-            str(self.__solver_input_solutions[7]),
-            str(self.__solver_input_solutions[8])
+            str(solver_input_solutions[0]),
+            str(solver_input_solutions[1]),
+            str(solver_input_solutions[2]),
+            str(solver_input_solutions[3]),
+            str(solver_input_solutions[4]),
+            str(solver_input_solutions[5]),
+            str(solver_input_solutions[6]),
+            str(solver_input_solutions[7]),
+            str(solver_input_solutions[8])
         )
 
         return display
 
+def solver_solution_from_chromosome(chromosome: Chromosome) -> SolverSolution:
+    """
+    builds the SolverSolution that genetic_learner.fitness evaluates for this chromosome
+    """
+    genes: numpy.ndarray = population_genes(numpy.asarray(chromosome)[numpy.newaxis, :])[0]
+    # keep the genes as numpy floats, like the fitness function receives them from pygad
+    return SolverSolution(tuple(tuple(variable_genes) for variable_genes in genes))
+
 if __name__ == "__main__":
     from random import random
     test = SolverSolution((
@@ -111,11 +158,5 @@ if __name__ == "__main__":
         tuple(random() for _ in range(config.GENES_PER_VARIABLE)),
         tuple(random() for _ in range(config.GENES_PER_VARIABLE))
     )) # type: ignore
-    vehicle_trip = VehicleTrip()
-    vehicle_trip.date_and_time = datetime(2025, 1, 1)
-    vehicle_trip.odometer_km = 123456
-    vehicle_trip.trip_distance_km = 8.5
-    vehicle_trip.vehicle_temperature_celsius = 10
-    vehicle_trip.trip_engine_running_time_m = 11.32
-    vehicle_trip.fuel_efficiency_l_per_hundred_km = 7.1
+    vehicle_trip = VehicleTrip.from_trip_log(datetime(2025, 1, 1), 123456, 8.5, 10, 11.32, 7.1)
     print(test.fitness(vehicle_trip))
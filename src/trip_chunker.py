@@ -0,0 +1,40 @@
+import numpy
+
+from trip_table import TripTable
+
+TRIP_CHUNK_STRATEGIES: tuple[str, ...] = ("rotating", "stratified")
+
+class TripChunker:
+    """
+    Splits a TripTable into chunks of about chunk_size trips, so that each generation can be scored on one chunk
+    instead of on every trip. Generation g is scored on chunk g % number_of_chunks.
+
+    Strategies:
+    - rotating: the trips are shuffled once, then cut into consecutive chunks
+    - stratified: every chunk takes every n-th trip ordered by fuel efficiency, so each chunk covers the whole range of fuel efficiencies
+
+    The chunks are the same in every process, so pygad's worker processes agree on which trips a generation uses.
+    """
+    def __init__(self, trip_table: TripTable, chunk_size: int, strategy: str):
+        assert chunk_size > 0
+        if strategy not in TRIP_CHUNK_STRATEGIES:
+            raise ValueError("Unknown trip chunk strategy \"{}\", expected one of {}".format(strategy, TRIP_CHUNK_STRATEGIES))
+        number_of_chunks: int = max(1, -(-len(trip_table) // chunk_size))
+        if strategy == "rotating":
+            order: numpy.ndarray = numpy.random.default_rng(0).permutation(len(trip_table))
+            chunks_trip_indices: list[numpy.ndarray] = numpy.array_split(order, number_of_chunks)
+        else:
+            order: numpy.ndarray = numpy.argsort(trip_table.fuel_efficiency_m_per_l, kind="stable")
+            chunks_trip_indices: list[numpy.ndarray] = [order[chunk_index::number_of_chunks] for chunk_index in range(number_of_chunks)]
+        # sorted indices keep each chunk in the same order as the trip log
+        self.__chunks: tuple[TripTable, ...] = tuple([trip_table.take(numpy.sort(trip_indices)) for trip_indices in chunks_trip_indices])
+
+    @property
+    def number_of_chunks(self) -> int:
+        return len(self.__chunks)
+
+    def chunk_index(self, generation: int) -> int:
+        return generation % len(self.__chunks)
+
+    def chunk(self, chunk_index: int) -> TripTable:
+        return self.__chunks[chunk_index]
@@ -0,0 +1,169 @@
+import hashlib
+
+import numpy
+
+import config
+from vehicle_trip import (
+    DATE_AND_TIME_S_NORMALIZATION_FACTOR,
+    ENGINE_OPERATING_TEMPERATURE_KELVIN,
+    ODOMETER_M_NORMALIZATION_FACTOR,
+    TEMPERATURE_DIFFERENCE_BETWEEN_VEHICLE_AND_ENGINE_OPERATING_NORMALIZATION_FACTOR,
+    TIME_OF_DAY_S_SINCE_MIDNIGHT_NORMALIZATION_FACTOR,
+    TIME_OF_YEAR_S_SINCE_NEW_YEAR_NORMALIZATION_FACTOR,
+    TRIP_AVERAGE_SPEED_M_PER_S_NORMALIZATION_FACTOR,
+    TRIP_DISTANCE_M_NORMALIZATION_FACTOR,
+    TRIP_ENGINE_RUNNING_TIME_S_NORMALIZATION_FACTOR,
+    VEHICLE_TEMPERATURE_KELVIN_NORMALIZATION_FACTOR,
+    VehicleTrip,
+    t0
+)
+
+# normalized VehicleTrip inputs, in the order of the SolverInputSolutions
+TRIP_TABLE_FEATURES: tuple[str, ...] = (
+    "normalized_time_since_t0",
+    "normalized_odometer",
+    "normalized_trip_distance",
+    "normalized_vehicle_temperature",
+    "normalized_trip_engine_running_time",
+    "normalized_temperature_difference_between_vehicle_and_engine_operating",
+    "normalized_trip_average_speed",
+    "normalized_time_of_day",
+    "normalized_time_of_year"
+)
+
+def trip_log_features(date_and_time: numpy.ndarray,
+                      odometer_km: numpy.ndarray,
+                      trip_distance_km: numpy.ndarray,
+                      vehicle_temperature_celsius: numpy.ndarray,
+                      trip_engine_running_time_m: numpy.ndarray) -> numpy.ndarray:
+    """
+    the normalized inputs of trips, from the columns of a trip log, with the same values as the VehicleTrips of those trips would have,
+    including the truncation of distances and times to whole meters and seconds
+
+    args:
+        date_and_time: numpy.ndarray - datetime64[s]
+        the other arguments: numpy.ndarray - float64, in the units of the trip log
+
+    returns:
+        numpy.ndarray - shape (number of trips, NUMBER_OF_VARIABLES), in TRIP_TABLE_FEATURES order
+    """
+    seconds: numpy.ndarray = date_and_time.astype("datetime64[s]")
+    odometer_m: numpy.ndarray = numpy.trunc(odometer_km * 1000)
+    trip_distance_m: numpy.ndarray = numpy.trunc(trip_distance_km * 1000)
+    vehicle_temperature_kelvin: numpy.ndarray = vehicle_temperature_celsius + 273.15
+    trip_engine_running_time_s: numpy.ndarray = numpy.trunc(trip_engine_running_time_m * 60)
+    features: numpy.ndarray = numpy.empty((len(seconds), len(TRIP_TABLE_FEATURES)), dtype=numpy.float64, order="F")
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        features[:, 0] = (seconds - numpy.datetime64(t0, "s")).astype(numpy.float64) / DATE_AND_TIME_S_NORMALIZATION_FACTOR
+        features[:, 1] = odometer_m / ODOMETER_M_NORMALIZATION_FACTOR
+        features[:, 2] = trip_distance_m / TRIP_DISTANCE_M_NORMALIZATION_FACTOR
+        features[:, 3] = vehicle_temperature_kelvin / VEHICLE_TEMPERATURE_KELVIN_NORMALIZATION_FACTOR
+        features[:, 4] = trip_engine_running_time_s / TRIP_ENGINE_RUNNING_TIME_S_NORMALIZATION_FACTOR
+        features[:, 5] = (ENGINE_OPERATING_TEMPERATURE_KELVIN - vehicle_temperature_kelvin) / TEMPERATURE_DIFFERENCE_BETWEEN_VEHICLE_AND_ENGINE_OPERATING_NORMALIZATION_FACTOR
+        features[:, 6] = trip_distance_m / trip_engine_running_time_s / TRIP_AVERAGE_SPEED_M_PER_S_NORMALIZATION_FACTOR
+    features[:, 7] = (seconds - seconds.astype("datetime64[D]")).astype(numpy.float64) / TIME_OF_DAY_S_SINCE_MIDNIGHT_NORMALIZATION_FACTOR
+    features[:, 8] = (seconds - seconds.astype("datetime64[Y]")).astype(numpy.float64) / TIME_OF_YEAR_S_SINCE_NEW_YEAR_NORMALIZATION_FACTOR
+    return features
+
+class TripTable:
+    """
+    Read-only, array backed view of a list of VehicleTrips.
+
+    Every normalized input of SolverSolution.f is computed once and stored as a contiguous float64 column,
+    along with the trips' actual fuel efficiency.
+    """
+    def __init__(self, vehicle_trips: list[VehicleTrip]):
+        assert len(TRIP_TABLE_FEATURES) == config.NUMBER_OF_VARIABLES
+        features: numpy.ndarray = numpy.empty((len(vehicle_trips), len(TRIP_TABLE_FEATURES)), dtype=numpy.float64, order="F")
+        for feature_index, feature in enumerate(TRIP_TABLE_FEATURES):
+            features[:, feature_index] = [getattr(vehicle_trip, feature) for vehicle_trip in vehicle_trips]
+        fuel_efficiency_m_per_l: numpy.ndarray = numpy.array([vehicle_trip.fuel_efficiency_m_per_l for vehicle_trip in vehicle_trips], dtype=numpy.float64)
+        self.__set_columns(features, fuel_efficiency_m_per_l)
+
+    @classmethod
+    def from_columns(cls, features: numpy.ndarray, fuel_efficiency_m_per_l: numpy.ndarray) -> "TripTable":
+        """
+        builds a TripTable directly from its columns
+
+        args:
+            features: numpy.ndarray - shape (number of trips, NUMBER_OF_VARIABLES), in TRIP_TABLE_FEATURES order
+            fuel_efficiency_m_per_l: numpy.ndarray - shape (number of trips,)
+        """
+        trip_table: TripTable = cls.__new__(cls)
+        trip_table.__set_columns(features, fuel_efficiency_m_per_l)
+        return trip_table
+
+    @classmethod
+    def from_trip_log(cls,
+                      date_and_time: numpy.ndarray,
+                      odometer_km: numpy.ndarray,
+                      trip_distance_km: numpy.ndarray,
+                      vehicle_temperature_celsius: numpy.ndarray,
+                      trip_engine_running_time_m: numpy.ndarray,
+                      fuel_efficiency_l_per_hundred_km: numpy.ndarray) -> "TripTable":
+        """
+        builds a TripTable from the columns of a trip log, see trip_log_features,
+        with the fuel efficiency truncated to whole meters per liter like VehicleTrip does
+        """
+        features: numpy.ndarray = trip_log_features(date_and_time, odometer_km, trip_distance_km, vehicle_temperature_celsius, trip_engine_running_time_m)
+        fuel_efficiency_m_per_l: numpy.ndarray = numpy.trunc(100000 / fuel_efficiency_l_per_hundred_km)
+        return cls.from_columns(features, fuel_efficiency_m_per_l)
+
+    def __set_columns(self, features: numpy.ndarray, fuel_efficiency_m_per_l: numpy.ndarray):
+        features = numpy.asfortranarray(features, dtype=numpy.float64)
+        assert features.shape[1] == len(TRIP_TABLE_FEATURES)
+        fuel_efficiency_m_per_l = numpy.ascontiguousarray(fuel_efficiency_m_per_l, dtype=numpy.float64)
+        assert features.shape[0] == fuel_efficiency_m_per_l.shape[0]
+        features.flags.writeable = False
+        fuel_efficiency_m_per_l.flags.writeable = False
+        fuel_efficiency_l_per_hundred_km: numpy.ndarray = 100000 / fuel_efficiency_m_per_l
+        fuel_efficiency_l_per_hundred_km.flags.writeable = False
+        self.__features: numpy.ndarray = features
+        self.__fuel_efficiency_m_per_l: numpy.ndarray = fuel_efficiency_m_per_l
+        self.__fuel_efficiency_l_per_hundred_km: numpy.ndarray = fuel_efficiency_l_per_hundred_km
+
+    def take(self, trip_indices: numpy.ndarray) -> "TripTable":
+        """
+        returns a new TripTable with only the given trips, in the given order
+        """
+        return TripTable.from_columns(self.__features[trip_indices], self.__fuel_efficiency_m_per_l[trip_indices])
+
+    def concatenate(self, other: "TripTable") -> "TripTable":
+        """
+        returns a new TripTable with the trips of self followed by the trips of other
+        """
+        return TripTable.from_columns(
+            numpy.concatenate((self.__features, other.features)),
+            numpy.concatenate((self.__fuel_efficiency_m_per_l, other.fuel_efficiency_m_per_l))
+        )
+
+    def checksum(self, number_of_trips: int) -> bytes:
+        """
+        identifies the first number_of_trips trips, to tell whether a later TripTable only added trips after them
+        """
+        assert 0 <= number_of_trips <= len(self)
+        checksum: hashlib.blake2b = hashlib.blake2b(digest_size=16)
+        checksum.update(numpy.ascontiguousarray(self.__features[:number_of_trips]).tobytes())
+        checksum.update(self.__fuel_efficiency_m_per_l[:number_of_trips].tobytes())
+        return checksum.digest()
+
+    def __len__(self) -> int:
+        return self.__features.shape[0]
+
+    @property
+    def features(self) -> numpy.ndarray:
+        """
+        shape (number of trips, NUMBER_OF_VARIABLES), column i is the input of SolverInputSolution i
+        """
+        return self.__features
+
+    def column(self, feature: str) -> numpy.ndarray:
+        return self.__features[:, TRIP_TABLE_FEATURES.index(feature)]
+
+    @property
+    def fuel_efficiency_m_per_l(self) -> numpy.ndarray:
+        return self.__fuel_efficiency_m_per_l
+
+    @property
+    def fuel_efficiency_l_per_hundred_km(self) -> numpy.ndarray:
+        return self.__fuel_efficiency_l_per_hundred_km
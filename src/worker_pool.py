@@ -0,0 +1,118 @@
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from types import ModuleType
+from typing import Any
+
+import numpy
+
+import config
+from chromosome import Population
+from fitness_evaluator import FitnessEvaluator
+from trip_table import TRIP_TABLE_FEATURES, TripTable
+
+# state of a worker process, set by initialize_worker
+worker_shared_memory: SharedMemory | None = None
+worker_fitness_evaluator: FitnessEvaluator | None = None
+
+def config_values() -> dict[str, Any]:
+    """
+    the current configuration, so that spawned workers use the same settings as the process that started them
+    """
+    return {name: value for name, value in vars(config).items() if name.isupper() and not isinstance(value, ModuleType)}
+
+def shared_trip_table_size_bytes(number_of_trips: int) -> int:
+    return max(1, number_of_trips * (len(TRIP_TABLE_FEATURES) + 1) * numpy.dtype(numpy.float64).itemsize)
+
+def shared_trip_table_columns(buffer: memoryview | None, number_of_trips: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    the features and fuel efficiency columns of a TripTable, laid out one after the other in buffer
+    """
+    assert buffer is not None
+    features: numpy.ndarray = numpy.ndarray((number_of_trips, len(TRIP_TABLE_FEATURES)), dtype=numpy.float64, buffer=buffer, order="F")
+    fuel_efficiency_m_per_l: numpy.ndarray = numpy.ndarray((number_of_trips,), dtype=numpy.float64, buffer=buffer, offset=features.nbytes)
+    return features, fuel_efficiency_m_per_l
+
+def initialize_worker(shared_memory_name: str, number_of_trips: int, dataset_version: float, configuration: dict[str, Any]):
+    global worker_shared_memory, worker_fitness_evaluator
+    for name, value in configuration.items():
+        setattr(config, name, value)
+    worker_shared_memory = SharedMemory(name=shared_memory_name)
+    features, fuel_efficiency_m_per_l = shared_trip_table_columns(worker_shared_memory.buf, number_of_trips)
+    # the fitness cache stays in the parent, which only sends the chromosomes it has no score for
+    worker_fitness_evaluator = FitnessEvaluator(TripTable.from_columns(features, fuel_efficiency_m_per_l), dataset_version, None)
+
+def score_in_worker(chromosomes: Population, trip_chunk_index: int, fitness_cutoff: float, reduced_precision: bool) -> tuple[list[float], int, int]:
+    """
+    args:
+        reduced_precision: bool - FitnessEvaluator.reduced_precision of the process that started the worker, which only changes to False
+
+    returns:
+        the fitness scores, with the chromosomes pruned and trip evaluations saved by racing evaluation while scoring them
+    """
+    assert worker_fitness_evaluator is not None
+    if worker_fitness_evaluator.reduced_precision and not reduced_precision:
+        worker_fitness_evaluator.use_full_precision()
+    pruned_chromosomes: int = worker_fitness_evaluator.pruned_chromosomes
+    trip_evaluations_saved: int = worker_fitness_evaluator.trip_evaluations_saved
+    fitness_scores: list[float] = worker_fitness_evaluator.score(chromosomes, trip_chunk_index, fitness_cutoff)
+    return (
+        fitness_scores,
+        worker_fitness_evaluator.pruned_chromosomes - pruned_chromosomes,
+        worker_fitness_evaluator.trip_evaluations_saved - trip_evaluations_saved
+    )
+
+class FitnessWorkerPool:
+    """
+    Persistent pool of processes that score chromosomes for a FitnessEvaluator.
+
+    The trip table is copied once into shared memory, which every worker maps read-only,
+    so only chromosome batches and fitness scores are sent between processes, and memory does not grow with the number of workers.
+    The workers are spawned, so they do not re-run the data import of the process that starts them.
+    """
+    def __init__(self, fitness_evaluator: FitnessEvaluator, number_of_workers: int, batch_size: int):
+        assert number_of_workers > 0
+        assert batch_size > 0
+        self.__fitness_evaluator: FitnessEvaluator = fitness_evaluator
+        self.__number_of_workers: int = number_of_workers
+        self.__batch_size: int = batch_size
+        trip_table: TripTable = fitness_evaluator.trip_table
+        self.__shared_memory: SharedMemory = SharedMemory(create=True, size=shared_trip_table_size_bytes(len(trip_table)))
+        features, fuel_efficiency_m_per_l = shared_trip_table_columns(self.__shared_memory.buf, len(trip_table))
+        features[:] = trip_table.features
+        fuel_efficiency_m_per_l[:] = trip_table.fuel_efficiency_m_per_l
+        del features, fuel_efficiency_m_per_l # the shared memory can only be closed once nothing refers to its buffer
+        self.__executor: ProcessPoolExecutor = ProcessPoolExecutor(
+            max_workers=number_of_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initialize_worker,
+            initargs=(self.__shared_memory.name, len(trip_table), fitness_evaluator.dataset_version, config_values())
+        )
+
+    def evaluate(self, chromosomes: Population, trip_chunk_index: int, fitness_cutoff: float = -numpy.inf) -> list[float]:
+        """
+        same as FitnessEvaluator.evaluate, with the chromosomes that are not in the fitness cache scored by the workers
+        """
+        fitness_scores: list[float | None] = self.__fitness_evaluator.cached_fitness(chromosomes, trip_chunk_index)
+        uncached_indices: list[int] = [index for index, fitness in enumerate(fitness_scores) if fitness is None]
+        if len(uncached_indices) == 0:
+            return fitness_scores # type: ignore
+        # spread the chromosomes over every worker, in batches of at most batch_size
+        batch_size: int = min(self.__batch_size, -(-len(uncached_indices) // self.__number_of_workers))
+        batches: list[list[int]] = [uncached_indices[start:start + batch_size] for start in range(0, len(uncached_indices), batch_size)]
+        futures: list[Future] = [
+            self.__executor.submit(score_in_worker, numpy.ascontiguousarray(chromosomes[batch]), trip_chunk_index, fitness_cutoff, self.__fitness_evaluator.reduced_precision)
+            for batch in batches
+        ]
+        for batch, future in zip(batches, futures):
+            batch_fitness_scores, pruned_chromosomes, trip_evaluations_saved = future.result()
+            self.__fitness_evaluator.count_pruned(pruned_chromosomes, trip_evaluations_saved)
+            self.__fitness_evaluator.remember(chromosomes[batch], batch_fitness_scores, trip_chunk_index, fitness_cutoff)
+            for index, fitness in zip(batch, batch_fitness_scores):
+                fitness_scores[index] = fitness
+        return fitness_scores # type: ignore
+
+    def close(self):
+        self.__executor.shutdown()
+        self.__shared_memory.close()
+        self.__shared_memory.unlink()